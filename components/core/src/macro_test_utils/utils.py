@@ -39,7 +39,10 @@ from qgis.PyQt.QtWidgets import (
 )
 
 if TYPE_CHECKING:
-    from qgis_macros.macro import Position, WidgetSpec
+    from qgis_macros.macro import Macro, Position, WidgetSpec
+    from qgis_macros.macro_recorder import MacroRecorder
+
+FINISH_RECORDING_TIMEOUT_MS = 5000
 
 
 class Dialog(QDialog):
@@ -120,6 +123,25 @@ def wait(wait_ms: int) -> None:
         QgsApplication.processEvents()
 
 
+def finish_recording(recorder: "MacroRecorder") -> "Macro":
+    """Stop *recorder* and wait for the macro it builds in the background."""
+    results: list[Macro | Exception] = []
+    on_result = results.append
+    recorder.recorded_macro_loaded.connect(on_result)
+    recorder.recorded_macro_load_failed.connect(on_result)
+    recorder.stop_recording()
+    t = time.time()
+    while not results and time.time() - t < FINISH_RECORDING_TIMEOUT_MS / 1000:
+        QgsApplication.processEvents()
+    recorder.recorded_macro_loaded.disconnect(on_result)
+    recorder.recorded_macro_load_failed.disconnect(on_result)
+    if not results:
+        raise TimeoutError("The recorded macro was not built in time")  # noqa: TRY003
+    if isinstance(result := results[0], Exception):
+        raise result
+    return result
+
+
 class WidgetEventListener(QObject):
     double_clicked = pyqtSignal()  # Signal emitted when a double click is detected.
 
@@ -21,3 +21,15 @@
 MS_EPSILON = 20
 MAXIMUM_NEAREST_CANDIDATES = 4
 MAXIMUM_PARENT_DEPTH = 7
+MAXIMUM_DEFERRED_CAPTURES_PER_IDLE = 20
+MAXIMUM_SIMPLIFICATION_WINDOW = 64
+SPOOL_TAIL_LENGTH = 16
+SCOPED_WINDOW_POLL_INTERVAL_MS = 100
+SPOOL_FSYNC_INTERVAL = 50
+SPOOL_FSYNC_INTERVAL_MS = 1000
+NS_PER_MS = 1_000_000
+NS_PER_US = 1000
+RECORDER_FRAME_NS = 16_666_667
+LOAD_SHEDDING_RECOVERY_FRAMES = 30
+REDUCED_MOVE_SAMPLE_RATE = 15
+WIDGET_INDEX_CELL_SIZE = 64
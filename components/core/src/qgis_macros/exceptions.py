@@ -42,6 +42,38 @@ class WidgetNotFoundError(MacroPluginError):
         )
 
 
+class LayerNotFoundError(MacroPluginError):
+    """Exception raised when a layer is not found."""
+
+    def __init__(self, layer_id: str = "", layer_name: str = "") -> None:
+        """Initialize with the layer id and name."""
+        super().__init__(tr("Layer {} not found.", layer_name or layer_id))
+
+
+class AlgorithmNotFoundError(MacroPluginError):
+    """Exception raised when a processing algorithm is not found."""
+
+    def __init__(self, algorithm_id: str) -> None:
+        """Initialize with the algorithm id."""
+        super().__init__(tr("Processing algorithm {} not found.", algorithm_id))
+
+
+class AlgorithmFailedError(MacroPluginError):
+    """Exception raised when a processing algorithm run fails."""
+
+    def __init__(self, algorithm_id: str) -> None:
+        """Initialize with the algorithm id."""
+        super().__init__(tr("Processing algorithm {} failed.", algorithm_id))
+
+
+class TaskCancelledError(MacroPluginError):
+    """Raised when a background task is cancelled before it finishes."""
+
+    def __init__(self, description: str) -> None:
+        """Initialize with the description of the task."""
+        super().__init__(tr("Task {} was cancelled.", description))
+
+
 class MacroPlaybackEndedError(MacroPluginError):
     """Raised when macro playback ends due to an error."""
 
@@ -0,0 +1,299 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+
+"""Semantic recording and bulk replay of vector layer edits.
+
+Feature additions, attribute changes and geometry changes made while
+recording are stored as compact edit records next to the UI events of the
+macro. They can be replayed in bulk, either into the edit buffers of the
+layers or directly through their data providers, to measure the cost of
+the edits without the UI.
+
+Example::
+
+    from qgis_macros.layer_edits import apply_with_data_provider
+
+    apply_with_data_provider(macro.layer_edits)
+"""
+
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import groupby
+from typing import Any, ClassVar
+
+from qgis.core import (
+    NULL,
+    QgsFeature,
+    QgsField,
+    QgsGeometry,
+    QgsMapLayer,
+    QgsProject,
+    QgsVectorLayer,
+)
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QDate, QDateTime, Qt, QTime, QVariant
+from qgis_plugin_tools.tools.i18n import tr
+
+from qgis_macros.exceptions import LayerNotFoundError
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class LayerEdit:
+    """Addition of a feature or change of a feature attribute or geometry.
+
+    Attribute values are stored by field name and geometries as WKT. The
+    feature id of an added feature is the temporary id it got in the edit
+    buffer while recording. Later changes of the feature are merged into
+    its addition. Deletions of existing features are not recorded.
+    """
+
+    ADD_FEATURE: ClassVar[str] = "add_feature"
+    CHANGE_ATTRIBUTE: ClassVar[str] = "change_attribute"
+    CHANGE_GEOMETRY: ClassVar[str] = "change_geometry"
+
+    kind: str
+    layer_id: str
+    layer_name: str = ""
+    feature_id: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    geometry: str = ""
+
+
+class LayerEditRecorder:
+    """Records the edits of the vector layers of the current project.
+
+    Example::
+
+        recorder = LayerEditRecorder()
+        recorder.start()
+        ...
+        edits = recorder.stop()
+    """
+
+    def __init__(self) -> None:
+        """Initialize the recorder without recording."""
+        self.edits: list[LayerEdit] = []
+        self._added_features: dict[tuple[str, int], LayerEdit] = {}
+        self._connections: list[tuple[QgsVectorLayer, str, Callable[..., None]]] = []
+
+    def start(self) -> None:
+        """Start recording the edits of the current and added layers."""
+        self.edits = []
+        self._added_features.clear()
+        for layer in QgsProject.instance().mapLayers().values():
+            self._watch_layer(layer)
+        QgsProject.instance().layerWasAdded.connect(self._watch_layer)
+
+    def stop(self) -> list[LayerEdit]:
+        """Stop recording and return the recorded edits."""
+        QgsProject.instance().layerWasAdded.disconnect(self._watch_layer)
+        for layer, signal_name, slot in self._connections:
+            if not sip.isdeleted(layer):
+                getattr(layer, signal_name).disconnect(slot)
+        self._connections.clear()
+        self._added_features.clear()
+        return self.edits
+
+    def _watch_layer(self, layer: QgsMapLayer) -> None:
+        if not isinstance(layer, QgsVectorLayer):
+            return
+        for signal_name, slot in (
+            ("featureAdded", self._record_feature_addition),
+            ("attributeValueChanged", self._record_attribute_change),
+            ("geometryChanged", self._record_geometry_change),
+            ("featureDeleted", self._forget_feature_addition),
+        ):
+            bound_slot = partial(slot, layer)
+            getattr(layer, signal_name).connect(bound_slot)
+            self._connections.append((layer, signal_name, bound_slot))
+
+    def _record_feature_addition(self, layer: QgsVectorLayer, feature_id: int) -> None:
+        feature = layer.getFeature(feature_id)
+        edit = LayerEdit(
+            LayerEdit.ADD_FEATURE,
+            layer.id(),
+            layer.name(),
+            feature_id,
+            attributes={
+                layer_field.name(): _to_json_value(value)
+                for layer_field, value in zip(
+                    layer.fields(), feature.attributes(), strict=True
+                )
+            },
+            geometry=feature.geometry().asWkt() if feature.hasGeometry() else "",
+        )
+        self._added_features[(layer.id(), feature_id)] = edit
+        self.edits.append(edit)
+
+    def _forget_feature_addition(self, layer: QgsVectorLayer, feature_id: int) -> None:
+        """Drop the addition of a feature deleted or undone while recording."""
+        edit = self._added_features.pop((layer.id(), feature_id), None)
+        if edit is not None:
+            self.edits.remove(edit)
+
+    def _record_attribute_change(
+        self, layer: QgsVectorLayer, feature_id: int, field_index: int, value: Any
+    ) -> None:
+        field_name = layer.fields().at(field_index).name()
+        edit = self._find_edit_of(layer, feature_id, LayerEdit.CHANGE_ATTRIBUTE)
+        edit.attributes[field_name] = _to_json_value(value)
+
+    def _record_geometry_change(
+        self, layer: QgsVectorLayer, feature_id: int, geometry: QgsGeometry
+    ) -> None:
+        edit = self._find_edit_of(layer, feature_id, LayerEdit.CHANGE_GEOMETRY)
+        edit.geometry = geometry.asWkt()
+
+    def _find_edit_of(
+        self, layer: QgsVectorLayer, feature_id: int, kind: str
+    ) -> LayerEdit:
+        """Return the edit a change of a feature is merged into.
+
+        Changes are merged into the addition of the feature or into the last
+        edit if it is a change of the same kind of the same feature.
+        """
+        if (edit := self._added_features.get((layer.id(), feature_id))) is not None:
+            return edit
+        if self.edits and (
+            (last_edit := self.edits[-1]).kind == kind
+            and last_edit.layer_id == layer.id()
+            and last_edit.feature_id == feature_id
+        ):
+            return last_edit
+        edit = LayerEdit(kind, layer.id(), layer.name(), feature_id)
+        self.edits.append(edit)
+        return edit
+
+
+def apply_with_edit_buffer(edits: Iterable[LayerEdit]) -> None:
+    """Apply *edits* to the edit buffers of their layers.
+
+    The edits of each layer are applied as a single edit command. Layers
+    that are not in edit mode are switched to it. The edits are not
+    committed.
+    """
+    for layer, layer_edits in _group_by_layer(edits):
+        if not layer.isEditable():
+            layer.startEditing()
+        layer.beginEditCommand(tr("Macro layer edits"))
+        try:
+            for edit in layer_edits:
+                if edit.kind == LayerEdit.ADD_FEATURE:
+                    layer.addFeature(_create_feature(layer, edit))
+                    continue
+                for field_index, value in _attribute_values(layer, edit).items():
+                    layer.changeAttributeValue(edit.feature_id, field_index, value)
+                if edit.geometry:
+                    layer.changeGeometry(
+                        edit.feature_id, QgsGeometry.fromWkt(edit.geometry)
+                    )
+        except Exception:
+            layer.destroyEditCommand()
+            raise
+        layer.endEditCommand()
+
+
+def apply_with_data_provider(edits: Iterable[LayerEdit]) -> None:
+    """Write *edits* directly to the data providers of their layers.
+
+    The additions, attribute changes and geometry changes of each layer are
+    each written with a single provider call, bypassing the edit buffer.
+    """
+    for layer, layer_edits in _group_by_layer(edits):
+        provider = layer.dataProvider()
+        additions = [edit for edit in layer_edits if edit.kind == LayerEdit.ADD_FEATURE]
+        changes = [edit for edit in layer_edits if edit.kind != LayerEdit.ADD_FEATURE]
+        if additions:
+            provider.addFeatures([_create_feature(layer, edit) for edit in additions])
+        attribute_changes: dict[int, dict[int, Any]] = {}
+        geometry_changes: dict[int, QgsGeometry] = {}
+        for edit in changes:
+            if values := _attribute_values(layer, edit):
+                attribute_changes.setdefault(edit.feature_id, {}).update(values)
+            if edit.geometry:
+                geometry_changes[edit.feature_id] = QgsGeometry.fromWkt(edit.geometry)
+        if attribute_changes:
+            provider.changeAttributeValues(attribute_changes)
+        if geometry_changes:
+            provider.changeGeometryValues(geometry_changes)
+        layer.triggerRepaint()
+
+
+def _group_by_layer(
+    edits: Iterable[LayerEdit],
+) -> Iterator[tuple[QgsVectorLayer, list[LayerEdit]]]:
+    """Group consecutive edits of the same layer and resolve the layer."""
+    for (layer_id, layer_name), layer_edits in groupby(
+        edits, key=lambda edit: (edit.layer_id, edit.layer_name)
+    ):
+        project = QgsProject.instance()
+        layer = project.mapLayer(layer_id) or next(
+            iter(project.mapLayersByName(layer_name)), None
+        )
+        if not isinstance(layer, QgsVectorLayer):
+            raise LayerNotFoundError(layer_id, layer_name)
+        yield layer, list(layer_edits)
+
+
+def _create_feature(layer: QgsVectorLayer, edit: LayerEdit) -> QgsFeature:
+    feature = QgsFeature(layer.fields())
+    for field_index, value in _attribute_values(layer, edit).items():
+        feature.setAttribute(field_index, value)
+    if edit.geometry:
+        feature.setGeometry(QgsGeometry.fromWkt(edit.geometry))
+    return feature
+
+
+def _attribute_values(layer: QgsVectorLayer, edit: LayerEdit) -> dict[int, Any]:
+    """Return the attribute values of *edit* by the field indices of *layer*.
+
+    Values of fields missing from the layer are skipped.
+    """
+    fields = layer.fields()
+    values = {}
+    for field_name, value in edit.attributes.items():
+        field_index = fields.indexFromName(field_name)
+        if field_index == -1:
+            LOGGER.warning("Field %s not found in layer %s", field_name, layer.name())
+            continue
+        values[field_index] = _from_json_value(fields.at(field_index), value)
+    return values
+
+
+def _to_json_value(value: Any) -> Any:
+    # PyQGIS returns only NULL values as QVariant
+    if value is None or isinstance(value, QVariant):
+        return None
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (QDate, QDateTime, QTime)):
+        return value.toString(Qt.DateFormat.ISODate)
+    return str(value)
+
+
+def _from_json_value(layer_field: QgsField, value: Any) -> Any:
+    if value is None:
+        return NULL
+    try:
+        return layer_field.convertCompatible(value)
+    except ValueError:
+        return value
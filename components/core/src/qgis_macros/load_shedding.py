@@ -0,0 +1,136 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+
+"""Adaptive load shedding of the macro recorder.
+
+The time the recorder spends handling input events adds directly to the
+input latency of the session. When a frame budget is set, the recorder
+sums its time per frame and degrades to cheaper recording modes one at a
+time while it goes over the budget. The degradations are lifted again, in
+reverse order, once the load has stayed low for a while.
+"""
+
+import enum
+import logging
+
+from qgis_macros.constants import (
+    LOAD_SHEDDING_RECOVERY_FRAMES,
+    NS_PER_US,
+    RECORDER_FRAME_NS,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Degradation(enum.Enum):
+    """Cheaper recording modes in the order they are applied."""
+
+    REDUCED_MOVE_SAMPLING = "reduced_move_sampling"
+    DEFERRED_WIDGET_PATHS = "deferred_widget_paths"
+    SKIPPED_HOVER_MOVES = "skipped_hover_moves"
+
+
+class LoadShedder:
+    """Decides which degradations are applied based on the recorder load.
+
+    Example::
+
+        shedder = LoadShedder(frame_budget_us=2000)
+        if shedder.add(event_time_ns, duration_ns):
+            ...  # Apply shedder.is_active(...) to the recorder
+        applied = shedder.finish(end_time_ns)
+    """
+
+    def __init__(self, frame_budget_us: int) -> None:
+        """Initialize the shedder without any degradations.
+
+        Args:
+            frame_budget_us: Maximum recorder time per frame in microseconds.
+
+        """
+        self._frame_budget_ns = frame_budget_us * NS_PER_US
+        self._level = 0
+        self._frame = 0
+        self._frame_time_ns = 0
+        self._calm_frames = 0
+        # Applied degradations with their start and end on the recording
+        # timeline. The end is None while the degradation is active.
+        self._applied: list[dict] = []
+
+    def is_active(self, degradation: Degradation) -> bool:
+        """Check if *degradation* is currently applied."""
+        return list(Degradation).index(degradation) < self._level
+
+    def add(self, event_time_ns: int, duration_ns: int) -> bool:
+        """Add the recorder time spent on an event.
+
+        Args:
+            event_time_ns: Time of the event on the recording timeline.
+            duration_ns: Time the recorder spent handling the event.
+
+        Returns:
+            True if the applied degradations changed.
+
+        """
+        frame = event_time_ns // RECORDER_FRAME_NS
+        changed = False
+        if frame != self._frame:
+            changed = self._end_frame(frame, event_time_ns)
+            self._frame = frame
+            self._frame_time_ns = 0
+        self._frame_time_ns += duration_ns
+        return changed
+
+    def finish(self, end_time_ns: int) -> list[dict]:
+        """End the active degradations and return all applied degradations."""
+        for applied in self._applied:
+            if applied["end_ns"] is None:
+                applied["end_ns"] = end_time_ns
+        return self._applied
+
+    def _end_frame(self, next_frame: int, time_ns: int) -> bool:
+        """Escalate or relax the degradations based on the ended frame."""
+        if self._frame_time_ns > self._frame_budget_ns:
+            self._calm_frames = 0
+            if self._level == len(Degradation):
+                return False
+            degradation = list(Degradation)[self._level]
+            self._level += 1
+            self._applied.append(
+                {"degradation": degradation.value, "start_ns": time_ns, "end_ns": None}
+            )
+            LOGGER.debug("Recorder over frame budget, applying %s", degradation.value)
+            return True
+
+        # Frames without any events are calm as well
+        skipped_frames = next_frame - self._frame - 1
+        if self._frame_time_ns < self._frame_budget_ns / 2:
+            self._calm_frames += 1 + skipped_frames
+        else:
+            self._calm_frames = skipped_frames
+        if self._level == 0 or self._calm_frames < LOAD_SHEDDING_RECOVERY_FRAMES:
+            return False
+        self._calm_frames = 0
+        self._level -= 1
+        degradation = list(Degradation)[self._level]
+        for applied in reversed(self._applied):
+            if applied["degradation"] == degradation.value:
+                applied["end_ns"] = time_ns
+                break
+        LOGGER.debug("Recorder load dropped, lifting %s", degradation.value)
+        return True
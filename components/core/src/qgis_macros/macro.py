@@ -31,29 +31,55 @@ Example usage::
     data = macro.serialize()
 """
 
+import copy
 import dataclasses
 import logging
+import math
+import time
 from abc import ABC, abstractmethod
-from collections.abc import Callable
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import dataclass, field
-from typing import Protocol
-
-from qgis.core import Qgis, QgsApplication, QgsLineString
-from qgis.PyQt.QtCore import QEvent, QPoint, Qt
+from typing import Any, ClassVar, Protocol, overload
+
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsLayerTreeGroup,
+    QgsLayerTreeNode,
+    QgsLineString,
+    QgsPointXY,
+    QgsProcessingAlgorithm,
+    QgsProject,
+)
+from qgis.PyQt.QtCore import QAbstractItemModel, QEvent, QModelIndex, QPoint, Qt
 from qgis.PyQt.QtGui import QCursor, QMouseEvent, QWheelEvent
 from qgis.PyQt.QtTest import QTest
-from qgis.PyQt.QtWidgets import QApplication, QWidget
+from qgis.PyQt.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QComboBox,
+    QLineEdit,
+    QPlainTextEdit,
+    QTextEdit,
+    QWidget,
+)
 
 from qgis_macros import utils
 from qgis_macros.constants import (
     MAXIMUM_NEAREST_CANDIDATES,
     MAXIMUM_PARENT_DEPTH,
+    MAXIMUM_SIMPLIFICATION_WINDOW,
 )
-from qgis_macros.exceptions import WidgetNotFoundError
+from qgis_macros.exceptions import AlgorithmNotFoundError, WidgetNotFoundError
+from qgis_macros.layer_edits import LayerEdit
 from qgis_macros.utils import enum_value
+from qgis_macros.widget_index import WidgetRectIndex, get_widget_rect_index
 
 LOGGER = logging.getLogger(__name__)
 
+TEXT_INPUT_WIDGET_TYPES = (QLineEdit, QTextEdit, QPlainTextEdit)
+
 
 @dataclass
 class WidgetSpec:
@@ -87,13 +113,11 @@ class WidgetSpec:
 
         """
         nearest_candidates = utils.find_nearest_visible_children_of_type(
-            point, widget, self.widget_class
+            point, widget, self.widget_class, MAXIMUM_NEAREST_CANDIDATES
         )
-        for i, candidate in enumerate(nearest_candidates):
+        for candidate in nearest_candidates:
             if self.matches(candidate):
                 return candidate
-            if i > MAXIMUM_NEAREST_CANDIDATES:
-                break
         if level < MAXIMUM_PARENT_DEPTH and (parent := widget.parent()) is not None:
             return self.get_suitable_widget(point, parent, level + 1)
         raise WidgetNotFoundError(self.widget_class, self.text)
@@ -106,6 +130,8 @@ class WidgetPathNode:
     widget_class: str
     sibling_index: int
     text: str = ""
+    # Empty if the widget has no object name
+    object_name: str = ""
 
     def matches(self, widget: QWidget) -> bool:
         """Check if the given widget matches this node's criteria."""
@@ -121,12 +147,15 @@ class WidgetPath:
 
     Each node identifies a widget by its class name, text, and index
     among same-class siblings. This allows reliable widget lookup even
-    when widgets lack objectNames or shift position on screen.
+    when widgets lack objectNames or shift position on screen. Widgets
+    with an objectName unique among their siblings are looked up by it
+    first, which is faster and does not depend on translated texts.
     """
 
     window_title: str
     nodes: list[WidgetPathNode]
     is_map_canvas: bool = False
+    window_object_name: str = ""
 
     @staticmethod
     def create(widget: QWidget) -> "WidgetPath":
@@ -141,7 +170,9 @@ class WidgetPath:
             if current.isWindow():
                 window_title = current.windowTitle()
                 nodes.reverse()
-                return WidgetPath(window_title, nodes, is_map_canvas)
+                return WidgetPath(
+                    window_title, nodes, is_map_canvas, current.objectName()
+                )
             parent = current.parentWidget()
             if parent is not None:
                 sibling_index = utils.get_sibling_index(current, parent)
@@ -150,6 +181,7 @@ class WidgetPath:
                         widget_class=current.__class__.__name__,
                         sibling_index=sibling_index,
                         text=utils.get_widget_text(current),
+                        object_name=current.objectName(),
                     )
                 )
             current = parent
@@ -170,13 +202,37 @@ class WidgetPath:
         return current
 
     def _find_window(self) -> QWidget | None:
-        for widget in QApplication.topLevelWidgets():
-            if widget.isVisible() and widget.windowTitle() == self.window_title:
+        windows = [
+            widget for widget in QApplication.topLevelWidgets() if widget.isVisible()
+        ]
+        if self.window_object_name:
+            named_windows = [
+                widget
+                for widget in windows
+                if widget.objectName() == self.window_object_name
+            ]
+            # Object names are not unique, so a shared name identifies nothing
+            if len(named_windows) == 1:
+                return named_windows[0]
+        for widget in windows:
+            if widget.windowTitle() == self.window_title:
                 return widget
         return None
 
     @staticmethod
     def _find_child(parent: QWidget, node: WidgetPathNode) -> QWidget | None:
+        if node.object_name:
+            # Qt filters the direct children by name before wrapping them
+            named_children = parent.findChildren(
+                QWidget, node.object_name, Qt.FindChildOption.FindDirectChildrenOnly
+            )
+            # A name shared by siblings falls back to the index and text
+            if (
+                len(named_children) == 1
+                and named_children[0].__class__.__name__ == node.widget_class
+            ):
+                return named_children[0]
+
         same_class_children = [
             child
             for child in parent.findChildren(QWidget)
@@ -201,10 +257,76 @@ class WidgetPath:
         return None
 
 
+class WidgetPathCache:
+    """Memoize widget paths until the ancestor chain of the widget changes.
+
+    The cache does not observe the widgets by itself. The owner should call
+    :meth:`invalidate` whenever the children, the parent or the window title
+    of a widget changes, which drops the paths of the widget and all of its
+    descendants.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._paths: dict[QWidget, tuple[WidgetPath, list[QWidget]]] = {}
+        self._dependants: dict[QWidget, set[QWidget]] = {}
+        self.hits = 0
+        self.misses = 0
+        # Total time spent creating widget paths on cache misses
+        self.create_time_ns = 0
+
+    def get(self, widget: QWidget) -> WidgetPath:
+        """Return the widget path of *widget*, creating it on a cache miss."""
+        cached = self._paths.get(widget)
+        if cached is not None:
+            widget_path, _ = cached
+            # Button texts may change without any structural event
+            nodes = widget_path.nodes
+            if not nodes or nodes[-1].text == utils.get_widget_text(widget):
+                self.hits += 1
+                return widget_path
+            self._remove(widget)
+
+        self.misses += 1
+        start = time.perf_counter_ns()
+        widget_path = WidgetPath.create(widget)
+        self.create_time_ns += time.perf_counter_ns() - start
+        ancestors = []
+        current = widget
+        while current is not None:
+            ancestors.append(current)
+            self._dependants.setdefault(current, set()).add(widget)
+            current = current.parentWidget()
+        self._paths[widget] = (widget_path, ancestors)
+        return widget_path
+
+    def invalidate(self, widget: QWidget) -> None:
+        """Drop the cached paths of *widget* and its descendants."""
+        for dependant in self._dependants.pop(widget, set()):
+            self._remove(dependant)
+
+    def clear(self) -> None:
+        """Drop all cached paths and reset the counters."""
+        self._paths.clear()
+        self._dependants.clear()
+        self.hits = 0
+        self.misses = 0
+        self.create_time_ns = 0
+
+    def _remove(self, widget: QWidget) -> None:
+        _, ancestors = self._paths.pop(widget, (None, []))
+        for ancestor in ancestors:
+            if (dependants := self._dependants.get(ancestor)) is not None:
+                dependants.discard(widget)
+                if not dependants:
+                    del self._dependants[ancestor]
+
+
 class MacroEvent(Protocol):
     """Single macro event for Macros."""
 
     ms_since_last_event: int
+    timestamp_ns: int
 
     def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
         """Perform macro event action (e.g., moving mouse, clicking widget)."""
@@ -228,6 +350,14 @@ class Position:
             (global_position.x(), global_position.y()),
         )
 
+    @staticmethod
+    def from_dict(data: dict) -> "Position":
+        """Create a Position from a serialized dict (lists become tuples)."""
+        return Position(
+            tuple(data["local_position"]),  # type: ignore[arg-type]
+            tuple(data["global_position"]),  # type: ignore[arg-type]
+        )
+
     @staticmethod
     def from_points(local_point: QPoint, global_point: QPoint) -> "Position":
         """Create a Position from local and global QPoint objects."""
@@ -238,35 +368,10 @@ class Position:
 
     @staticmethod
     def interpolate(
-        positions: list["Position"], number_of_positions: int
+        positions: Sequence["Position"], number_of_positions: int
     ) -> list["Position"]:
         """Reduce *positions* to *number_of_positions* by linear interpolation."""
-        if len(positions) <= number_of_positions:
-            return positions
-
-        def _interpolate(points: list[tuple[int, int]]) -> list[tuple[int, int]]:
-            x, y = list(zip(*points, strict=False))
-            line = QgsLineString(x, y)
-            distance = line.length() / (number_of_positions - 1)
-            interpolated_points = [
-                line.interpolatePoint(point_distance)
-                for point_distance in [
-                    distance * i for i in range(1, number_of_positions - 1)
-                ]
-            ]
-            interpolated_points = [
-                (int(point.x()), int(point.y())) for point in interpolated_points
-            ]
-            return [points[0], *interpolated_points, points[-1]]
-
-        local_positions = _interpolate([pos.local_position for pos in positions])
-        global_positions = _interpolate([pos.global_position for pos in positions])
-        return [
-            Position(local_point, global_point)
-            for local_point, global_point in zip(
-                local_positions, global_positions, strict=False
-            )
-        ]
+        return list(Trajectory(positions).interpolate(number_of_positions))
 
     @property
     def local_point(self) -> QPoint:
@@ -288,6 +393,240 @@ class Position:
 default_position = Position((0, 0), (0, 0))
 
 
+def _interpolate_line(
+    xs: list, ys: list, number_of_points: int, *, as_int: bool = True
+) -> list[tuple]:
+    line = QgsLineString(xs, ys)
+    distance = line.length() / (number_of_points - 1)
+    interpolated_points = [
+        line.interpolatePoint(distance * i) for i in range(1, number_of_points - 1)
+    ]
+    convert = int if as_int else float
+    return [
+        (xs[0], ys[0]),
+        *[(convert(point.x()), convert(point.y())) for point in interpolated_points],
+        (xs[-1], ys[-1]),
+    ]
+
+
+def _distance_to_segment(
+    point: tuple[int, int], start: tuple[int, ...], end: tuple[int, int]
+) -> float:
+    """Return the distance from *point* to the segment from *start* to *end*."""
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return math.hypot(point[0] - start[0], point[1] - start[1])
+    t = ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / length_squared
+    t = max(0.0, min(1.0, t))
+    return math.hypot(point[0] - start[0] - t * dx, point[1] - start[1] - t * dy)
+
+
+def _serialize_field_value(value: Any) -> Any:
+    """Convert a field value of an event to JSON-compatible data like asdict."""
+    if isinstance(value, Trajectory):
+        return value.serialize()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_serialize_field_value(item) for item in value)
+    return copy.deepcopy(value)
+
+
+class Trajectory(Sequence[Position]):
+    """Sequence of positions packed into a flat integer array.
+
+    Each position takes four consecutive items (local x, local y, global x,
+    global y), so long mouse trajectories do not create a Python object per
+    position. :class:`Position` objects are created only when accessed.
+
+    Positions on the map canvas may also have map coordinates, kept in a
+    parallel float array. Positions without them have NaN coordinates.
+    """
+
+    __slots__ = ("_buffer", "_map_buffer", "_window")
+    _STRIDE = 4
+
+    def __init__(self, positions: Iterable[Position] = ()) -> None:
+        """Create a trajectory from *positions*."""
+        self._buffer = array("i")
+        # Map x and y of each position, empty if no position has them
+        self._map_buffer = array("d")
+        # Local points dropped since the last kept vertex by append_simplified
+        self._window: list[tuple[int, int]] = []
+        for position in positions:
+            self._buffer.extend((*position.local_position, *position.global_position))
+
+    @staticmethod
+    def from_dicts(
+        data: Iterable[dict],
+        map_data: Iterable[list[float] | None] = (),
+    ) -> "Trajectory":
+        """Create a trajectory from serialized positions and map points."""
+        trajectory = Trajectory()
+        for position in data:
+            trajectory._buffer.extend(
+                (*position["local_position"], *position["global_position"])
+            )
+        for map_point in map_data:
+            trajectory._map_buffer.extend(map_point or (math.nan, math.nan))
+        return trajectory
+
+    @property
+    def map_points(self) -> list[tuple[float, float] | None]:
+        """Map coordinates of the positions, None for positions without them."""
+        if not self._map_buffer:
+            return [None] * len(self)
+        values = iter(self._map_buffer)
+        return [
+            None if math.isnan(x) else (x, y)
+            for x, y in zip(values, values, strict=True)
+        ]
+
+    def append(
+        self,
+        position: Position,
+        *,
+        skip_duplicate: bool = False,
+        map_point: tuple[float, float] | None = None,
+    ) -> None:
+        """Append *position*, optionally skipping a duplicate of the last one."""
+        values = (*position.local_position, *position.global_position)
+        if (
+            skip_duplicate
+            and self._buffer
+            and tuple(self._buffer[-self._STRIDE :]) == values
+        ):
+            return
+        self._buffer.extend(values)
+        self._append_map_point(map_point)
+
+    def _append_map_point(self, map_point: tuple[float, float] | None) -> None:
+        if map_point is None and not self._map_buffer:
+            return
+        if not self._map_buffer:
+            # Earlier positions did not have map coordinates
+            self._map_buffer.extend((math.nan, math.nan) * (len(self) - 1))
+        self._map_buffer.extend(map_point or (math.nan, math.nan))
+
+    def append_simplified(
+        self,
+        position: Position,
+        tolerance: float,
+        map_point: tuple[float, float] | None = None,
+    ) -> None:
+        """Append *position* and drop points that the path does not need.
+
+        Uses an opening window simplification on the local coordinates: the
+        last position floats until a dropped point would be farther than
+        *tolerance* pixels from the line between the last kept vertex and
+        *position*, or until the window of dropped points is full. The last
+        appended position is always kept.
+        """
+        if len(self._buffer) < 2 * self._STRIDE:
+            self.append(position, skip_duplicate=True, map_point=map_point)
+            return
+        values = (*position.local_position, *position.global_position)
+        floating = tuple(self._buffer[-self._STRIDE :])
+        if floating == values:
+            return
+        anchor = tuple(self._buffer[-2 * self._STRIDE : -self._STRIDE])
+        window = [*self._window, (floating[0], floating[1])]
+        if len(window) <= MAXIMUM_SIMPLIFICATION_WINDOW and all(
+            _distance_to_segment(point, anchor[:2], position.local_position)
+            <= tolerance
+            for point in window
+        ):
+            # The floating position is not needed, replace it
+            self._buffer[-self._STRIDE :] = array("i", values)
+            if self._map_buffer:
+                del self._map_buffer[-2:]
+            self._append_map_point(map_point)
+            self._window = window
+        else:
+            self._buffer.extend(values)
+            self._append_map_point(map_point)
+            self._window = []
+
+    def interpolate(self, number_of_positions: int) -> "Trajectory":
+        """Return the trajectory reduced to *number_of_positions* positions."""
+        if len(self) <= number_of_positions:
+            return self
+        local_points = _interpolate_line(
+            self._buffer[0 :: self._STRIDE].tolist(),
+            self._buffer[1 :: self._STRIDE].tolist(),
+            number_of_positions,
+        )
+        global_points = _interpolate_line(
+            self._buffer[2 :: self._STRIDE].tolist(),
+            self._buffer[3 :: self._STRIDE].tolist(),
+            number_of_positions,
+        )
+        trajectory = Trajectory()
+        for local_point, global_point in zip(local_points, global_points, strict=True):
+            trajectory._buffer.extend((*local_point, *global_point))
+        if self._map_buffer and not any(map(math.isnan, self._map_buffer)):
+            for map_point in _interpolate_line(
+                self._map_buffer[0::2].tolist(),
+                self._map_buffer[1::2].tolist(),
+                number_of_positions,
+                as_int=False,
+            ):
+                trajectory._map_buffer.extend(map_point)
+        return trajectory
+
+    def serialize(self) -> list[dict]:
+        """Serialize the positions to JSON-compatible dicts."""
+        values = iter(self._buffer)
+        return [
+            {"local_position": [x, y], "global_position": [global_x, global_y]}
+            for x, y, global_x, global_y in zip(
+                values, values, values, values, strict=True
+            )
+        ]
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._buffer) // self._STRIDE
+
+    @overload
+    def __getitem__(self, index: int) -> Position: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "Trajectory": ...
+
+    def __getitem__(self, index: int | slice) -> "Position | Trajectory":  # noqa: D105
+        if isinstance(index, slice):
+            trajectory = Trajectory()
+            for i in range(*index.indices(len(self))):
+                start = i * self._STRIDE
+                trajectory._buffer.extend(self._buffer[start : start + self._STRIDE])
+                if self._map_buffer:
+                    trajectory._map_buffer.extend(self._map_buffer[2 * i : 2 * i + 2])
+            return trajectory
+        start = range(len(self))[index] * self._STRIDE
+        x, y, global_x, global_y = self._buffer[start : start + self._STRIDE]
+        return Position((x, y), (global_x, global_y))
+
+    def __iter__(self) -> Iterator[Position]:  # noqa: D105
+        values = iter(self._buffer)
+        for x, y, global_x, global_y in zip(
+            values, values, values, values, strict=True
+        ):
+            yield Position((x, y), (global_x, global_y))
+
+    def __eq__(self, other: object) -> bool:  # noqa: D105
+        if isinstance(other, Trajectory):
+            return self._buffer == other._buffer
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f"Trajectory({list(self)})"
+
+
 @dataclass
 class BaseMacroEvent(ABC):
     """Base class for all macro events."""
@@ -295,6 +634,8 @@ class BaseMacroEvent(ABC):
     widget_spec: WidgetSpec
     ms_since_last_event: int = 0
     widget_path: WidgetPath | None = None
+    # Nanoseconds since the start of the recording, 0 if not recorded
+    timestamp_ns: int = 0
 
     @staticmethod
     def move_cursor(position: tuple[int, int] | QPoint) -> None:
@@ -325,6 +666,11 @@ class BaseMacroEvent(ABC):
 
         # Fallback: position-based lookup
         global_point = position.global_point
+        index = get_widget_rect_index()
+        if index.is_active():
+            widget = self._get_widget_from_index(index, global_point)
+            widget.setFocus()
+            return widget
         widget = QApplication.widgetAt(global_point)
         if not widget:
             raise WidgetNotFoundError(
@@ -336,14 +682,66 @@ class BaseMacroEvent(ABC):
         widget.setFocus()
         return widget
 
+    def _get_widget_from_index(
+        self, index: WidgetRectIndex, global_point: QPoint
+    ) -> QWidget:
+        """Resolve the target widget at *global_point* from the widget index."""
+        widget = index.widget_at(global_point)
+        if not widget:
+            raise WidgetNotFoundError(
+                self.widget_spec.widget_class, self.widget_spec.text
+            )
+        if self.widget_spec.matches(widget):
+            return widget
+        for candidate in index.nearest_of_type(
+            global_point,
+            widget,
+            self.widget_spec.widget_class,
+            MAXIMUM_NEAREST_CANDIDATES,
+        ):
+            if self.widget_spec.matches(candidate):
+                return candidate
+        raise WidgetNotFoundError(self.widget_spec.widget_class, self.widget_spec.text)
+
     def get_widget_and_corrected_position(
-        self, position: Position
+        self,
+        position: Position,
+        map_position: tuple[float, float] | None = None,
+        map_crs: str = "",
     ) -> tuple[QWidget, Position]:
-        """Return the target widget and a screen-corrected position."""
+        """Return the target widget and a screen-corrected position.
+
+        Args:
+            position: Recorded position of the event.
+            map_position: Recorded map coordinates of the event. If given,
+                the position is computed from these on the current map
+                canvas instead, so that the event hits the same map location
+                even if the canvas has been panned, zoomed or resized.
+            map_crs: CRS definition of *map_position*.
+
+        """
+        if map_position is not None:
+            return self.get_canvas_viewport_and_position(map_position, map_crs)
         widget = self.get_widget(position)
         corrected_position = position.widget_corrected_position(widget)
         return widget, corrected_position
 
+    @staticmethod
+    def get_canvas_viewport_and_position(
+        map_position: tuple[float, float], map_crs: str
+    ) -> tuple[QWidget, Position]:
+        """Return the map canvas viewport and the position of a map point in it."""
+        canvas = utils.iface.mapCanvas()
+        point = utils.transform_to_canvas_crs(
+            QgsPointXY(*map_position), map_crs, canvas
+        )
+        pixel = canvas.getCoordinateTransform().transform(point)
+        local_point = QPoint(round(pixel.x()), round(pixel.y()))
+        viewport = canvas.viewport()
+        return viewport, Position.from_points(
+            local_point, viewport.mapToGlobal(local_point)
+        )
+
     @abstractmethod
     def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
         """Execute the event action and call *schedule_next* when done."""
@@ -363,6 +761,8 @@ class MacroKeyEvent(BaseMacroEvent):
     key: int = 0
     is_release: bool = False
     modifiers: int = enum_value(Qt.KeyboardModifier.NoModifier)
+    # Number of auto-repeated presses that followed the press while held
+    repeat_count: int = 0
 
     def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
         """Replay the key press or release on the currently focused widget."""
@@ -371,9 +771,10 @@ class MacroKeyEvent(BaseMacroEvent):
         # TODO: shift is not working
         schedule_next()
         if not self.is_release:
-            QTest.keyPress(
-                widget, Qt.Key(self.key), Qt.KeyboardModifiers(self.modifiers)
-            )
+            for _ in range(1 + self.repeat_count):
+                QTest.keyPress(
+                    widget, Qt.Key(self.key), Qt.KeyboardModifiers(self.modifiers)
+                )
         else:
             QTest.keyRelease(
                 widget, Qt.Key(self.key), Qt.KeyboardModifiers(self.modifiers)
@@ -387,22 +788,100 @@ class MacroKeyEvent(BaseMacroEvent):
             and self.key == other.key
             and self.is_release == other.is_release
             and self.modifiers == other.modifiers
+            and self.repeat_count == other.repeat_count
         )
 
 
+@dataclass
+class MacroTextEntryEvent(BaseMacroEvent):
+    """Text typed into a text input widget.
+
+    Replaces a run of printable key events. The original key events are
+    kept in *key_events* and replayed one by one if the focused widget is
+    not a text input during playback.
+    """
+
+    text: str = ""
+    key_events: list[MacroKeyEvent] = field(default_factory=list)
+
+    def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
+        """Type the text into the currently focused widget."""
+        widget = QApplication.focusWidget()
+        QgsApplication.processEvents()
+        schedule_next()
+        if isinstance(widget, TEXT_INPUT_WIDGET_TYPES):
+            QTest.keyClicks(widget, self.text)
+        else:
+            self._perform_key_events(widget)
+
+    def perform_event_action_with_insert(
+        self, schedule_next: Callable[[], None]
+    ) -> None:
+        """Insert the text directly into the currently focused widget.
+
+        Faster than typing, but the widget does not receive key events.
+        """
+        widget = QApplication.focusWidget()
+        QgsApplication.processEvents()
+        schedule_next()
+        if isinstance(widget, QLineEdit):
+            widget.insert(self.text)
+        elif isinstance(widget, (QTextEdit, QPlainTextEdit)):
+            widget.insertPlainText(self.text)
+        else:
+            self._perform_key_events(widget)
+
+    def _perform_key_events(self, widget: QWidget | None) -> None:
+        for key_event in self.key_events:
+            key = Qt.Key(key_event.key)
+            modifiers = Qt.KeyboardModifiers(key_event.modifiers)
+            if key_event.is_release:
+                QTest.keyRelease(widget, key, modifiers)
+            else:
+                for _ in range(1 + key_event.repeat_count):
+                    QTest.keyPress(widget, key, modifiers)
+
+    def __eq__(self, other: object) -> bool:  # noqa: D105
+        if not isinstance(other, MacroTextEntryEvent):
+            return NotImplemented
+        return super().__eq__(other) and self.text == other.text
+
+
 @dataclass
 class MacroMouseMoveEvent(BaseMacroEvent):
     """Mouse movement event containing a sequence of positions."""
 
-    positions: list[Position] = field(default_factory=list)
+    positions: Trajectory = field(default_factory=Trajectory)
     buttons: int = enum_value(Qt.MouseButton.NoButton)
     modifiers: int = enum_value(Qt.KeyboardModifier.NoModifier)
+    # CRS definition of the map coordinates stored in the trajectory
+    map_crs: str = ""
+
+    def __post_init__(self) -> None:
+        """Pack positions given as a plain sequence into a trajectory."""
+        if not isinstance(self.positions, Trajectory):
+            self.positions = Trajectory(self.positions)
+
+    def add_position(
+        self,
+        position: Position,
+        tolerance: float = 0,
+        map_point: tuple[float, float] | None = None,
+    ) -> None:
+        """Append a position, ignoring duplicates of the last position.
+
+        Args:
+            position: Position to append.
+            tolerance: If positive, simplify the path while appending so that
+                no dropped position is farther than this many pixels from it.
+            map_point: Map coordinates of the position if it is on the map
+                canvas.
 
-    def add_position(self, position: Position) -> None:
-        """Append a position, ignoring duplicates of the last position."""
-        if self.positions and position == self.positions[-1]:
-            return
-        self.positions.append(position)
+        """
+        if tolerance > 0:
+            self.positions.append_simplified(position, tolerance, map_point)
+        else:
+            self.positions.append(position, skip_duplicate=True, map_point=map_point)
 
     def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
         """Replay the mouse movement along the recorded positions."""
@@ -413,10 +892,10 @@ class MacroMouseMoveEvent(BaseMacroEvent):
 
         if not self.positions:
             return
-        widget = self.get_widget(self.positions[0])
+        widget = self._get_target_widget()
 
-        for position in self.positions:
-            self.move_cursor(position.widget_corrected_position(widget).global_point)
+        for corrected_position in self._corrected_positions(widget):
+            self.move_cursor(corrected_position.global_point)
         schedule_next()
         return
 
@@ -424,10 +903,9 @@ class MacroMouseMoveEvent(BaseMacroEvent):
         """Replay movement by posting QMouseEvent objects (when buttons are held)."""
         if not self.positions:
             return
-        widget = self.get_widget(self.positions[0])
+        widget = self._get_target_widget()
 
-        for position in self.positions:
-            corrected_position = position.widget_corrected_position(widget)
+        for corrected_position in self._corrected_positions(widget):
             # Create and send mouse move events
             event = QMouseEvent(
                 QEvent.Type.MouseMove,
@@ -440,9 +918,25 @@ class MacroMouseMoveEvent(BaseMacroEvent):
             QApplication.postEvent(widget, event)
             QApplication.processEvents()
 
+    def _get_target_widget(self) -> QWidget:
+        map_point = self.positions.map_points[0]
+        if map_point is not None:
+            return self.get_canvas_viewport_and_position(map_point, self.map_crs)[0]
+        return self.get_widget(self.positions[0])
+
+    def _corrected_positions(self, widget: QWidget) -> Iterator[Position]:
+        # Positions on the map canvas follow their map coordinates
+        for position, map_point in zip(
+            self.positions, self.positions.map_points, strict=True
+        ):
+            if map_point is not None:
+                yield self.get_canvas_viewport_and_position(map_point, self.map_crs)[1]
+            else:
+                yield position.widget_corrected_position(widget)
+
     def interpolate_positions(self, number_of_positions: int) -> None:
         """Interpolate the positions to a given number of positions."""
-        self.positions = Position.interpolate(self.positions, number_of_positions)
+        self.positions = self.positions.interpolate(number_of_positions)
 
     def __eq__(self, other: object) -> bool:  # noqa: D105
         if not isinstance(other, MacroMouseMoveEvent):
@@ -475,11 +969,14 @@ class MacroMouseEvent(BaseMacroEvent):
     is_release: bool = False
     button: int = enum_value(Qt.MouseButton.LeftButton)
     modifiers: int = enum_value(Qt.KeyboardModifier.NoModifier)
+    # Map coordinates of the position if it is on the map canvas
+    map_position: tuple[float, float] | None = None
+    map_crs: str = ""
 
     def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
         """Replay the mouse press or release at the recorded position."""
         widget, corrected_position = self.get_widget_and_corrected_position(
-            self.position
+            self.position, self.map_position, self.map_crs
         )
         self.move_cursor(corrected_position.global_point)
         schedule_next()
@@ -512,34 +1009,82 @@ class MacroMouseEvent(BaseMacroEvent):
 
 @dataclass
 class MacroWheelEvent(BaseMacroEvent):
-    """Mouse wheel scroll event."""
+    """Mouse wheel scroll event.
+
+    Consecutive wheel events on the same widget are merged into one event
+    with a summed *delta*. *timings* holds the milliseconds between the
+    merged notches and is empty for a single notch.
+
+    Merged notches are replayed as separate wheel events by default, since
+    many widgets react to each wheel event instead of to its delta. Combo
+    boxes and tab bars move one item per event, and the map canvas zooms by
+    a factor that grows linearly with the delta.
+    """
 
     position: Position = default_position
     delta: int = 0
     phase: int = 0
     inverted: bool = False
     source: int = 0
+    timings: list[int] = field(default_factory=list)
+    # Map coordinates of the position if it is on the map canvas
+    map_position: tuple[float, float] | None = None
+    map_crs: str = ""
 
     def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
-        """Replay the wheel scroll at the recorded position."""
+        """Replay the merged notches as a burst of wheel events.
+
+        The events are posted back to back and processed together, so the
+        receiver sees every notch but gets a chance to render only once.
+        """
         widget, corrected_position = self.get_widget_and_corrected_position(
-            self.position
+            self.position, self.map_position, self.map_crs
         )
         self.move_cursor(corrected_position.global_point)
         schedule_next()
-        event = QWheelEvent(
-            corrected_position.local_point,
-            corrected_position.global_point,
-            QPoint(0, self.delta),
-            QPoint(0, self.delta),
+        notch_count = len(self.timings) + 1
+        notch_delta = int(self.delta / notch_count)
+        for i in range(notch_count):
+            delta = (
+                notch_delta
+                if i < notch_count - 1
+                else self.delta - notch_delta * (notch_count - 1)
+            )
+            QApplication.postEvent(
+                widget, self._create_event(corrected_position, delta)
+            )
+        QApplication.processEvents()
+
+    def perform_event_action_as_single_event(
+        self, schedule_next: Callable[[], None]
+    ) -> None:
+        """Replay the wheel scroll as one event with the summed delta.
+
+        This reproduces the recording only for widgets that scroll by the
+        delta, such as scroll areas.
+        """
+        widget, corrected_position = self.get_widget_and_corrected_position(
+            self.position, self.map_position, self.map_crs
+        )
+        self.move_cursor(corrected_position.global_point)
+        schedule_next()
+        QApplication.postEvent(
+            widget, self._create_event(corrected_position, self.delta)
+        )
+        QApplication.processEvents()
+
+    def _create_event(self, position: Position, delta: int) -> QWheelEvent:
+        return QWheelEvent(
+            position.local_point,
+            position.global_point,
+            QPoint(0, delta),
+            QPoint(0, delta),
             Qt.MouseButton.NoButton,
             Qt.KeyboardModifier.NoModifier,
             self.phase,
             self.inverted,
             self.source,
         )
-        QApplication.postEvent(widget, event)
-        QApplication.processEvents()
 
     def __eq__(self, other: object) -> bool:  # noqa: D105
         if not isinstance(other, MacroWheelEvent):
@@ -553,6 +1098,252 @@ class MacroWheelEvent(BaseMacroEvent):
         )
 
 
+@dataclass
+class MacroActionEvent(BaseMacroEvent):
+    """Triggering of a menu or toolbar action.
+
+    The action is identified by its object name, or by the titles of the
+    menus leading to it and its text if it has no object name.
+    """
+
+    object_name: str = ""
+    text_path: list[str] = field(default_factory=list)
+
+    def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
+        """Trigger the action directly without opening its menu."""
+        action = utils.find_action(self.object_name, self.text_path)
+        if action is None:
+            raise WidgetNotFoundError(
+                "QAction", self.object_name or " > ".join(self.text_path)
+            )
+        # Close the menus that were opened to reach the action
+        while (popup := QApplication.activePopupWidget()) is not None:
+            popup.close()
+        schedule_next()
+        action.trigger()
+
+    def __eq__(self, other: object) -> bool:  # noqa: D105
+        if not isinstance(other, MacroActionEvent):
+            return NotImplemented
+        return super().__eq__(other) and (
+            self.object_name == other.object_name and self.text_path == other.text_path
+        )
+
+
+@dataclass
+class MacroItemSelectionEvent(BaseMacroEvent):
+    """Selection of an item in a combo box or an item view.
+
+    The item is identified by the rows leading to it from the root of the
+    model and by its display text, which is used to search the model if
+    the item at the path has a different text during playback. Works for
+    any QAbstractItemView, such as QgsLayerTreeView.
+    """
+
+    position: Position = default_position
+    index_path: list[int] = field(default_factory=list)
+    column: int = 0
+    text: str = ""
+
+    def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
+        """Set the current index of the combo box or view directly."""
+        widget = self.get_widget(self.position)
+        if isinstance(widget, QComboBox):
+            index = self._find_index(widget.model())
+            widget.hidePopup()
+            schedule_next()
+            widget.setCurrentIndex(index.row())
+            widget.activated.emit(index.row())
+        elif isinstance(widget, QAbstractItemView):
+            index = self._find_index(widget.model())
+            schedule_next()
+            widget.scrollTo(index)
+            widget.setCurrentIndex(index)
+            widget.clicked.emit(index)
+        else:
+            raise WidgetNotFoundError(self.widget_spec.widget_class, self.text)
+
+    def _find_index(self, model: QAbstractItemModel) -> QModelIndex:
+        index = utils.get_index_from_path(model, self.index_path, self.column)
+        if self.text and (not index.isValid() or str(index.data()) != self.text):
+            matches = model.match(
+                model.index(0, self.column),
+                Qt.ItemDataRole.DisplayRole,
+                self.text,
+                1,
+                Qt.MatchFlag.MatchExactly | Qt.MatchFlag.MatchRecursive,
+            )
+            index = matches[0] if matches else QModelIndex()
+        if not index.isValid():
+            raise WidgetNotFoundError(self.widget_spec.widget_class, self.text)
+        return index
+
+    def __eq__(self, other: object) -> bool:  # noqa: D105
+        if not isinstance(other, MacroItemSelectionEvent):
+            return NotImplemented
+        return super().__eq__(other) and (
+            self.index_path == other.index_path
+            and self.column == other.column
+            and self.text == other.text
+        )
+
+
+@dataclass
+class MacroCanvasExtentEvent(BaseMacroEvent):
+    """Navigation of the map canvas to a new extent.
+
+    The extent is stored as its center in the CRS *crs*, scale and rotation,
+    so that it does not depend on the size of the canvas.
+    """
+
+    center: tuple[float, float] = (0.0, 0.0)
+    scale: float = 0.0
+    rotation: float = 0.0
+    crs: str = ""
+
+    def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
+        """Move the map canvas to the recorded extent."""
+        canvas = utils.iface.mapCanvas()
+        center = utils.transform_to_canvas_crs(
+            QgsPointXY(*self.center), self.crs, canvas
+        )
+        # The refreshes requested by these are merged into a single render
+        canvas.setRotation(self.rotation)
+        canvas.setCenter(center)
+        canvas.zoomScale(self.scale)
+        schedule_next()
+
+    def __eq__(self, other: object) -> bool:  # noqa: D105
+        if not isinstance(other, MacroCanvasExtentEvent):
+            return NotImplemented
+        return super().__eq__(other) and (
+            self.center == other.center
+            and self.scale == other.scale
+            and self.rotation == other.rotation
+            and self.crs == other.crs
+        )
+
+
+@dataclass
+class LayerTreeOperation:
+    """Visibility change, insertion or removal of a node in the layer tree.
+
+    The node is identified by its layer id, or by its name if it is a group
+    or no layer with the id exists during playback. Nodes moved in the
+    layers panel are recorded as an insertion of a copy of the node followed
+    by the removal of the original, like the layers panel moves them, so
+    that the recorded indices stay valid when the operations are replayed
+    in order.
+    """
+
+    VISIBILITY: ClassVar[str] = "visibility"
+    INSERT: ClassVar[str] = "insert"
+    REMOVE: ClassVar[str] = "remove"
+
+    kind: str = VISIBILITY
+    layer_id: str = ""
+    name: str = ""
+    visible: bool = True
+    group_path: list[str] = field(default_factory=list)
+    index: int = 0
+
+    def apply(self, root: QgsLayerTreeGroup) -> None:
+        """Apply the operation to the layer tree under *root*."""
+        if self.kind == self.VISIBILITY:
+            self._find_node(root).setItemVisibilityChecked(self.visible)
+            return
+        group = utils.find_layer_tree_group(root, self.group_path)
+        if group is None:
+            raise WidgetNotFoundError("QgsLayerTreeGroup", " > ".join(self.group_path))
+        if self.kind == self.INSERT:
+            group.insertChildNode(self.index, self._find_node(root).clone())
+            return
+        children = group.children()
+        if self.index < len(children) and self._matches(children[self.index]):
+            node = children[self.index]
+        else:
+            node = next((child for child in children if self._matches(child)), None)
+        if node is None:
+            raise WidgetNotFoundError("QgsLayerTreeNode", self.layer_id or self.name)
+        group.removeChildNode(node)
+
+    def _find_node(self, root: QgsLayerTreeGroup) -> QgsLayerTreeNode:
+        node = utils.find_layer_tree_node(root, self.layer_id, self.name)
+        if node is None:
+            raise WidgetNotFoundError("QgsLayerTreeNode", self.layer_id or self.name)
+        return node
+
+    def _matches(self, node: QgsLayerTreeNode) -> bool:
+        layer_id, name = utils.get_layer_tree_node_key(node)
+        if self.layer_id and layer_id == self.layer_id:
+            return True
+        return bool(layer_id) == bool(self.layer_id) and name == self.name
+
+
+@dataclass
+class MacroLayerTreeEvent(BaseMacroEvent):
+    """Batch of consecutive layer tree operations.
+
+    The operations are applied through the layer tree API instead of
+    clicking the layers panel, with the map canvas frozen so that it is
+    rendered only once after the whole batch.
+    """
+
+    operations: list[LayerTreeOperation] = field(default_factory=list)
+
+    def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
+        """Apply the operations to the layer tree of the current project."""
+        root = QgsProject.instance().layerTreeRoot()
+        canvas = utils.iface.mapCanvas()
+        canvas.freeze(True)  # noqa: FBT003
+        try:
+            for operation in self.operations:
+                operation.apply(root)
+        finally:
+            canvas.freeze(False)  # noqa: FBT003
+        canvas.refresh()
+        schedule_next()
+
+    def __eq__(self, other: object) -> bool:  # noqa: D105
+        if not isinstance(other, MacroLayerTreeEvent):
+            return NotImplemented
+        return super().__eq__(other) and self.operations == other.operations
+
+
+@dataclass
+class MacroProcessingEvent(BaseMacroEvent):
+    """Run of a processing algorithm.
+
+    Recorded next to the UI events of the dialog that ran the algorithm.
+    It is skipped when the UI events are replayed, and the algorithm is
+    called directly with *parameters* in the processing playback mode.
+    """
+
+    algorithm_id: str = ""
+    parameters: dict[str, Any] = field(default_factory=dict)
+
+    def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
+        """Do nothing, since the replayed UI events run the algorithm."""
+        schedule_next()
+
+    def create_algorithm(self) -> QgsProcessingAlgorithm:
+        """Create a new instance of the algorithm from the processing registry."""
+        algorithm = QgsApplication.processingRegistry().createAlgorithmById(
+            self.algorithm_id
+        )
+        if algorithm is None:
+            raise AlgorithmNotFoundError(self.algorithm_id)
+        return algorithm
+
+    def __eq__(self, other: object) -> bool:  # noqa: D105
+        if not isinstance(other, MacroProcessingEvent):
+            return NotImplemented
+        return super().__eq__(other) and (
+            self.algorithm_id == other.algorithm_id
+            and self.parameters == other.parameters
+        )
+
+
 @dataclass
 class MacroMouseDoubleClickEvent(BaseMacroEvent):
     """Mouse double-click event."""
@@ -560,11 +1351,14 @@ class MacroMouseDoubleClickEvent(BaseMacroEvent):
     position: Position = default_position
     button: int = enum_value(Qt.MouseButton.LeftButton)
     modifiers: int = enum_value(Qt.KeyboardModifier.NoModifier)
+    # Map coordinates of the position if it is on the map canvas
+    map_position: tuple[float, float] | None = None
+    map_crs: str = ""
 
     def perform_event_action(self, schedule_next: Callable[[], None]) -> None:
         """Replay the double-click at the recorded position."""
         widget, corrected_position = self.get_widget_and_corrected_position(
-            self.position
+            self.position, self.map_position, self.map_crs
         )
         self.move_cursor(corrected_position.global_point)
         schedule_next()
@@ -609,62 +1403,99 @@ class Macro:
     name: str | None = None
     speed: float = 1.0
     qgis_version: int = Qgis.versionInt()
+    # Layer edits recorded next to the events for bulk replay
+    layer_edits: list[LayerEdit] = field(default_factory=list)
+    # Information about the recording, such as the recorder profile
+    metadata: dict[str, Any] = field(default_factory=dict)
 
     def serialize(self) -> dict:
         """Serialize the macro to a JSON-compatible dict."""
-        events: list[dict] = []
-        data = {
+        return {
             "name": self.name,
             "speed": self.speed,
-            "events": events,
+            "events": [self.serialize_event(event) for event in self.events],
             "qgis_version": self.qgis_version,
+            "layer_edits": [dataclasses.asdict(edit) for edit in self.layer_edits],
+            "metadata": self.metadata,
         }
-        for event in self.events:
-            class_name = event.__class__.__name__
-            serialized_event = dataclasses.asdict(event)  # type: ignore[call-overload]
-            serialized_event["type"] = class_name
-            events.append(serialized_event)
-        return data
 
     @classmethod
     def deserialize(cls, data: dict) -> "Macro":
         """Construct a Macro from a dict previously produced by :meth:`serialize`."""
-        events = []
-        for event_data in data["events"]:
-            class_name = event_data.pop("type")
-            widget_spec_ = event_data.pop("widget_spec")
-            widget_spec = WidgetSpec(widget_spec_["widget_class"], widget_spec_["text"])
-            event_data["widget_spec"] = widget_spec
-            if "position" in event_data:
-                position_ = event_data.pop("position")
-                position = Position(
-                    position_["local_position"], position_["global_position"]
-                )
-                event_data["position"] = position
-            if "positions" in event_data:
-                positions_ = event_data.pop("positions")
-                positions = [
-                    Position(position_["local_position"], position_["global_position"])
-                    for position_ in positions_
-                ]
-                event_data["positions"] = positions
-            widget_path_data = event_data.pop("widget_path", None)
-            if widget_path_data is not None:
-                nodes = [
-                    WidgetPathNode(
-                        widget_class=node["widget_class"],
-                        sibling_index=node["sibling_index"],
-                        text=node.get("text", ""),
-                    )
-                    for node in widget_path_data["nodes"]
-                ]
-                event_data["widget_path"] = WidgetPath(
-                    window_title=widget_path_data["window_title"],
-                    nodes=nodes,
-                    is_map_canvas=widget_path_data.get("is_map_canvas", False),
+        events = [cls.deserialize_event(event_data) for event_data in data["events"]]
+        layer_edits = [LayerEdit(**edit) for edit in data.get("layer_edits", [])]
+        return cls(
+            events,
+            data["name"],
+            data["speed"],
+            data["qgis_version"],
+            layer_edits,
+            data.get("metadata", {}),
+        )
+
+    @staticmethod
+    def serialize_event(event: MacroEvent) -> dict:
+        """Serialize a single event to a JSON-compatible dict."""
+        # Built field by field, since dataclasses.asdict would deep copy the
+        # packed trajectory of mouse moves before it is serialized
+        serialized_event = {
+            event_field.name: _serialize_field_value(getattr(event, event_field.name))
+            for event_field in dataclasses.fields(event)  # type: ignore[arg-type]
+        }
+        if isinstance(event, MacroMouseMoveEvent) and event.map_crs:
+            serialized_event["map_positions"] = [
+                list(map_point) if map_point is not None else None
+                for map_point in event.positions.map_points
+            ]
+        serialized_event["type"] = event.__class__.__name__
+        return serialized_event
+
+    @staticmethod
+    def deserialize_event(event_data: dict) -> MacroEvent:
+        """Construct an event from a dict produced by :meth:`serialize_event`."""
+        event_data = dict(event_data)
+        class_name = event_data.pop("type")
+        widget_spec_ = event_data.pop("widget_spec")
+        widget_spec = WidgetSpec(widget_spec_["widget_class"], widget_spec_["text"])
+        event_data["widget_spec"] = widget_spec
+        if "position" in event_data:
+            position_ = event_data.pop("position")
+            event_data["position"] = Position.from_dict(position_)
+        if "positions" in event_data:
+            positions_ = event_data.pop("positions")
+            map_positions_ = event_data.pop("map_positions", ())
+            event_data["positions"] = Trajectory.from_dicts(positions_, map_positions_)
+        if "center" in event_data:
+            event_data["center"] = tuple(event_data["center"])
+        if event_data.get("map_position") is not None:
+            event_data["map_position"] = tuple(event_data["map_position"])
+        if "operations" in event_data:
+            event_data["operations"] = [
+                LayerTreeOperation(**operation)
+                for operation in event_data.pop("operations")
+            ]
+        if "key_events" in event_data:
+            event_data["key_events"] = [
+                Macro.deserialize_event({**key_event, "type": "MacroKeyEvent"})
+                for key_event in event_data.pop("key_events")
+            ]
+        widget_path_data = event_data.pop("widget_path", None)
+        if widget_path_data is not None:
+            nodes = [
+                WidgetPathNode(
+                    widget_class=node["widget_class"],
+                    sibling_index=node["sibling_index"],
+                    text=node.get("text", ""),
+                    object_name=node.get("object_name", ""),
                 )
+                for node in widget_path_data["nodes"]
+            ]
+            event_data["widget_path"] = WidgetPath(
+                window_title=widget_path_data["window_title"],
+                nodes=nodes,
+                is_map_canvas=widget_path_data.get("is_map_canvas", False),
+                window_object_name=widget_path_data.get("window_object_name", ""),
+            )
 
-            event_cls = globals()[class_name]
-            event = event_cls(**event_data)
-            events.append(event)
-        return cls(events, data["name"], data["speed"], data["qgis_version"])
+        event_cls = globals()[class_name]
+        return event_cls(**event_data)
@@ -0,0 +1,78 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+"""Saving macros to JSON files in a background task.
+
+Serializing and writing big recordings takes seconds, so it is done in a
+QGIS task instead of the GUI thread.
+
+Example::
+
+    from qgis.core import QgsApplication
+
+    from qgis_macros.macro_file import MacroSaveTask
+
+    task = MacroSaveTask(macros, Path("macros.json"))
+    task.taskCompleted.connect(on_saved)
+    QgsApplication.taskManager().addTask(task)
+"""
+
+import json
+import logging
+from collections.abc import Sequence
+from pathlib import Path
+
+from qgis.core import QgsTask
+from qgis_plugin_tools.tools.i18n import tr
+
+from qgis_macros.macro import Macro
+
+LOGGER = logging.getLogger(__name__)
+
+
+class MacroSaveTask(QgsTask):
+    """Task that serializes macros and writes them to a JSON file.
+
+    The task keeps a snapshot of the macro list, so macros can be added to
+    or removed from the original list meanwhile. The macros themselves must
+    not be modified while the task is running.
+    """
+
+    def __init__(self, macros: Sequence[Macro], path: Path) -> None:
+        """Initialize the task.
+
+        Args:
+            macros: Macros to save.
+            path: Path of the JSON file to write.
+
+        """
+        super().__init__(tr("Saving macros to {}", str(path)))
+        self.path = path
+        self._macros = tuple(macros)
+        self.error: Exception | None = None
+
+    def run(self) -> bool:
+        """Serialize the macros and write them to the file."""
+        try:
+            serialized_macros = [macro.serialize() for macro in self._macros]
+            with self.path.open("w") as f:
+                json.dump(serialized_macros, f, indent=4)
+        except Exception as e:
+            LOGGER.exception("Saving macros to %s failed", self.path)
+            self.error = e
+            return False
+        return True
@@ -28,17 +28,49 @@ Example::
 
 import enum
 import logging
+from collections import deque
+from collections.abc import Sequence
 from dataclasses import dataclass
+from typing import Any
 
-from qgis.core import QgsApplication
+from qgis.core import (
+    QgsApplication,
+    QgsProcessingAlgRunnerTask,
+    QgsProcessingContext,
+    QgsProcessingFeedback,
+    QgsProject,
+)
 from qgis.PyQt.QtCore import QElapsedTimer, QObject, QTimer, pyqtSignal
 
-from qgis_macros.exceptions import MacroPlaybackEndedError
-from qgis_macros.macro import Macro, MacroEvent
+from qgis_macros.constants import NS_PER_MS
+from qgis_macros.exceptions import AlgorithmFailedError, MacroPlaybackEndedError
+from qgis_macros.layer_edits import apply_with_data_provider, apply_with_edit_buffer
+from qgis_macros.macro import (
+    Macro,
+    MacroEvent,
+    MacroProcessingEvent,
+    MacroTextEntryEvent,
+    MacroWheelEvent,
+)
+from qgis_macros.settings import Settings
+from qgis_macros.widget_index import get_widget_rect_index
 
 LOGGER = logging.getLogger(__name__)
 
 
+class MacroPlaybackMode(enum.Enum):
+    """How a macro is played back."""
+
+    # Replay the recorded UI events
+    UI = enum.auto()
+    # Apply the recorded layer edits to the edit buffers of the layers
+    EDIT_BUFFER = enum.auto()
+    # Write the recorded layer edits directly to the data providers
+    DATA_PROVIDER = enum.auto()
+    # Call the recorded processing algorithms directly
+    PROCESSING = enum.auto()
+
+
 class MacroPlaybackStatus(enum.Enum):
     """Status of a completed macro playback."""
 
@@ -75,18 +107,164 @@ class MacroPlayer(QObject):
         self._timer = QElapsedTimer()
         self._playback_halted = False
         self._event_queue: list[MacroEvent] = []
+        self._single_wheel_events = False
+        self._insert_text_entries = False
+        # Recording time of the first event in paced playback, None otherwise
+        self._paced_start_ns: int | None = None
+        self._processing_queue: deque[MacroProcessingEvent] = deque()
+        self._processing_inputs: list[dict[str, Any]] = []
+        # Contexts and feedbacks of the running tasks, which must outlive them
+        self._processing_task_references: list[
+            tuple[QgsProcessingContext, QgsProcessingFeedback]
+        ] = []
+        self._widget_index_started = False
+        self.playback_ended.connect(self._stop_widget_index)
 
     def set_speed(self, speed: float) -> None:
         """Set the playback speed."""
         self._speed = speed
 
-    def play(self, macro: Macro) -> None:
-        """Play back the recorded events asynchronously."""
+    def play(
+        self,
+        macro: Macro,
+        mode: MacroPlaybackMode = MacroPlaybackMode.UI,
+        processing_inputs: Sequence[dict[str, Any]] = (),
+    ) -> None:
+        """Play back the recorded events asynchronously.
+
+        Args:
+            macro: Macro to play back.
+            mode: Playback mode. The layer edit modes apply the recorded
+                layer edits of the macro in bulk and the processing mode
+                calls the recorded processing algorithms directly instead of
+                replaying the events, which allows comparing the cost of the
+                UI to the cost of the work it does.
+            processing_inputs: Parameter overrides for the processing mode.
+                Each recorded algorithm is run once per item in parallel
+                tasks, with the item merged into the recorded parameters.
+
+        """
         self._playback_halted = False
+        if mode == MacroPlaybackMode.PROCESSING:
+            self._run_processing_events(macro, processing_inputs)
+            return
+        if mode != MacroPlaybackMode.UI:
+            self._apply_layer_edits(macro, mode)
+            return
+        self._single_wheel_events = Settings.single_wheel_events.get()
+        self._insert_text_entries = Settings.insert_text_entries.get()
         self._event_queue = macro.events[:]
+        self._paced_start_ns = None
+        # Macros recorded without timestamps are played back with the gaps
+        if Settings.paced_playback.get() and any(
+            event.timestamp_ns for event in self._event_queue
+        ):
+            self._paced_start_ns = self._event_queue[0].timestamp_ns
+        if Settings.index_widget_rects.get():
+            get_widget_rect_index().start()
+            self._widget_index_started = True
         LOGGER.info("Playing macro %s", macro.name)
+        self._timer.start()
         self._play_next_event()
 
+    def _stop_widget_index(self) -> None:
+        if self._widget_index_started:
+            get_widget_rect_index().stop()
+            self._widget_index_started = False
+
+    def _apply_layer_edits(self, macro: Macro, mode: MacroPlaybackMode) -> None:
+        LOGGER.info(
+            "Applying %d layer edits of macro %s", len(macro.layer_edits), macro.name
+        )
+        self._timer.start()
+        try:
+            if mode == MacroPlaybackMode.EDIT_BUFFER:
+                apply_with_edit_buffer(macro.layer_edits)
+            else:
+                apply_with_data_provider(macro.layer_edits)
+        except Exception as e:
+            LOGGER.exception("Applying layer edits stopped due to exception.")
+            self._end_with_failure(e)
+            return
+        LOGGER.info("Layer edits applied in %d ms.", self._timer.elapsed())
+        self.playback_ended.emit(MacroPlaybackReport(MacroPlaybackStatus.SUCCESS))
+
+    def _run_processing_events(
+        self, macro: Macro, processing_inputs: Sequence[dict[str, Any]]
+    ) -> None:
+        self._processing_queue = deque(
+            event for event in macro.events if isinstance(event, MacroProcessingEvent)
+        )
+        self._processing_inputs = list(processing_inputs) or [{}]
+        LOGGER.info(
+            "Running %d processing algorithms of macro %s with %d inputs",
+            len(self._processing_queue),
+            macro.name,
+            len(self._processing_inputs),
+        )
+        self._timer.start()
+        self._run_next_processing_event()
+
+    def _run_next_processing_event(self) -> None:
+        """Run the next algorithm over all inputs and wait for the runs to end."""
+        if self._playback_halted:
+            return
+        self._processing_task_references.clear()
+        if not self._processing_queue:
+            LOGGER.info("Processing runs completed in %d ms.", self._timer.elapsed())
+            self.playback_ended.emit(MacroPlaybackReport(MacroPlaybackStatus.SUCCESS))
+            return
+
+        macro_event = self._processing_queue.popleft()
+        try:
+            tasks = [
+                self._create_processing_task(macro_event, parameter_overrides)
+                for parameter_overrides in self._processing_inputs
+            ]
+        except Exception as e:
+            LOGGER.exception("Running processing algorithm failed.")
+            self._end_with_failure(e)
+            return
+        remaining_runs = len(tasks)
+
+        def on_executed(successful: bool, _results: dict) -> None:  # noqa: FBT001
+            nonlocal remaining_runs
+            if self._playback_halted:
+                return
+            if not successful:
+                self._end_with_failure(AlgorithmFailedError(macro_event.algorithm_id))
+                return
+            remaining_runs -= 1
+            if remaining_runs == 0:
+                self._run_next_processing_event()
+
+        for task in tasks:
+            task.executed.connect(on_executed)
+            QgsApplication.taskManager().addTask(task)
+
+    def _create_processing_task(
+        self, macro_event: MacroProcessingEvent, parameter_overrides: dict[str, Any]
+    ) -> QgsProcessingAlgRunnerTask:
+        context = QgsProcessingContext()
+        context.setProject(QgsProject.instance())
+        feedback = QgsProcessingFeedback()
+        self._processing_task_references.append((context, feedback))
+        return QgsProcessingAlgRunnerTask(
+            macro_event.create_algorithm(),
+            {**macro_event.parameters, **parameter_overrides},
+            context,
+            feedback,
+        )
+
+    def _end_with_failure(self, error: Exception) -> None:
+        """Halt playback and report the failure."""
+        self._playback_halted = True
+        self.playback_ended.emit(
+            MacroPlaybackReport(
+                MacroPlaybackStatus.FAILURE, MacroPlaybackEndedError(error)
+            )
+        )
+
     def _play_next_event(self) -> None:
         if self._playback_halted:
             return
@@ -101,20 +279,45 @@ class MacroPlayer(QObject):
         macro_event = self._event_queue.pop(0)
 
         def on_event_finished() -> None:
-            wait_time = int(macro_event.ms_since_last_event * self._speed) + 15
-            QTimer.singleShot(wait_time, self._play_next_event)
+            QTimer.singleShot(
+                self._wait_time_before_next_event(), self._play_next_event
+            )
 
         try:
             LOGGER.debug("Playing event: %s", macro_event)
-            macro_event.perform_event_action(on_event_finished)
+            if self._single_wheel_events and isinstance(macro_event, MacroWheelEvent):
+                macro_event.perform_event_action_as_single_event(on_event_finished)
+            elif self._insert_text_entries and isinstance(
+                macro_event, MacroTextEntryEvent
+            ):
+                macro_event.perform_event_action_with_insert(on_event_finished)
+            else:
+                macro_event.perform_event_action(on_event_finished)
             QgsApplication.processEvents()
 
         except Exception as e:
             # If an error occurs, halt playback and report failure.
-            self._playback_halted = True
             LOGGER.exception("Playing macro stopped due to exception.")
-            self.playback_ended.emit(
-                MacroPlaybackReport(
-                    MacroPlaybackStatus.FAILURE, MacroPlaybackEndedError(e)
-                )
+            self._end_with_failure(e)
+
+    def _wait_time_before_next_event(self) -> int:
+        """Return the milliseconds to wait before playing the next event.
+
+        By default, the recorded gap before the next event is waited. In
+        paced playback, the next event is scheduled at its recorded time
+        relative to the start of the playback, so that the time spent
+        playing the events does not accumulate into drift.
+        """
+        if self._paced_start_ns is None:
+            gap_ms = (
+                self._event_queue[0].ms_since_last_event if self._event_queue else 0
             )
+            return int(gap_ms * self._speed) + 15
+        if not self._event_queue:
+            return 0
+        next_time_ms = (
+            (self._event_queue[0].timestamp_ns - self._paced_start_ns)
+            / NS_PER_MS
+            * self._speed
+        )
+        return max(0, int(next_time_ms) - self._timer.elapsed())
@@ -17,27 +17,184 @@
 #  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
 """Event filter-based macro recorder that captures user interactions."""
 
-from typing import cast
+import json
+import os
+import tempfile
+from collections import deque
+from collections.abc import Sequence
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial, wraps
+from itertools import islice
+from pathlib import Path
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Any, Concatenate, ParamSpec, TypeVar, cast
+from weakref import WeakSet, ref
 
-from qgis.PyQt.QtCore import QElapsedTimer, QEvent, QObject
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsLayerTreeGroup,
+    QgsLayerTreeNode,
+    QgsProject,
+    QgsTask,
+)
+from qgis.gui import (
+    QgsGui,
+    QgsHistoryEntry,
+    QgsLayerTreeView,
+    QgsMapCanvas,
+    QgsMapToolPan,
+    QgsMapToolZoom,
+)
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import (
+    QChildEvent,
+    QElapsedTimer,
+    QEvent,
+    QModelIndex,
+    QObject,
+    Qt,
+    QTimer,
+    pyqtSignal,
+)
 from qgis.PyQt.QtGui import QKeyEvent, QMouseEvent, QWheelEvent
-from qgis.PyQt.QtWidgets import QApplication, QWidget
+from qgis.PyQt.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QComboBox,
+    QMenu,
+    QToolBar,
+    QToolButton,
+    QWidget,
+)
+from qgis_plugin_tools.tools.i18n import tr
 
+from qgis_macros.constants import (
+    MAXIMUM_DEFERRED_CAPTURES_PER_IDLE,
+    NS_PER_MS,
+    REDUCED_MOVE_SAMPLE_RATE,
+    SCOPED_WINDOW_POLL_INTERVAL_MS,
+    SPOOL_TAIL_LENGTH,
+)
+from qgis_macros.exceptions import TaskCancelledError
+from qgis_macros.layer_edits import LayerEdit, LayerEditRecorder
+from qgis_macros.load_shedding import Degradation, LoadShedder
 from qgis_macros.macro import (
     LOGGER,
+    TEXT_INPUT_WIDGET_TYPES,
+    BaseMacroEvent,
+    LayerTreeOperation,
     Macro,
+    MacroActionEvent,
+    MacroCanvasExtentEvent,
     MacroEvent,
+    MacroItemSelectionEvent,
     MacroKeyEvent,
+    MacroLayerTreeEvent,
     MacroMouseDoubleClickEvent,
     MacroMouseEvent,
     MacroMouseMoveEvent,
+    MacroProcessingEvent,
+    MacroTextEntryEvent,
     MacroWheelEvent,
     Position,
-    WidgetPath,
+    WidgetPathCache,
     WidgetSpec,
 )
+from qgis_macros.macro_spool import MacroSpool
+from qgis_macros.recorder_profile import RecorderProfile
 from qgis_macros.settings import Settings
-from qgis_macros.utils import enum_value
+from qgis_macros.utils import (
+    crs_definition,
+    enum_value,
+    event_global_pos,
+    event_pos,
+    get_action_text_path,
+    get_index_path,
+    get_layer_tree_group_path,
+    get_layer_tree_node_key,
+    get_triggerable_action,
+    iface,
+    is_on_check_indicator,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+STRUCTURE_CHANGE_EVENT_TYPES = frozenset(
+    {
+        QEvent.Type.ChildAdded,
+        QEvent.Type.ChildRemoved,
+        QEvent.Type.ParentChange,
+        QEvent.Type.WindowTitleChange,
+    }
+)
+WIDGET_REMOVAL_EVENT_TYPES = frozenset(
+    {QEvent.Type.Hide, QEvent.Type.Close, QEvent.Type.DeferredDelete}
+)
+# Keys pressed and released around typed characters, such as Shift for capitals
+MODIFIER_KEYS = frozenset(
+    {
+        Qt.Key.Key_Shift,
+        Qt.Key.Key_Control,
+        Qt.Key.Key_Alt,
+        Qt.Key.Key_AltGr,
+        Qt.Key.Key_Meta,
+    }
+)
+MOUSE_EVENT_TYPES = frozenset(
+    {
+        QEvent.Type.MouseButtonPress,
+        QEvent.Type.MouseButtonRelease,
+        QEvent.Type.MouseButtonDblClick,
+        QEvent.Type.MouseMove,
+        QEvent.Type.Wheel,
+    }
+)
+
+EVENT_TYPE_NAMES = {
+    getattr(QEvent.Type, name): name
+    for name in (
+        "KeyPress",
+        "KeyRelease",
+        "MouseButtonPress",
+        "MouseButtonRelease",
+        "MouseButtonDblClick",
+        "MouseMove",
+        "Wheel",
+        "ChildAdded",
+        "ChildRemoved",
+        "ParentChange",
+        "WindowTitleChange",
+        "Hide",
+        "Close",
+        "DeferredDelete",
+    )
+}
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def _profiled(
+    method: "Callable[Concatenate[MacroRecorder, P], R]",
+) -> "Callable[Concatenate[MacroRecorder, P], R]":
+    """Measure the wall time of a recording method when profiling."""
+
+    @wraps(method)
+    def wrapper(self: "MacroRecorder", *args: P.args, **kwargs: P.kwargs) -> R:
+        profile = self.profile
+        if profile is None:
+            return method(self, *args, **kwargs)
+        start = perf_counter_ns()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profile.add(method.__name__, perf_counter_ns() - start)
+
+    return wrapper
 
 
 class MacroRecorder(QObject):
@@ -47,6 +204,10 @@ class MacroRecorder(QObject):
     filtered or unfiltered playback of these events for automation.
     """
 
+    # Macro built in the background after the recording stopped
+    recorded_macro_loaded = pyqtSignal(Macro)
+    recorded_macro_load_failed = pyqtSignal(Exception)
+
     def __init__(
         self,
         filter_out_mouse_movements: bool = True,  # noqa: FBT001, FBT002
@@ -59,237 +220,1317 @@ class MacroRecorder(QObject):
 
         """
         super().__init__(None)
-        self._recorded_events: list[MacroEvent] = []
+        # Recorded events not finalized yet. With a spool, only a short tail
+        # is kept in memory since the move filtering needs the latest events.
+        self._recorded_events: deque[MacroEvent] = deque()
+        self._finalized_event_count = 0
+        self._interpolation_count = Settings.move_event_interpolation_count.get()
+        self._simplification_tolerance = (
+            Settings.move_event_simplification_tolerance.get()
+        )
+        self._move_sample_interval_ns = 0.0
+        self._last_move_sample_time_ns = 0
+        # Latest move position skipped by the sampling, kept to end the segment
+        self._pending_move_position: Position | None = None
+        self._pending_move_map_point: tuple[float, float] | None = None
+        self._spool: MacroSpool | None = None
+        # Running tasks finishing stopped recordings, kept referenced until
+        # they finish
+        self._finish_tasks: list[_RecordingFinishTask] = []
+        self._last_key_event: MacroKeyEvent | None = None
+        self._last_mouse_button_event: MacroMouseEvent | None = None
+        self._last_wheel_widget: ref[QWidget] | None = None
+        self._record_text_entry = False
+        self._record_actions = False
+        self._record_item_selections = False
+        # Map canvas whose navigation is recorded as extent changes
+        self._extent_canvas: QgsMapCanvas | None = None
+        # Map canvas whose mouse events are recorded with map coordinates
+        self._map_coordinate_canvas: QgsMapCanvas | None = None
+        self._map_crs = ""
+        # Layer tree whose visibility changes and moves are recorded
+        self._layer_tree_root: QgsLayerTreeGroup | None = None
+        # Operations of the latest insertion into the layer tree with the
+        # inserted nodes. They are recorded only if the insertion turns out
+        # to be a move, that is if the original nodes are removed.
+        self._layer_tree_insertion: list[
+            tuple[QgsLayerTreeNode, tuple[str, str], LayerTreeOperation]
+        ] = []
+        self._moved_layer_tree_nodes: set[tuple[str, str]] = set()
+        self._layer_edit_recorder: LayerEditRecorder | None = None
+        self._record_processing_runs = False
+        self._last_text_entry_widget: ref[QWidget] | None = None
+        # Monotonic timeline of the recording. Every event is stamped with
+        # the time its input event was received and the gaps between the
+        # recorded events are derived from the stamps.
         self._timer = QElapsedTimer()
-        self.last_record_time = 0  # Tracks the last timestamp
+        self._event_time_ns = 0
+        self._last_event_time_ns = 0
+        self._last_wheel_time_ns = 0
         self._recording = False
         self._filter_out_mouse_movements = filter_out_mouse_movements
-        self._widgets_to_filter_events_out: list[QWidget] = []
+        self._widgets_to_filter_events_out: WeakSet[QWidget] = WeakSet()
+        self._event_handlers: dict[QEvent.Type, Callable[..., None]] = {
+            QEvent.Type.KeyPress: self._record_key_event,
+            QEvent.Type.KeyRelease: self._record_key_event,
+            QEvent.Type.MouseButtonPress: self._record_mouse_button_event,
+            QEvent.Type.MouseButtonRelease: self._record_mouse_button_event,
+            QEvent.Type.MouseButtonDblClick: (
+                self._record_mouse_button_double_click_event
+            ),
+            QEvent.Type.MouseMove: self._record_mouse_move_event,
+            QEvent.Type.Wheel: self._record_mouse_wheel_event,
+        }
+        self._observed_event_types: frozenset[QEvent.Type] = frozenset()
+        self._scope_filter: _ScopeEventFilter | None = None
+        # Addresses of the top-level windows recorded in scoped recording
+        self._scoped_windows: set[int] = set()
+        # Addresses of the visible top-level windows at the last poll.
+        # Windows without a parent are not announced by ChildAdded events,
+        # so scoped recording looks for them in the top-level widgets.
+        self._visible_windows: set[int] = set()
+        self._defer_widget_capture = False
+        self._widget_path_cache = WidgetPathCache()
+        self._profile: RecorderProfile | None = None
+        self._load_shedder: LoadShedder | None = None
+        self._skip_hover_moves = False
+        # Events waiting for their widget path, grouped by the address of the
+        # target widget. Only addresses are kept, so the widgets may be
+        # destroyed meanwhile. Their destroyed signal drops their events from
+        # here, so an address left here always belongs to a live widget.
+        self._pending_widget_paths: dict[int, list[BaseMacroEvent]] = {}
+        # Address of the top-level window of each pending widget when it was
+        # queued and the slot connected to its destroyed signal
+        self._pending_widget_windows: dict[int, tuple[int, Callable[[], None]]] = {}
+        # Addresses of the pending widgets grouped by their window, so
+        # removing a widget only scans the pending widgets of its own window
+        self._pending_widgets_by_window: dict[int, set[int]] = {}
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setInterval(0)
+        self._idle_timer.timeout.connect(self._resolve_pending_widget_paths_when_idle)
 
     def add_widget_to_filter_events_out(self, widget: QWidget) -> None:
-        """Add a widget to filter events out from the recorded events."""
-        self._widgets_to_filter_events_out.append(widget)
+        """Filter out mouse events of *widget* and its descendants."""
+        self._widgets_to_filter_events_out.add(widget)
+
+    @property
+    def widget_path_cache(self) -> WidgetPathCache:
+        """Cache of widget paths used during the recording."""
+        return self._widget_path_cache
+
+    @property
+    def profile(self) -> RecorderProfile | None:
+        """Capture overhead profile of the current or last recording, if any."""
+        return self._profile
+
+    @property
+    def spool_path(self) -> Path | None:
+        """Path of the spool file of the current recording, if any."""
+        return self._spool.path if self._spool is not None else None
 
     def is_recording(self) -> bool:
         """Check if the recorder is currently recording."""
         return self._recording
 
-    def start_recording(self) -> None:
-        """Start recording user actions."""
+    def start_recording(self, windows: Sequence[QWidget] | None = None) -> None:
+        """Start recording user actions.
+
+        Args:
+            windows: Top-level windows to record in scoped recording. If
+                given, the event filter is installed only on these windows,
+                their descendants and windows opened during the recording
+                instead of the whole application. If not given, the main
+                window is used when the scoped recording setting is enabled.
+
+        """
         self._recorded_events.clear()
+        self._finalized_event_count = 0
+        self._last_key_event = None
+        self._last_mouse_button_event = None
+        self._last_wheel_widget = None
+        self._last_text_entry_widget = None
+        self._record_text_entry = Settings.record_text_entry_events.get()
+        self._record_actions = Settings.record_action_events.get()
+        self._record_item_selections = Settings.record_item_selection_events.get()
+        self._pending_widget_paths.clear()
+        self._pending_widget_windows.clear()
+        self._pending_widgets_by_window.clear()
+        self._widget_path_cache.clear()
+        self._interpolation_count = Settings.move_event_interpolation_count.get()
+        self._simplification_tolerance = (
+            Settings.move_event_simplification_tolerance.get()
+        )
+        self._pending_move_position = None
+        self._profile = RecorderProfile() if Settings.profile_recorder.get() else None
+        frame_budget_us = Settings.recorder_frame_budget_us.get()
+        self._load_shedder = LoadShedder(frame_budget_us) if frame_budget_us else None
+        if Settings.spool_recordings.get():
+            self._spool = MacroSpool(self._create_spool_path())
+            self._spool.open(Macro([]))
+        self._observed_event_types = (
+            frozenset(self._event_handlers) | STRUCTURE_CHANGE_EVENT_TYPES
+        )
+        self._apply_recording_modes()
+        self._connect_semantic_signals()
+        if Settings.record_layer_edits.get():
+            self._layer_edit_recorder = LayerEditRecorder()
+            self._layer_edit_recorder.start()
+        if Settings.record_map_coordinates.get():
+            self._map_coordinate_canvas = iface.mapCanvas()
+            self._map_crs = crs_definition(
+                self._map_coordinate_canvas.mapSettings().destinationCrs()
+            )
+        if windows is None and Settings.scoped_recording.get():
+            windows = [iface.mainWindow()]
         self._recording = True
+        self._last_event_time_ns = 0
         self._timer.restart()
-        QApplication.instance().installEventFilter(self)
+        if windows is None:
+            QApplication.instance().installEventFilter(self)
+        else:
+            self._scope_filter = _ScopeEventFilter(self)
+            for window in windows:
+                self._watch_window(window)
+            self._start_window_polling(self._scope_filter)
+            QApplication.instance().focusChanged.connect(self._on_focus_changed)
 
-    def stop_recording(self) -> Macro:
+    def stop_recording(self) -> None:
         """Stop recording user actions.
 
-        :return: New Macro object with recorded events
+        The widget paths and layer edits are captured right away, while the
+        recorded events are finalized and built into a macro in a QGIS task.
+        A spooled recording is written to its spool in the task, which is
+        then closed and the macro loaded from it. The macro is emitted with
+        :attr:`recorded_macro_loaded`, or the error that prevented building
+        it with :attr:`recorded_macro_load_failed`.
         """
         if not self._recording:
-            return Macro([])
+            return
         self._recording = False
-        QApplication.instance().removeEventFilter(self)
-        events = (
-            self._get_filtered_events()
-            if self._filter_out_mouse_movements
-            else self._recorded_events
+        self._observed_event_types = frozenset()
+        if self._scope_filter is None:
+            QApplication.instance().removeEventFilter(self)
+        else:
+            QApplication.instance().focusChanged.disconnect(self._on_focus_changed)
+            self._visible_windows.clear()
+            # Qt removes a deleted filter from all the widgets it was installed on
+            sip.delete(self._scope_filter)
+            self._scope_filter = None
+            self._scoped_windows.clear()
+        self._disconnect_semantic_signals()
+        self._map_coordinate_canvas = None
+        self._idle_timer.stop()
+        self._resolve_all_pending_widget_paths()
+        LOGGER.debug(
+            "Widget path cache hits: %d, misses: %d",
+            self._widget_path_cache.hits,
+            self._widget_path_cache.misses,
         )
-        self._interpolate_mouse_move_events(events)
-        macro = Macro(events)
-        LOGGER.debug("Recorded macro %s", macro)
-        return macro
+        self._flush_pending_move_position()
 
-    def eventFilter(self, obj: QObject, event: QEvent) -> bool:  # noqa: N802
-        """Event filter to record keyboard and mouse events."""
-        if not self._recording or not isinstance(obj, QWidget):
-            return super().eventFilter(obj, event)
+        layer_edits: list[LayerEdit] = []
+        if self._layer_edit_recorder is not None:
+            layer_edits = self._layer_edit_recorder.stop()
+            self._layer_edit_recorder = None
+        task = _RecordingFinishTask(
+            list(self._recorded_events),
+            self._event_finalizer(),
+            first_event_finalized=self._finalized_event_count > 0,
+            spool=self._spool,
+            remove_spool=not Settings.keep_spool_files.get(),
+            layer_edits=layer_edits,
+            metadata=self._recording_metadata(),
+        )
+        self._recorded_events.clear()
+        self._spool = None
+        self._load_shedder = None
+        task.taskCompleted.connect(partial(self._recording_finished, task))
+        task.taskTerminated.connect(partial(self._recording_finished, task))
+        self._finish_tasks.append(task)
+        QgsApplication.taskManager().addTask(task)
 
-        widget = cast("QWidget", obj)
-        elapsed = self._timer.elapsed()
-        ms_since_last_event = elapsed - self.last_record_time
-        self.last_record_time = elapsed
+    def _recording_finished(self, task: "_RecordingFinishTask") -> None:
+        """Emit the macro built by *task* or the reason it was not built."""
+        self._finish_tasks.remove(task)
+        if task.macro is None:
+            if task.spool is not None:
+                # Cancelled before it ran. A writer error, if any, has been
+                # logged already, and the spool file is left on disk.
+                with suppress(Exception):
+                    task.spool.close()
+            self.recorded_macro_load_failed.emit(
+                task.error or TaskCancelledError(task.description())
+            )
+            return
+        LOGGER.debug("Recorded macro %s", task.macro)
+        self.recorded_macro_loaded.emit(task.macro)
 
-        if (
-            isinstance(event, QMouseEvent)
-            and widget in self._widgets_to_filter_events_out
+    def _recording_metadata(self) -> dict[str, Any]:
+        """Return the applied degradations and the recorder profile."""
+        metadata: dict[str, Any] = {}
+        if self._load_shedder is not None and (
+            degradations := self._load_shedder.finish(self._timer.nsecsElapsed())
         ):
-            return super().eventFilter(obj, event)
-
-        if event.type() in [QEvent.Type.KeyPress, QEvent.Type.KeyRelease]:
-            self._record_key_event(event, widget, ms_since_last_event)
-        elif event.type() in [
-            QEvent.Type.MouseButtonPress,
-            QEvent.Type.MouseButtonRelease,
-        ]:
-            self._record_mouse_button_event(event, widget, ms_since_last_event)
-        elif event.type() == QEvent.Type.MouseButtonDblClick:
-            self._record_mouse_button_double_click_event(
-                event, widget, ms_since_last_event
+            metadata["degradations"] = degradations
+        if self._profile is not None:
+            self._profile.widget_path_create_ns = self._widget_path_cache.create_time_ns
+            metadata["recorder_profile"] = self._profile.to_metadata()
+            self._profile.add_to_profiler(Settings.profile_recorder_group.get())
+            LOGGER.info("Recorder capture overhead:\n%s", self._profile.report())
+        return metadata
+
+    def _apply_recording_modes(self) -> None:
+        """Configure the move sampling, widget path capture and hover moves.
+
+        Cheaper modes are used while the load shedding degrades the
+        recording.
+        """
+        shedder = self._load_shedder
+        sample_rate = Settings.move_event_sample_rate.get()
+        if shedder is not None and shedder.is_active(Degradation.REDUCED_MOVE_SAMPLING):
+            sample_rate = min(
+                sample_rate or REDUCED_MOVE_SAMPLE_RATE, REDUCED_MOVE_SAMPLE_RATE
             )
-        elif event.type() == QEvent.Type.MouseMove:
-            self._record_mouse_move_event(event, widget)
-        elif event.type() == QEvent.Type.Wheel:
-            self._record_mouse_wheel_event(event, widget)
-
-        return super().eventFilter(obj, event)
-
-    def _get_filtered_events(self) -> list[MacroEvent]:
-        filtered_events: list[MacroEvent] = []
-
-        if not self._recorded_events:
-            return []
-
-        # Take just the last mouse position for the first element
-        first_element = self._recorded_events[0]
-        if isinstance(first_element, MacroMouseMoveEvent):
-            first_index = 1
-            filtered_events.append(
-                MacroMouseMoveEvent(
-                    widget_spec=first_element.widget_spec,
-                    ms_since_last_event=0,
-                    positions=[first_element.positions[-1]],
-                    widget_path=first_element.widget_path,
-                )
+        self._move_sample_interval_ns = (
+            1000 * NS_PER_MS / sample_rate if sample_rate else 0.0
+        )
+        self._defer_widget_capture = Settings.defer_widget_path_capture.get() or (
+            shedder is not None and shedder.is_active(Degradation.DEFERRED_WIDGET_PATHS)
+        )
+        if self._defer_widget_capture:
+            # Kept observed after the degradation is lifted, since pending
+            # widget paths may still need a snapshot before widgets close
+            self._observed_event_types |= WIDGET_REMOVAL_EVENT_TYPES
+        self._skip_hover_moves = shedder is not None and shedder.is_active(
+            Degradation.SKIPPED_HOVER_MOVES
+        )
+
+    def _connect_semantic_signals(self) -> None:
+        """Connect to the signals of the changes recorded as such."""
+        if Settings.record_canvas_extents.get():
+            self._extent_canvas = iface.mapCanvas()
+            self._extent_canvas.extentsChanged.connect(self._record_canvas_extent)
+        if Settings.record_layer_tree_operations.get():
+            self._layer_tree_root = QgsProject.instance().layerTreeRoot()
+            self._layer_tree_root.visibilityChanged.connect(
+                self._record_layer_tree_visibility
+            )
+            self._layer_tree_root.addedChildren.connect(self._on_layer_tree_insertion)
+            self._layer_tree_root.willRemoveChildren.connect(
+                self._on_layer_tree_removal
+            )
+        self._record_processing_runs = Settings.record_processing_runs.get()
+        if self._record_processing_runs:
+            QgsGui.historyProviderRegistry().entryAdded.connect(
+                self._record_processing_run
             )
-        else:
-            first_index = 0
 
-        last_index = len(self._recorded_events) - 1
-        if isinstance(self._recorded_events[last_index], MacroMouseMoveEvent):
-            last_index -= 1
+    def _disconnect_semantic_signals(self) -> None:
+        if self._extent_canvas is not None:
+            self._extent_canvas.extentsChanged.disconnect(self._record_canvas_extent)
+            self._extent_canvas = None
+        if self._layer_tree_root is not None:
+            self._layer_tree_root.visibilityChanged.disconnect(
+                self._record_layer_tree_visibility
+            )
+            self._layer_tree_root.addedChildren.disconnect(
+                self._on_layer_tree_insertion
+            )
+            self._layer_tree_root.willRemoveChildren.disconnect(
+                self._on_layer_tree_removal
+            )
+            self._layer_tree_root = None
+            self._layer_tree_insertion.clear()
+            self._moved_layer_tree_nodes.clear()
+        if self._record_processing_runs:
+            QgsGui.historyProviderRegistry().entryAdded.disconnect(
+                self._record_processing_run
+            )
+            self._record_processing_runs = False
 
-        for event in self._recorded_events[first_index : last_index + 1]:
-            if isinstance(event, MacroMouseMoveEvent) and not self._is_map_canvas_event(
-                event
-            ):
-                # For non-map-canvas moves, keep only the last position
-                filtered_events.append(
-                    MacroMouseMoveEvent(
-                        widget_spec=event.widget_spec,
-                        ms_since_last_event=event.ms_since_last_event,
-                        positions=[event.positions[-1]],
-                        buttons=event.buttons,
-                        modifiers=event.modifiers,
-                        widget_path=event.widget_path,
-                    )
-                )
-            else:
-                filtered_events.append(event)
+    @staticmethod
+    def _create_spool_path() -> Path:
+        """Create an empty spool file with a unique name in the save path."""
+        spool_directory = Path(Settings.macro_save_path.get()) / "spool"
+        spool_directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_descriptor, path = tempfile.mkstemp(
+            suffix=".jsonl", prefix=f"{timestamp}_", dir=spool_directory
+        )
+        os.close(file_descriptor)
+        return Path(path)
 
-        return filtered_events
+    def eventFilter(self, obj: QObject, event: QEvent) -> bool:  # noqa: N802
+        """Event filter to record keyboard and mouse events."""
+        # Fast path: most events seen by the application-wide filter are
+        # uninteresting, so reject them before doing anything else.
+        event_type = event.type()
+        if event_type not in self._observed_event_types or not isinstance(obj, QWidget):
+            return False
 
-    @staticmethod
-    def _is_map_canvas_event(event: MacroMouseMoveEvent) -> bool:
-        return event.widget_path is not None and event.widget_path.is_map_canvas
+        widget = cast("QWidget", obj)
+        if self._profile is None and self._load_shedder is None:
+            self._filter_observed_event(widget, event, event_type)
+            return False
+        start = perf_counter_ns()
+        self._filter_observed_event(widget, event, event_type)
+        duration_ns = perf_counter_ns() - start
+        if self._profile is not None:
+            self._profile.add(EVENT_TYPE_NAMES[event_type], duration_ns)
+        if self._load_shedder is not None and self._load_shedder.add(
+            self._timer.nsecsElapsed(), duration_ns
+        ):
+            self._apply_recording_modes()
+        return False
 
-    def _interpolate_mouse_move_events(self, events: list[MacroEvent]) -> None:
-        """Interpolate mouse move events."""
-        point_count = Settings.move_event_interpolation_count.get()
-        for event in events:
+    def _filter_observed_event(
+        self, widget: QWidget, event: QEvent, event_type: QEvent.Type
+    ) -> None:
+        """Handle an event of an observed type on *widget*."""
+        if event_type in STRUCTURE_CHANGE_EVENT_TYPES:
+            self._widget_path_cache.invalidate(widget)
             if (
-                isinstance(event, MacroMouseMoveEvent)
-                and len(event.positions) > point_count
+                self._scope_filter is not None
+                and event_type == QEvent.Type.ChildAdded
+                and isinstance(child := cast("QChildEvent", event).child(), QWidget)
             ):
-                event.interpolate_positions(point_count)
+                self._watch_widget_tree(child)
+            return
 
-    def _record_key_event(
-        self, event: QKeyEvent, widget: QWidget, elapsed: int
+        if event_type in WIDGET_REMOVAL_EVENT_TYPES:
+            if self._pending_widget_paths:
+                # Take the snapshots while the widget and its descendants are
+                # still intact, since the descendants get no events of their
+                # own when they are destroyed with it
+                self._resolve_widget_paths_within(widget)
+            return
+
+        if event_type in MOUSE_EVENT_TYPES and self._is_filtered_out(widget):
+            return
+
+        self._event_time_ns = self._timer.nsecsElapsed()
+        self._event_handlers[event_type](event, widget)
+
+    def _watch_window(self, window: QWidget) -> None:
+        """Install the scoped filter on *window* unless it is already recorded."""
+        address = sip.unwrapinstance(window)
+        if address in self._scoped_windows:
+            return
+        self._scoped_windows.add(address)
+        window.destroyed.connect(partial(self._scoped_windows.discard, address))
+        self._watch_widget_tree(window)
+
+    def _watch_widget_tree(self, widget: QWidget) -> None:
+        """Install the scoped filter on *widget* and all of its descendants.
+
+        Installing the same filter again is a no-op in Qt.
+        """
+        if self._scope_filter is None:
+            return
+        widget.installEventFilter(self._scope_filter)
+        for child in widget.findChildren(QWidget):
+            child.installEventFilter(self._scope_filter)
+
+    def _on_focus_changed(self, _old: QWidget | None, new: QWidget | None) -> None:
+        """Pick up focused windows that are not children of recorded windows."""
+        if new is not None:
+            self._watch_window(new.window())
+
+    def _start_window_polling(self, scope_filter: "_ScopeEventFilter") -> None:
+        self._visible_windows = set(self._visible_windows_by_address())
+        # Deleted together with the scoped filter when the recording stops
+        poll_timer = QTimer(scope_filter)
+        poll_timer.setInterval(SCOPED_WINDOW_POLL_INTERVAL_MS)
+        poll_timer.timeout.connect(self._watch_shown_windows)
+        poll_timer.start()
+
+    def _watch_shown_windows(self) -> None:
+        """Pick up the top-level windows shown since the last poll.
+
+        Windows with a parent are picked up from the ChildAdded events of
+        the recorded windows already, this finds the parentless ones, such
+        as tool windows shown without focus.
+        """
+        visible_windows = self._visible_windows_by_address()
+        for address in visible_windows.keys() - self._visible_windows:
+            self._watch_window(visible_windows[address])
+        self._visible_windows = set(visible_windows)
+
+    @staticmethod
+    def _visible_windows_by_address() -> dict[int, QWidget]:
+        return {
+            sip.unwrapinstance(window): window
+            for window in QApplication.topLevelWidgets()
+            if window.isVisible()
+        }
+
+    def _is_filtered_out(self, widget: QWidget) -> bool:
+        """Check if *widget* or any of its ancestors is filtered out."""
+        current: QWidget | None = widget
+        while current is not None:
+            if current in self._widgets_to_filter_events_out:
+                return True
+            current = current.parentWidget()
+        return False
+
+    def _append_event(
+        self,
+        macro_event: BaseMacroEvent,
+        widget: QWidget,
+        timestamp_ns: int | None = None,
     ) -> None:
+        """Capture the widget path of *macro_event* and add it to the recording.
+
+        Args:
+            macro_event: Event to add.
+            widget: Target widget of the event.
+            timestamp_ns: Time of the event on the recording timeline. The
+                time of the input event being recorded is used by default.
+
+        """
+        macro_event.timestamp_ns = (
+            self._event_time_ns if timestamp_ns is None else timestamp_ns
+        )
+        macro_event.ms_since_last_event = (
+            macro_event.timestamp_ns - self._last_event_time_ns
+        ) // NS_PER_MS
+        self._last_event_time_ns = macro_event.timestamp_ns
+        if self._defer_widget_capture:
+            self._add_pending_widget_path(widget, macro_event)
+            if not self._idle_timer.isActive():
+                self._idle_timer.start()
+        else:
+            macro_event.widget_path = self._widget_path_cache.get(widget)
+        self._flush_pending_move_position()
+        self._recorded_events.append(macro_event)
+        if isinstance(macro_event, MacroKeyEvent):
+            self._last_key_event = macro_event
+        elif isinstance(macro_event, MacroMouseEvent):
+            self._last_mouse_button_event = macro_event
+        if self._spool is not None and len(self._recorded_events) > SPOOL_TAIL_LENGTH:
+            self._spool_oldest_event()
+
+    def _flush_pending_move_position(self) -> None:
+        """Add the position skipped by the move sampling to end the segment."""
+        if self._pending_move_position is None:
+            return
+        last_event = self._recorded_events[-1]
+        if isinstance(last_event, MacroMouseMoveEvent):
+            last_event.add_position(
+                self._pending_move_position,
+                self._simplification_tolerance,
+                self._pending_move_map_point,
+            )
+        self._pending_move_position = None
+        self._pending_move_map_point = None
+
+    def _add_pending_widget_path(
+        self, widget: QWidget, macro_event: BaseMacroEvent
+    ) -> None:
+        """Leave the widget path of *macro_event* to be resolved later."""
+        address = sip.unwrapinstance(widget)
+        if address not in self._pending_widget_paths:
+            slot = partial(self._drop_pending_widget_paths, address)
+            widget.destroyed.connect(slot)
+            window_address = sip.unwrapinstance(widget.window())
+            self._pending_widget_windows[address] = (window_address, slot)
+            self._pending_widgets_by_window.setdefault(window_address, set()).add(
+                address
+            )
+        self._pending_widget_paths.setdefault(address, []).append(macro_event)
+
+    def _drop_pending_widget_paths(self, address: int) -> None:
+        """Forget the events of a widget destroyed before its path was resolved.
+
+        Widgets destroyed without them or their ancestors being hidden or
+        closed first cannot be resolved anymore. Their events keep only the
+        widget spec and are looked up by position during playback.
+        """
+        LOGGER.debug("Widget was destroyed before its path could be resolved")
+        if address in self._pending_widget_paths:
+            del self._pending_widget_paths[address]
+            self._remove_pending_widget_window(address)
+
+    def _remove_pending_widget_window(self, address: int) -> "Callable[[], None]":
+        """Forget the window of a pending widget.
+
+        Returns:
+            The slot connected to the destroyed signal of the widget.
+
+        """
+        window_address, slot = self._pending_widget_windows.pop(address)
+        window_widgets = self._pending_widgets_by_window[window_address]
+        window_widgets.discard(address)
+        if not window_widgets:
+            del self._pending_widgets_by_window[window_address]
+        return slot
+
+    def _resolve_widget_paths(self, address: int) -> None:
+        """Fill in the widget path of the events pending for a live widget."""
+        events = self._pending_widget_paths.pop(address)
+        widget = sip.wrapinstance(address, QWidget)
+        widget.destroyed.disconnect(self._remove_pending_widget_window(address))
+        widget_path = self._widget_path_cache.get(widget)
+        for macro_event in events:
+            macro_event.widget_path = widget_path
+
+    def _resolve_widget_paths_within(self, removed_widget: QWidget) -> None:
+        """Resolve the pending widget paths of *removed_widget* and its descendants.
+
+        Only the pending widgets of the window of *removed_widget* are
+        checked. A widget moved to another window after its event was
+        recorded is still resolved when idle or dropped when destroyed.
+        """
+        window_widgets = self._pending_widgets_by_window.get(
+            sip.unwrapinstance(removed_widget.window())
+        )
+        if window_widgets is None:
+            return
+        if removed_widget.isWindow():
+            addresses = list(window_widgets)
+        else:
+            addresses = [
+                address
+                for address in window_widgets
+                if (widget := sip.wrapinstance(address, QWidget)) is removed_widget
+                or removed_widget.isAncestorOf(widget)
+            ]
+        for address in addresses:
+            self._resolve_widget_paths(address)
+
+    def _resolve_widget_path_of(self, macro_event: MacroEvent) -> None:
+        """Resolve the pending widget path of *macro_event* right away."""
+        for address, events in self._pending_widget_paths.items():
+            if any(event is macro_event for event in events):
+                self._resolve_widget_paths(address)
+                return
+
+    def _resolve_pending_widget_paths_when_idle(self) -> None:
+        for address in list(
+            islice(self._pending_widget_paths, MAXIMUM_DEFERRED_CAPTURES_PER_IDLE)
+        ):
+            self._resolve_widget_paths(address)
+        if not self._pending_widget_paths:
+            self._idle_timer.stop()
+
+    def _resolve_all_pending_widget_paths(self) -> None:
+        for address in list(self._pending_widget_paths):
+            self._resolve_widget_paths(address)
+
+    def _finalize_next_event(self, *, is_last: bool) -> MacroEvent | None:
+        """Take the oldest recorded event and finalize it.
+
+        Returns:
+            The finalized event or None if the event is dropped.
+
+        """
+        event = self._recorded_events.popleft()
+        is_first = self._finalized_event_count == 0
+        self._finalized_event_count += 1
+        return self._event_finalizer().finalize(
+            event, is_first=is_first, is_last=is_last
+        )
+
+    def _event_finalizer(self) -> "_EventFinalizer":
+        return _EventFinalizer(
+            filter_out_mouse_movements=self._filter_out_mouse_movements,
+            interpolation_count=self._interpolation_count,
+            simplification_tolerance=self._simplification_tolerance,
+        )
+
+    def _spool_oldest_event(self) -> None:
+        """Move the oldest event of the in-memory tail to the spool."""
+        if self._spool is None:
+            return
+        if self._recorded_events[0] is self._last_key_event:
+            # A spooled press can no longer count repeats, start a new event
+            self._last_key_event = None
+        self._resolve_widget_path_of(self._recorded_events[0])
+        if (event := self._finalize_next_event(is_last=False)) is not None:
+            # The spool interpolates the event in its writer thread
+            self._spool.write(
+                event, self._event_finalizer().interpolation_count_of(event)
+            )
+
+    @_profiled
+    def _record_key_event(self, event: QKeyEvent, widget: QWidget) -> None:
         """Record key press or release events."""
+        if self._is_layer_tree_input(event, widget):
+            return
+        is_release = event.type() == QEvent.Type.KeyRelease
+        if is_release and event.isAutoRepeat():
+            return
+        if self._record_text_entry and (
+            self._is_text_entry(event, widget)
+            or self._is_modifier_in_text_entry(event, widget)
+        ):
+            self._record_text_entry_key_event(event, widget)
+            return
+        # Collapse the auto-repeat of a held key into the initial press
+        if (
+            event.isAutoRepeat()
+            and (previous_event := self._last_key_event) is not None
+            and previous_event.key == event.key()
+            and not previous_event.is_release
+        ):
+            previous_event.repeat_count += 1
+            return
+
         macro_event = MacroKeyEvent(
-            ms_since_last_event=elapsed,
             key=event.key(),
-            is_release=event.type() == QEvent.Type.KeyRelease,
+            is_release=is_release,
             modifiers=enum_value(event.modifiers()),
             widget_spec=WidgetSpec.create(widget),
-            widget_path=WidgetPath.create(widget),
         )
 
-        # Do not add if the last mouse button event was the same
-        for i in range(len(self._recorded_events) - 1, -1, -1):
-            if isinstance((previous_event := self._recorded_events[i]), MacroKeyEvent):
-                if (
-                    previous_event.key == macro_event.key
-                    and previous_event.is_release == macro_event.is_release
-                ):
-                    return
-                break
+        # Do not add if the last key event was the same
+        if (previous_event := self._last_key_event) is not None and (
+            previous_event.key == macro_event.key
+            and previous_event.is_release == macro_event.is_release
+        ):
+            return
 
-        self._recorded_events.append(macro_event)
+        self._append_event(macro_event, widget)
 
-    def _record_mouse_button_event(
-        self, event: QMouseEvent, widget: QWidget, elapsed: int
-    ) -> None:
+    @staticmethod
+    def _is_text_entry(event: QKeyEvent, widget: QWidget) -> bool:
+        """Check if *event* types printable text into an editable text input."""
+        return (
+            isinstance(widget, TEXT_INPUT_WIDGET_TYPES)
+            and not widget.isReadOnly()
+            and event.text().isprintable()
+            and event.text() != ""
+            and event.modifiers() | Qt.KeyboardModifier.ShiftModifier
+            == Qt.KeyboardModifier.ShiftModifier
+        )
+
+    def _is_modifier_in_text_entry(self, event: QKeyEvent, widget: QWidget) -> bool:
+        """Check if *event* presses or releases a bare modifier while typing.
+
+        Typing a capital letter sends separate Shift presses and releases
+        without text, which should not end the text entry.
+        """
+        return (
+            event.key() in MODIFIER_KEYS
+            and not event.isAutoRepeat()
+            and self._current_text_entry(widget) is not None
+        )
+
+    def _current_text_entry(self, widget: QWidget) -> MacroTextEntryEvent | None:
+        """Return the text entry being typed into *widget*, if any."""
+        last_event = self._recorded_events[-1] if self._recorded_events else None
+        if (
+            isinstance(last_event, MacroTextEntryEvent)
+            and self._last_text_entry_widget is not None
+            and self._last_text_entry_widget() is widget
+        ):
+            return last_event
+        return None
+
+    @_profiled
+    def _record_text_entry_key_event(self, event: QKeyEvent, widget: QWidget) -> None:
+        """Collapse printable key events on a text input into a text entry."""
+        is_release = event.type() == QEvent.Type.KeyRelease
+        key_event = MacroKeyEvent(
+            key=event.key(),
+            is_release=is_release,
+            modifiers=enum_value(event.modifiers()),
+            widget_spec=WidgetSpec.create(widget),
+        )
+        if (last_event := self._current_text_entry(widget)) is not None:
+            if not is_release:
+                last_event.text += event.text()
+            previous_key_event = last_event.key_events[-1]
+            key_event.timestamp_ns = self._event_time_ns
+            key_event.ms_since_last_event = (
+                key_event.timestamp_ns - previous_key_event.timestamp_ns
+            ) // NS_PER_MS
+            last_event.key_events.append(key_event)
+            return
+        if is_release:
+            # The press was not part of a text entry, record it as is
+            self._append_event(key_event, widget)
+            return
+
+        self._last_text_entry_widget = ref(widget)
+        # Key events of the entry are not compared with later key events
+        self._last_key_event = None
+        key_event.timestamp_ns = self._event_time_ns
+        self._append_event(
+            MacroTextEntryEvent(
+                widget_spec=key_event.widget_spec,
+                text=event.text(),
+                key_events=[key_event],
+            ),
+            widget,
+        )
+
+    @_profiled
+    def _record_mouse_button_event(self, event: QMouseEvent, widget: QWidget) -> None:
         """Record mouse button press or release events."""
+        if self._is_canvas_navigation(event, widget) or self._is_layer_tree_input(
+            event, widget
+        ):
+            return
+        if self._record_actions and self._is_action_widget(widget, event):
+            if event.type() == QEvent.Type.MouseButtonRelease:
+                self._record_action_event(event, widget)
+            return
+        if self._record_item_selections and (
+            selection := self._get_item_selection(widget, event)
+        ):
+            if event.type() == QEvent.Type.MouseButtonRelease:
+                self._record_item_selection_event(*selection, event)
+            return
+
         macro_event = MacroMouseEvent(
-            ms_since_last_event=elapsed,
             position=Position.from_event(event),
             is_release=event.type() == QEvent.Type.MouseButtonRelease,
             button=enum_value(event.button()),
             modifiers=enum_value(event.modifiers()),
             widget_spec=WidgetSpec.create(widget),
-            widget_path=WidgetPath.create(widget),
+            **self._map_position_of(event, widget),
         )
 
         # Do not add if the last mouse button event was the same
-        for i in range(len(self._recorded_events) - 1, -1, -1):
-            if isinstance(
-                (previous_event := self._recorded_events[i]), MacroMouseEvent
-            ):
-                if (
-                    previous_event.button == macro_event.button
-                    and previous_event.is_release == macro_event.is_release
-                ):
-                    return
-                break
+        if (previous_event := self._last_mouse_button_event) is not None and (
+            previous_event.button == macro_event.button
+            and previous_event.is_release == macro_event.is_release
+        ):
+            return
 
-        self._recorded_events.append(macro_event)
+        self._append_event(macro_event, widget)
+
+    @staticmethod
+    def _is_action_widget(widget: QWidget, event: QMouseEvent) -> bool:
+        """Check if clicks on *widget* are replayed through its actions.
+
+        All clicks on menus are, since the menu does not need to be opened
+        to trigger an action. Toolbar buttons are if they have an action.
+        """
+        return isinstance(widget, QMenu) or (
+            isinstance(widget, QToolButton)
+            and isinstance(widget.parentWidget(), QToolBar)
+            and get_triggerable_action(widget, event) is not None
+        )
+
+    @_profiled
+    def _record_action_event(self, event: QMouseEvent, widget: QWidget) -> None:
+        """Record the action triggered by releasing a click on *widget*."""
+        action = get_triggerable_action(widget, event)
+        if action is None or not widget.rect().contains(event_pos(event)):
+            return
+        self._append_event(
+            MacroActionEvent(
+                widget_spec=WidgetSpec.create(widget),
+                object_name=action.objectName(),
+                text_path=get_action_text_path(
+                    action, widget if isinstance(widget, QMenu) else None
+                ),
+            ),
+            widget,
+        )
+
+    @staticmethod
+    def _get_item_selection(
+        widget: QWidget, event: QMouseEvent
+    ) -> tuple[QWidget, QModelIndex] | None:
+        """Return the target widget and the item a click on *widget* selects.
+
+        The target is the combo box for clicks on the popup of a combo box
+        and the item view otherwise. Clicks with modifiers and clicks on
+        check boxes or outside the item rectangles are not item selections.
+        """
+        view = widget.parentWidget()
+        if (
+            not isinstance(view, QAbstractItemView)
+            or widget is not view.viewport()
+            or event.button() != Qt.MouseButton.LeftButton
+            or event.modifiers() != Qt.KeyboardModifier.NoModifier
+        ):
+            return None
+        point = event_pos(event)
+        index = view.indexAt(point)
+        if (
+            not index.isValid()
+            or not index.flags() & Qt.ItemFlag.ItemIsSelectable
+            or not view.visualRect(index).contains(point)
+            or is_on_check_indicator(view, index, point)
+        ):
+            return None
+        container = view.parentWidget()
+        combobox = container.parentWidget() if container is not None else None
+        if isinstance(combobox, QComboBox) and combobox.view() is view:
+            return combobox, index
+        return view, index
 
+    @_profiled
+    def _record_item_selection_event(
+        self,
+        target: QWidget,
+        index: QModelIndex,
+        event: QMouseEvent,
+    ) -> None:
+        """Record the selection of *index* in the combo box or view *target*."""
+        if isinstance(target, QComboBox):
+            local_point = target.rect().center()
+            global_point = target.mapToGlobal(local_point)
+        else:
+            global_point = event_global_pos(event)
+            local_point = target.mapFromGlobal(global_point)
+        data = index.data()
+        self._append_event(
+            MacroItemSelectionEvent(
+                widget_spec=WidgetSpec.create(target),
+                position=Position.from_points(local_point, global_point),
+                index_path=get_index_path(index),
+                column=index.column(),
+                text=str(data) if data is not None else "",
+            ),
+            target,
+        )
+
+    @_profiled
     def _record_mouse_button_double_click_event(
-        self, event: QMouseEvent, widget: QWidget, elapsed: int
+        self, event: QMouseEvent, widget: QWidget
     ) -> None:
         """Record mouse double click events."""
-        self._recorded_events.append(
+        if self._is_canvas_navigation(event, widget) or self._is_layer_tree_input(
+            event, widget
+        ):
+            return
+        if self._record_actions and self._is_action_widget(widget, event):
+            return
+        self._append_event(
             MacroMouseDoubleClickEvent(
-                ms_since_last_event=elapsed,
                 position=Position.from_event(event),
                 button=enum_value(event.button()),
                 modifiers=enum_value(event.modifiers()),
                 widget_spec=WidgetSpec.create(widget),
-                widget_path=WidgetPath.create(widget),
-            )
+                **self._map_position_of(event, widget),
+            ),
+            widget,
         )
 
+    @_profiled
     def _record_mouse_move_event(self, event: QMouseEvent, widget: QWidget) -> None:
         """Record mouse movement events."""
+        if self._is_canvas_navigation(event, widget) or self._is_layer_tree_input(
+            event, widget
+        ):
+            return
+        if self._record_actions and isinstance(widget, QMenu):
+            return
+        if self._skip_hover_moves and event.buttons() == Qt.MouseButton.NoButton:
+            return
         current_position = Position.from_event(event)
+        map_point = self._map_point(event, widget)
         last_event = self._recorded_events[-1] if self._recorded_events else None
         if isinstance(last_event, MacroMouseMoveEvent):
-            last_event.add_position(current_position)
+            now = self._event_time_ns
+            if now - self._last_move_sample_time_ns < self._move_sample_interval_ns:
+                self._pending_move_position = current_position
+                self._pending_move_map_point = map_point
+                return
+            self._last_move_sample_time_ns = now
+            self._pending_move_position = None
+            self._pending_move_map_point = None
+            last_event.add_position(
+                current_position, self._simplification_tolerance, map_point
+            )
         else:
-            self._recorded_events.append(
-                MacroMouseMoveEvent(
-                    widget_spec=WidgetSpec.create(widget),
-                    ms_since_last_event=0,
-                    positions=[current_position],
-                    buttons=enum_value(event.buttons()),
-                    modifiers=enum_value(event.modifiers()),
-                    widget_path=WidgetPath.create(widget),
+            self._last_move_sample_time_ns = self._event_time_ns
+            move_event = MacroMouseMoveEvent(
+                widget_spec=WidgetSpec.create(widget),
+                buttons=enum_value(event.buttons()),
+                modifiers=enum_value(event.modifiers()),
+                map_crs=self._map_crs if map_point is not None else "",
+            )
+            move_event.add_position(current_position, map_point=map_point)
+            self._append_event(move_event, widget)
+
+    def _map_point(
+        self, event: QMouseEvent | QWheelEvent, widget: QWidget
+    ) -> tuple[float, float] | None:
+        """Return the map coordinates of *event* if it is on the map canvas."""
+        canvas = self._map_coordinate_canvas
+        if canvas is None or widget is not canvas.viewport():
+            return None
+        point = event_pos(event)
+        map_point = canvas.getCoordinateTransform().toMapCoordinates(
+            point.x(), point.y()
+        )
+        return map_point.x(), map_point.y()
+
+    def _map_position_of(
+        self, event: QMouseEvent | QWheelEvent, widget: QWidget
+    ) -> dict:
+        """Return the map position fields of a single position event."""
+        map_point = self._map_point(event, widget)
+        if map_point is None:
+            return {}
+        return {"map_position": map_point, "map_crs": self._map_crs}
+
+    def _is_canvas_navigation(
+        self, event: QMouseEvent | QWheelEvent, widget: QWidget
+    ) -> bool:
+        """Check if *event* navigates a canvas whose extent changes are recorded.
+
+        Wheel events, middle button drags and events of the pan and zoom
+        tools are recorded as the extent changes they cause instead.
+        """
+        if self._extent_canvas is None or widget is not self._extent_canvas.viewport():
+            return False
+        return (
+            isinstance(event, QWheelEvent)
+            or event.button() == Qt.MouseButton.MiddleButton
+            or bool(event.buttons() & Qt.MouseButton.MiddleButton)
+            or isinstance(
+                self._extent_canvas.mapTool(), (QgsMapToolPan, QgsMapToolZoom)
+            )
+        )
+
+    @_profiled
+    def _record_canvas_extent(self) -> None:
+        """Record the current extent of the map canvas."""
+        canvas = self._extent_canvas
+        if canvas is None:
+            return
+        center = canvas.center()
+        self._append_event(
+            MacroCanvasExtentEvent(
+                widget_spec=WidgetSpec.create(canvas.viewport()),
+                center=(center.x(), center.y()),
+                scale=canvas.scale(),
+                rotation=canvas.rotation(),
+                crs=crs_definition(canvas.mapSettings().destinationCrs()),
+            ),
+            canvas.viewport(),
+            self._timer.nsecsElapsed(),
+        )
+
+    def _is_layer_tree_input(self, event: QEvent, widget: QWidget) -> bool:
+        """Check if *event* changes the layer tree in the layers panel.
+
+        Clicks on the check boxes, space key presses and drags in a layer
+        tree view are recorded as the layer tree operations they cause
+        instead.
+        """
+        if self._layer_tree_root is None:
+            return False
+        if isinstance(event, QKeyEvent):
+            return (
+                isinstance(widget, QgsLayerTreeView) and event.key() == Qt.Key.Key_Space
+            )
+        view = widget.parentWidget()
+        if not isinstance(view, QgsLayerTreeView) or widget is not view.viewport():
+            return False
+        mouse_event = cast("QMouseEvent", event)
+        if mouse_event.type() == QEvent.Type.MouseMove:
+            return bool(mouse_event.buttons() & Qt.MouseButton.LeftButton)
+        point = event_pos(mouse_event)
+        return is_on_check_indicator(view, view.indexAt(point), point)
+
+    @_profiled
+    def _record_layer_tree_visibility(self, node: QgsLayerTreeNode) -> None:
+        """Record a visibility change of a layer tree node."""
+        layer_id, name = get_layer_tree_node_key(node)
+        self._append_layer_tree_operation(
+            LayerTreeOperation(
+                LayerTreeOperation.VISIBILITY,
+                layer_id,
+                name,
+                visible=node.itemVisibilityChecked(),
+            )
+        )
+
+    def _on_layer_tree_insertion(
+        self, group: QgsLayerTreeNode, index_from: int, index_to: int
+    ) -> None:
+        """Keep the inserted nodes until it is known whether they were moved."""
+        group_path = get_layer_tree_group_path(group)
+        children = group.children()
+        self._layer_tree_insertion = []
+        self._moved_layer_tree_nodes.clear()
+        for index in range(index_from, index_to + 1):
+            node = children[index]
+            key = get_layer_tree_node_key(node)
+            operation = LayerTreeOperation(
+                LayerTreeOperation.INSERT, *key, group_path=group_path, index=index
+            )
+            self._layer_tree_insertion.append((node, key, operation))
+
+    def _on_layer_tree_removal(
+        self, group: QgsLayerTreeNode, index_from: int, index_to: int
+    ) -> None:
+        """Record the removal of nodes whose copies were inserted before.
+
+        Other removals are caused by replayed actions, such as removing a
+        layer from the project, and are not recorded.
+        """
+        group_path = get_layer_tree_group_path(group)
+        children = group.children()
+        # Remove the last node first to keep the indices of the others valid
+        for index in range(index_to, index_from - 1, -1):
+            node = children[index]
+            key = get_layer_tree_node_key(node)
+            if key not in self._moved_layer_tree_nodes and not (
+                self._record_layer_tree_insertion_of(node, key)
+            ):
+                continue
+            self._moved_layer_tree_nodes.discard(key)
+            self._append_layer_tree_operation(
+                LayerTreeOperation(
+                    LayerTreeOperation.REMOVE, *key, group_path=group_path, index=index
                 )
             )
 
+    @_profiled
+    def _record_layer_tree_insertion_of(
+        self, node: QgsLayerTreeNode, key: tuple[str, str]
+    ) -> bool:
+        """Record the latest insertion if it inserted a copy of *node*."""
+        if not any(
+            inserted_node is not node and inserted_key == key
+            for inserted_node, inserted_key, _ in self._layer_tree_insertion
+        ):
+            return False
+        for _, inserted_key, operation in self._layer_tree_insertion:
+            self._append_layer_tree_operation(operation)
+            self._moved_layer_tree_nodes.add(inserted_key)
+        self._layer_tree_insertion = []
+        return True
+
+    def _append_layer_tree_operation(self, operation: LayerTreeOperation) -> None:
+        """Add *operation* to the batch of the last event or start a new batch."""
+        last_event = self._recorded_events[-1] if self._recorded_events else None
+        if isinstance(last_event, MacroLayerTreeEvent):
+            last_event.operations.append(operation)
+            return
+        # The layers panel is missing if the layer tree is changed headless
+        widget = iface.layerTreeView() or iface.mainWindow()
+        self._append_event(
+            MacroLayerTreeEvent(
+                widget_spec=WidgetSpec.create(widget),
+                operations=[operation],
+            ),
+            widget,
+            self._timer.nsecsElapsed(),
+        )
+
+    @_profiled
+    def _record_processing_run(
+        self,
+        _entry_id: int,
+        entry: QgsHistoryEntry,
+        _backend: Qgis.HistoryProviderBackend,
+    ) -> None:
+        """Record the algorithm run described by a processing history entry.
+
+        The processing registry does not signal algorithm runs, but the
+        processing dialogs add a history entry for every run.
+        """
+        if entry.providerId != "processing":
+            return
+        widget = iface.mainWindow()
+        self._append_event(
+            MacroProcessingEvent(
+                widget_spec=WidgetSpec.create(widget),
+                algorithm_id=entry.entry.get("algorithm_id", ""),
+                # Round trip through JSON to store the parameters as plain data
+                parameters=json.loads(
+                    json.dumps(entry.entry.get("parameters", {}), default=str)
+                ),
+            ),
+            widget,
+            self._timer.nsecsElapsed(),
+        )
+
+    @_profiled
     def _record_mouse_wheel_event(self, event: QWheelEvent, widget: QWidget) -> None:
-        """Record mouse wheel events."""
-        self._recorded_events.append(
+        """Record mouse wheel events, merging consecutive notches."""
+        if self._is_canvas_navigation(event, widget):
+            return
+        delta = event.angleDelta().y()
+        last_event = self._recorded_events[-1] if self._recorded_events else None
+        if (
+            isinstance(last_event, MacroWheelEvent)
+            and self._last_wheel_widget is not None
+            and self._last_wheel_widget() is widget
+            and (last_event.delta > 0) == (delta > 0)
+            and last_event.phase == event.phase()
+            and last_event.inverted == event.inverted()
+            and last_event.source == event.source()
+        ):
+            last_event.delta += delta
+            last_event.timings.append(
+                (self._event_time_ns - self._last_wheel_time_ns) // NS_PER_MS
+            )
+            self._last_wheel_time_ns = self._event_time_ns
+            return
+
+        self._last_wheel_widget = ref(widget)
+        self._last_wheel_time_ns = self._event_time_ns
+        self._append_event(
             MacroWheelEvent(
                 WidgetSpec.create(widget),
-                ms_since_last_event=0,
                 position=Position.from_event(event),
-                delta=event.angleDelta().y(),
+                delta=delta,
                 phase=event.phase(),
                 source=event.source(),
                 inverted=event.inverted(),
-                widget_path=WidgetPath.create(widget),
-            )
+                **self._map_position_of(event, widget),
+            ),
+            widget,
         )
+
+
+class _ScopeEventFilter(QObject):
+    """Event filter installed on the widgets of a scoped recording.
+
+    A separate object is used so that deleting it removes the filter from
+    every widget at once, including widgets that are not wrapped in Python.
+    """
+
+    def __init__(self, recorder: MacroRecorder) -> None:
+        super().__init__(recorder)
+        self._recorder = recorder
+
+    def eventFilter(self, obj: QObject, event: QEvent) -> bool:  # noqa: N802
+        """Forward the events of the recorded windows to the recorder."""
+        return self._recorder.eventFilter(obj, event)
+
+
+@dataclass(frozen=True)
+class _EventFinalizer:
+    """Finalizing options of the recorded events, safe to use in any thread."""
+
+    filter_out_mouse_movements: bool
+    interpolation_count: int
+    simplification_tolerance: float
+
+    def finalize(
+        self, event: MacroEvent, *, is_first: bool, is_last: bool
+    ) -> MacroEvent | None:
+        """Return *event* finalized for the macro.
+
+        Leading and trailing mouse moves are trimmed and non-map-canvas
+        moves are reduced to their last position.
+
+        Returns:
+            The finalized event or None if the event is dropped.
+
+        """
+        if not self.filter_out_mouse_movements or not isinstance(
+            event, MacroMouseMoveEvent
+        ):
+            return event
+        if is_first:
+            # Take just the last mouse position for the first element
+            return MacroMouseMoveEvent(
+                widget_spec=event.widget_spec,
+                ms_since_last_event=0,
+                positions=event.positions[-1:],
+                widget_path=event.widget_path,
+                timestamp_ns=event.timestamp_ns,
+                map_crs=event.map_crs,
+            )
+        if is_last:
+            return None
+        if event.widget_path is None or not event.widget_path.is_map_canvas:
+            # For non-map-canvas moves, keep only the last position
+            return MacroMouseMoveEvent(
+                widget_spec=event.widget_spec,
+                ms_since_last_event=event.ms_since_last_event,
+                positions=event.positions[-1:],
+                buttons=event.buttons,
+                modifiers=event.modifiers,
+                widget_path=event.widget_path,
+                timestamp_ns=event.timestamp_ns,
+                map_crs=event.map_crs,
+            )
+        return event
+
+    def interpolation_count_of(self, event: MacroEvent) -> int:
+        """Return the position count to interpolate a finalized event to.
+
+        Mouse moves with more positions than the interpolation count are
+        interpolated, unless they were already simplified while recording.
+        Returns 0 for events that are not interpolated.
+        """
+        if (
+            isinstance(event, MacroMouseMoveEvent)
+            and not self.simplification_tolerance
+            and len(event.positions) > self.interpolation_count
+        ):
+            return self.interpolation_count
+        return 0
+
+
+class _RecordingFinishTask(QgsTask):
+    """Task that finalizes the events of a stopped recording into a macro.
+
+    The events of a spooled recording are written to the spool, which is
+    then closed and the macro loaded from it. The events and the spool must
+    not be used elsewhere after the task is created.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        events: list[MacroEvent],
+        finalizer: _EventFinalizer,
+        *,
+        first_event_finalized: bool,
+        spool: MacroSpool | None,
+        remove_spool: bool,
+        layer_edits: list[LayerEdit],
+        metadata: dict[str, Any],
+    ) -> None:
+        super().__init__(tr("Finishing the recorded macro"))
+        self._events = events
+        self._finalizer = finalizer
+        self._first_event_finalized = first_event_finalized
+        self.spool = spool
+        self._remove_spool = remove_spool
+        self._layer_edits = layer_edits
+        self._metadata = metadata
+        self.macro: Macro | None = None
+        self.error: Exception | None = None
+
+    def run(self) -> bool:
+        """Finalize the events and build the macro."""
+        try:
+            macro = self._build_macro()
+        except Exception as e:
+            LOGGER.exception("Finishing the recorded macro failed")
+            self.error = e
+            return False
+        macro.layer_edits = self._layer_edits
+        macro.metadata.update(self._metadata)
+        self.macro = macro
+        return True
+
+    def _build_macro(self) -> Macro:
+        events: list[MacroEvent] = []
+        for i, event in enumerate(self._events):
+            finalized_event = self._finalizer.finalize(
+                event,
+                is_first=i == 0 and not self._first_event_finalized,
+                is_last=i == len(self._events) - 1,
+            )
+            if finalized_event is not None:
+                events.append(finalized_event)
+        if self.spool is None:
+            for event in events:
+                if count := self._finalizer.interpolation_count_of(event):
+                    event.interpolate_positions(count)
+            return Macro(events)
+
+        for event in events:
+            self.spool.write(event, self._finalizer.interpolation_count_of(event))
+        self.spool.close()
+        macro = MacroSpool.load(self.spool.path)
+        if self._remove_spool:
+            self.spool.path.unlink()
+        self.spool = None
+        return macro
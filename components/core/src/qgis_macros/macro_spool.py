@@ -0,0 +1,175 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+"""Crash-safe spool file for streaming recorded events to disk.
+
+The spool is an append-only JSON lines file. The first line contains the
+macro metadata and each following line contains one serialized event, so
+a spool left behind by a crashed session can still be loaded. The events
+are interpolated, serialized and written in a background thread while the
+recording is running, so that the GUI thread only hands them over. When
+the recording stops, the spool is closed and loaded in a QGIS task.
+
+Example::
+
+    from qgis_macros.macro_spool import MacroSpool
+
+    macro = MacroSpool.load(spool_path)
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from queue import SimpleQueue
+from threading import Thread
+from typing import TextIO
+
+from qgis_macros.constants import SPOOL_FSYNC_INTERVAL, SPOOL_FSYNC_INTERVAL_MS
+from qgis_macros.macro import Macro, MacroEvent, MacroMouseMoveEvent
+
+LOGGER = logging.getLogger(__name__)
+
+
+class MacroSpool:
+    """Append-only JSON lines file of finalized macro events.
+
+    Events are written by a background writer thread. Writes are flushed
+    and synced to disk in batches, after ``SPOOL_FSYNC_INTERVAL`` events or
+    ``SPOOL_FSYNC_INTERVAL_MS`` milliseconds, whichever comes first.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the spool for *path* without opening it."""
+        self.path = path
+        self._file: TextIO | None = None
+        self._unsynced_events = 0
+        self._last_sync = 0.0
+        # Events waiting for the writer thread, None stops the thread
+        self._queue: SimpleQueue[tuple[MacroEvent, int] | None] = SimpleQueue()
+        self._writer: Thread | None = None
+        self._writer_error: Exception | None = None
+
+    def open(self, macro: Macro) -> None:
+        """Create the spool file and start the writer thread.
+
+        The metadata of *macro* is written to the file first.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("w", encoding="utf-8")
+        metadata = macro.serialize()
+        del metadata["events"]
+        self._write_line(metadata)
+        self.sync()
+        self._writer = Thread(
+            target=self._write_queued_events, name="MacroSpool writer", daemon=True
+        )
+        self._writer.start()
+
+    def write(self, event: MacroEvent, interpolation_count: int = 0) -> None:
+        """Hand a finalized event over to the writer thread.
+
+        The event must not be modified afterwards. Events written after the
+        writer thread has stopped due to an error are dropped, and the error
+        is raised by :meth:`close`.
+
+        Args:
+            event: Event to append to the spool.
+            interpolation_count: If given, the positions of a mouse move
+                event are interpolated to this count before writing.
+
+        """
+        if self._writer is None:
+            raise ValueError("Spool is not open.")  # noqa: TRY003
+        if self._writer_error is not None:
+            return
+        self._queue.put((event, interpolation_count))
+
+    def sync(self) -> None:
+        """Flush the buffered events and sync them to disk."""
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced_events = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Wait for the queued events to be written, then sync and close.
+
+        Raises:
+            Exception: The error that stopped the writer thread, if any.
+
+        """
+        if self._file is None:
+            return
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        self.sync()
+        self._file.close()
+        self._file = None
+        if (error := self._writer_error) is not None:
+            self._writer_error = None
+            raise error
+
+    def _write_queued_events(self) -> None:
+        """Interpolate, serialize and write the queued events until stopped."""
+        while (item := self._queue.get()) is not None:
+            event, interpolation_count = item
+            try:
+                if interpolation_count and isinstance(event, MacroMouseMoveEvent):
+                    event.interpolate_positions(interpolation_count)
+                self._write_line(Macro.serialize_event(event))
+            except Exception as e:
+                LOGGER.exception("Writing to spool %s failed", self.path)
+                self._writer_error = e
+                return
+            self._unsynced_events += 1
+            if (
+                self._unsynced_events >= SPOOL_FSYNC_INTERVAL
+                or (time.monotonic() - self._last_sync) * 1000
+                >= SPOOL_FSYNC_INTERVAL_MS
+            ):
+                self.sync()
+
+    def _write_line(self, data: dict) -> None:
+        if self._file is None:
+            raise ValueError("Spool is not open.")  # noqa: TRY003
+        self._file.write(json.dumps(data) + "\n")
+
+    @staticmethod
+    def load(path: Path) -> Macro:
+        """Load the macro stored in the spool file at *path*.
+
+        A truncated last line, left behind if the session crashed while
+        writing, is ignored.
+        """
+        with path.open(encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        data = json.loads(lines[0])
+        data["events"] = []
+        for i, line in enumerate(lines[1:], start=1):
+            try:
+                data["events"].append(json.loads(line))
+            except json.JSONDecodeError:
+                if i != len(lines) - 1:
+                    raise
+                LOGGER.warning("Ignoring truncated last event in spool %s", path)
+        return Macro.deserialize(data)
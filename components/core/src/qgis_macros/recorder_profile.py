@@ -0,0 +1,156 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+
+"""Self-profiling of the capture overhead of the macro recorder.
+
+When the recorder profiling setting is enabled, the recorder measures the
+wall time it spends in its event filter by event type and in each of its
+recording methods. The measurements are stored in the metadata of the
+recorded macro and added to the QGIS runtime profiler.
+
+Example::
+
+    from qgis_macros.settings import Settings
+
+    Settings.profile_recorder.set(True)
+    recorder.start_recording()
+    ...
+    recorder.stop_recording()
+    print(recorder.profile.report())
+"""
+
+import math
+from array import array
+from collections import Counter
+from dataclasses import asdict, dataclass
+
+from qgis.core import QgsApplication
+
+from qgis_macros.constants import NS_PER_MS, NS_PER_US
+
+
+@dataclass(frozen=True)
+class OverheadStatistics:
+    """Summary of the measured wall times of one event type or method."""
+
+    count: int
+    mean_us: float
+    p95_us: float
+    max_us: float
+
+
+class RecorderProfile:
+    """Wall time measurements of the recorder by label.
+
+    The labels are the names of the event types for the time spent in the
+    event filter and the names of the recording methods for the time spent
+    in them. The measurements are kept as nanoseconds in compact arrays.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty profile."""
+        self._durations: dict[str, array[int]] = {}
+        # Total time spent creating widget paths on widget path cache misses
+        self.widget_path_create_ns = 0
+
+    def add(self, label: str, duration_ns: int) -> None:
+        """Add a measured wall time of *label*."""
+        durations = self._durations.get(label)
+        if durations is None:
+            durations = self._durations[label] = array("q")
+        durations.append(duration_ns)
+
+    @property
+    def labels(self) -> list[str]:
+        """Labels with measurements in the order they were first measured."""
+        return list(self._durations)
+
+    def statistics(self, label: str) -> OverheadStatistics:
+        """Return the mean, 95th percentile and maximum wall time of *label*."""
+        durations = sorted(self._durations.get(label, ()))
+        if not durations:
+            return OverheadStatistics(0, 0.0, 0.0, 0.0)
+        # Nearest-rank percentile
+        p95 = durations[math.ceil(0.95 * len(durations)) - 1]
+        return OverheadStatistics(
+            len(durations),
+            sum(durations) / len(durations) / NS_PER_US,
+            p95 / NS_PER_US,
+            durations[-1] / NS_PER_US,
+        )
+
+    def histogram(self, label: str) -> dict[int, int]:
+        """Return the wall times of *label* counted in power of two buckets.
+
+        The keys are the exclusive upper bounds of the buckets in
+        microseconds, so the key 8 counts the wall times from 4 µs up to
+        but not including 8 µs.
+        """
+        counts = Counter(
+            1 << (duration_ns // NS_PER_US).bit_length()
+            for duration_ns in self._durations.get(label, ())
+        )
+        return dict(sorted(counts.items()))
+
+    def total_ms(self, label: str) -> float:
+        """Return the total wall time of *label* in milliseconds."""
+        return sum(self._durations.get(label, ())) / NS_PER_MS
+
+    def report(self) -> str:
+        """Return a human-readable summary of the profile."""
+        lines = []
+        for label in self._durations:
+            stats = self.statistics(label)
+            lines.append(
+                f"{label}: {stats.count} calls, mean {stats.mean_us:.1f} µs, "
+                f"p95 {stats.p95_us:.1f} µs, max {stats.max_us:.1f} µs"
+            )
+        lines.append(
+            f"WidgetPath.create: {self.widget_path_create_ns / NS_PER_MS:.1f} ms total"
+        )
+        return "\n".join(lines)
+
+    def to_metadata(self) -> dict:
+        """Return the profile as JSON-compatible macro metadata."""
+        return {
+            "labels": {
+                label: {
+                    **asdict(self.statistics(label)),
+                    "histogram_us": {
+                        str(upper_bound): count
+                        for upper_bound, count in self.histogram(label).items()
+                    },
+                }
+                for label in self._durations
+            },
+            "widget_path_create_ms": self.widget_path_create_ns / NS_PER_MS,
+        }
+
+    def add_to_profiler(self, group: str) -> None:
+        """Add the total wall time of each label to the QGIS runtime profiler.
+
+        Args:
+            group: Profiler group to add the totals to.
+
+        """
+        profiler = QgsApplication.profiler()
+        for label in self._durations:
+            profiler.record(label, self.total_ms(label) / 1000, group)
+        profiler.record(
+            "WidgetPath.create", self.widget_path_create_ns / NS_PER_MS / 1000, group
+        )
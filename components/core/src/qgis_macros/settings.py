@@ -64,6 +64,8 @@ class SettingCategory(enum.Enum):
     """Grouping categories shown in the settings dialog."""
 
     MACRO = tr("Macro")
+    RECORDING = tr("Recording")
+    PLAYBACK = tr("Playback")
 
 
 @dataclass
@@ -122,6 +124,16 @@ class Settings(enum.Enum):
         description=tr("Group name for macro profiles"),
         default="Macro",
     )
+    profile_recorder = Setting(
+        description=tr("Profile the capture overhead of the macro recorder"),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    profile_recorder_group = Setting(
+        description=tr("Group name for macro recorder profiles"),
+        default="Macro recorder",
+        category=SettingCategory.RECORDING,
+    )
     macro_save_path = Setting(
         description=tr("Default save path for macros."),
         default=profile_path("macros"),
@@ -135,6 +147,163 @@ class Settings(enum.Enum):
         default=4,
         widget_config=WidgetConfig(minimum=2, maximum=10000),
     )
+    move_event_simplification_tolerance = Setting(
+        description=tr(
+            "Simplify mouse move paths while recording so that no dropped "
+            "point is farther than this many pixels from the path. "
+            "If 0, the interpolation point count is used instead."
+        ),
+        default=0,
+        category=SettingCategory.RECORDING,
+    )
+    move_event_sample_rate = Setting(
+        description=tr(
+            "Maximum rate (Hz) at which mouse move positions are recorded. "
+            "The last position of a movement is always kept. "
+            "If 0, all positions are recorded."
+        ),
+        default=0,
+        widget_config=WidgetConfig(minimum=0, maximum=1000),
+        category=SettingCategory.RECORDING,
+    )
+    recorder_frame_budget_us = Setting(
+        description=tr(
+            "Maximum time (µs) the recorder may spend on input events per frame. "
+            "When exceeded, cheaper recording modes are used until the load "
+            "drops. If 0, the recording is never degraded."
+        ),
+        default=0,
+        widget_config=WidgetConfig(minimum=0, maximum=100000, step=100),
+        category=SettingCategory.RECORDING,
+    )
+    defer_widget_path_capture = Setting(
+        description=tr(
+            "Resolve widget paths of recorded events when idle "
+            "instead of while handling the event."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    record_text_entry_events = Setting(
+        description=tr(
+            "Record text typed into text inputs as a single text entry "
+            "instead of separate key events."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    record_action_events = Setting(
+        description=tr(
+            "Record clicks on menu items and toolbar buttons as actions that "
+            "are triggered directly during playback."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    record_item_selection_events = Setting(
+        description=tr(
+            "Record clicks on items of combo boxes and item views as item "
+            "selections that are set directly during playback."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    record_canvas_extents = Setting(
+        description=tr(
+            "Record map canvas navigation as extent changes instead of "
+            "mouse drags and wheel events."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    record_layer_tree_operations = Setting(
+        description=tr(
+            "Record layer visibility changes and moves in the layers panel as "
+            "layer tree operations instead of clicks and drags."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    record_layer_edits = Setting(
+        description=tr(
+            "Record feature additions and attribute and geometry changes of "
+            "vector layers as edit records for bulk replay."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    record_processing_runs = Setting(
+        description=tr(
+            "Record the processing algorithms run from the processing dialogs "
+            "with their parameters for direct replay."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    record_map_coordinates = Setting(
+        description=tr(
+            "Record the map coordinates of mouse events on the map canvas and "
+            "replay them at the same map location regardless of the canvas "
+            "size and extent."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    spool_recordings = Setting(
+        description=tr(
+            "Write recorded events to a spool file in the save path while recording."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    keep_spool_files = Setting(
+        description=tr(
+            "Keep the spool files of the recordings after the macros are built "
+            "from them."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    scoped_recording = Setting(
+        description=tr(
+            "Record only the events of the main window and the windows "
+            "opened during the recording."
+        ),
+        default=False,
+        category=SettingCategory.RECORDING,
+    )
+    single_wheel_events = Setting(
+        description=tr(
+            "Replay merged mouse wheel events as a single event with the summed "
+            "delta instead of a burst of the original notches. Only scroll areas "
+            "scroll the same way, combo boxes and the map canvas do not."
+        ),
+        default=False,
+        category=SettingCategory.PLAYBACK,
+    )
+    insert_text_entries = Setting(
+        description=tr(
+            "Insert recorded text entries directly instead of typing them key by key."
+        ),
+        default=False,
+        category=SettingCategory.PLAYBACK,
+    )
+    paced_playback = Setting(
+        description=tr(
+            "Play events back at their recorded times instead of waiting for the "
+            "recorded gap after each event."
+        ),
+        default=False,
+        category=SettingCategory.PLAYBACK,
+    )
+    index_widget_rects = Setting(
+        description=tr(
+            "Find widgets by position from a spatial index of the visible widgets "
+            "when their widget paths do not resolve."
+        ),
+        default=False,
+        category=SettingCategory.PLAYBACK,
+    )
 
     @staticmethod
     def reset() -> None:
@@ -18,19 +18,40 @@
 
 """Utility functions for widget lookup, event position handling, and Qt compat."""
 
-from collections.abc import Iterator
+import heapq
+from collections.abc import Iterator, Sequence
 from typing import (
     TYPE_CHECKING,
     cast,
 )
 
-from qgis.PyQt.QtCore import QObject, QPoint
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsLayerTreeGroup,
+    QgsLayerTreeLayer,
+    QgsLayerTreeNode,
+    QgsPointXY,
+    QgsProject,
+)
+from qgis.PyQt.QtCore import QAbstractItemModel, QModelIndex, QObject, QPoint, Qt
 from qgis.PyQt.QtGui import QMouseEvent, QWheelEvent
-from qgis.PyQt.QtWidgets import QAbstractButton, QWidget
+from qgis.PyQt.QtWidgets import (
+    QAbstractButton,
+    QAbstractItemView,
+    QAction,
+    QApplication,
+    QMenu,
+    QStyle,
+    QStyleOptionViewItem,
+    QToolBar,
+    QToolButton,
+    QWidget,
+)
 from qgis.utils import iface as iface_
 
 if TYPE_CHECKING:
-    from qgis.gui import QgisInterface
+    from qgis.gui import QgisInterface, QgsMapCanvas
 
 iface = cast("QgisInterface", iface_)
 
@@ -40,6 +61,30 @@ def is_object_map_canvas(obj: QObject) -> bool:
     return obj == iface.mapCanvas().viewport()
 
 
+def transform_to_canvas_crs(
+    point: QgsPointXY, crs_definition: str, canvas: "QgsMapCanvas"
+) -> QgsPointXY:
+    """Transform *point* from the CRS *crs_definition* to the canvas CRS.
+
+    The point is returned as is if the CRS is empty, invalid or the same.
+    """
+    crs = QgsCoordinateReferenceSystem()
+    destination_crs = canvas.mapSettings().destinationCrs()
+    if (
+        not crs_definition
+        or not crs.createFromUserInput(crs_definition)
+        or crs == destination_crs
+    ):
+        return point
+    transform = QgsCoordinateTransform(crs, destination_crs, QgsProject.instance())
+    return transform.transform(point)
+
+
+def crs_definition(crs: QgsCoordinateReferenceSystem) -> str:
+    """Return the authority id of *crs*, or its WKT if it has none."""
+    return crs.authid() or crs.toWkt()
+
+
 def get_widget_text(widget: QWidget) -> str:
     """Return the display text of *widget*, falling back to its object name."""
     text = ""
@@ -62,39 +107,208 @@ def get_sibling_index(widget: QWidget, parent: QWidget) -> int:
     return 0
 
 
+def get_triggerable_action(widget: QWidget, event: QMouseEvent) -> "QAction | None":
+    """Return the action that a click on a menu or toolbar button triggers.
+
+    Actions that open a submenu, separators and disabled actions are not
+    returned.
+    """
+    if isinstance(widget, QMenu):
+        action = widget.actionAt(event_pos(event))
+    elif isinstance(widget, QToolButton) and isinstance(
+        widget.parentWidget(), QToolBar
+    ):
+        action = widget.defaultAction()
+    else:
+        return None
+    if (
+        action is None
+        or action.isSeparator()
+        or action.menu() is not None
+        or not action.isEnabled()
+    ):
+        return None
+    return action
+
+
+def get_action_text_path(action: QAction, menu: QMenu | None) -> list[str]:
+    """Return the titles of the menus leading to *action* and its text."""
+    path = [action.text()]
+    widget: QWidget | None = menu
+    while isinstance(widget, QMenu):
+        path.insert(0, widget.title())
+        widget = widget.parentWidget()
+    return path
+
+
+def find_action(object_name: str, text_path: Sequence[str]) -> "QAction | None":
+    """Find an action of the application by object name or menu text path."""
+    windows = QApplication.topLevelWidgets()
+    if object_name:
+        for window in windows:
+            if actions := window.findChildren(QAction, object_name):
+                return actions[0]
+    if not text_path:
+        return None
+    if len(text_path) == 1:
+        return next(
+            (
+                action
+                for window in windows
+                for action in window.findChildren(QAction)
+                if action.text() == text_path[0]
+            ),
+            None,
+        )
+    return next(
+        (
+            action
+            for menu in _find_menus(windows, text_path[-2])
+            for action in menu.actions()
+            if get_action_text_path(action, menu) == list(text_path)
+        ),
+        None,
+    )
+
+
+def _find_menus(windows: list[QWidget], title: str) -> Iterator[QMenu]:
+    for window in windows:
+        if isinstance(window, QMenu) and window.title() == title:
+            yield window
+        yield from (
+            menu for menu in window.findChildren(QMenu) if menu.title() == title
+        )
+
+
+def get_index_path(index: QModelIndex) -> list[int]:
+    """Return the rows leading from the root of the model to *index*."""
+    path = []
+    while index.isValid():
+        path.insert(0, index.row())
+        index = index.parent()
+    return path
+
+
+def get_index_from_path(
+    model: QAbstractItemModel, path: Sequence[int], column: int = 0
+) -> QModelIndex:
+    """Return the index of *model* at *path*, invalid if there is none."""
+    index = QModelIndex()
+    for i, row in enumerate(path):
+        index = model.index(row, column if i == len(path) - 1 else 0, index)
+        if not index.isValid():
+            break
+    return index
+
+
+def is_on_check_indicator(
+    view: QAbstractItemView, index: QModelIndex, point: QPoint
+) -> bool:
+    """Check if *point* of the viewport is on the check box of *index*."""
+    if not index.flags() & Qt.ItemFlag.ItemIsUserCheckable:
+        return False
+    option = QStyleOptionViewItem()
+    option.initFrom(view)
+    option.rect = view.visualRect(index)
+    option.features |= QStyleOptionViewItem.ViewItemFeature.HasCheckIndicator
+    check_rect = view.style().subElementRect(
+        QStyle.SubElement.SE_ItemViewItemCheckIndicator, option, view
+    )
+    return check_rect.contains(point)
+
+
+def get_layer_tree_node_key(node: QgsLayerTreeNode) -> tuple[str, str]:
+    """Return the layer id and the name identifying a layer tree node.
+
+    The layer id is empty for groups.
+    """
+    if isinstance(node, QgsLayerTreeLayer):
+        return node.layerId(), node.name()
+    return "", node.name()
+
+
+def get_layer_tree_group_path(group: QgsLayerTreeNode) -> list[str]:
+    """Return the names of the groups from the root to *group*, inclusive."""
+    path = []
+    while (parent := group.parent()) is not None:
+        path.append(group.name())
+        group = parent
+    path.reverse()
+    return path
+
+
+def find_layer_tree_group(
+    root: QgsLayerTreeGroup, path: Sequence[str]
+) -> QgsLayerTreeGroup | None:
+    """Find the group at the end of the group names *path* under *root*."""
+    group: QgsLayerTreeGroup | None = root
+    for name in path:
+        group = next(
+            (
+                child
+                for child in group.children()
+                if isinstance(child, QgsLayerTreeGroup) and child.name() == name
+            ),
+            None,
+        )
+        if group is None:
+            return None
+    return group
+
+
+def find_layer_tree_node(
+    root: QgsLayerTreeGroup, layer_id: str, name: str
+) -> QgsLayerTreeNode | None:
+    """Find a layer tree node by its layer id, falling back to its name.
+
+    Groups, which have no layer id, are always searched by name.
+    """
+    if layer_id and (node := root.findLayer(layer_id)) is not None:
+        return node
+    node_type = QgsLayerTreeLayer if layer_id else QgsLayerTreeGroup
+    return next(
+        (
+            node
+            for node in _iter_layer_tree_nodes(root)
+            if isinstance(node, node_type) and node.name() == name
+        ),
+        None,
+    )
+
+
+def _iter_layer_tree_nodes(group: QgsLayerTreeGroup) -> Iterator[QgsLayerTreeNode]:
+    for child in group.children():
+        yield child
+        if isinstance(child, QgsLayerTreeGroup):
+            yield from _iter_layer_tree_nodes(child)
+
+
 def find_nearest_visible_children_of_type(
-    target_point: QPoint, parent_widget: QWidget, widget_class: str
-) -> Iterator[QWidget]:
-    """Yield visible children of *widget_class* sorted by distance to *target_point*."""
-    widgets = find_nearest_visible_children_with_threshold(target_point, parent_widget)
-    return (widget for widget in widgets if widget.__class__.__name__ == widget_class)
-
-
-def find_nearest_visible_children_with_threshold(
-    target_point: QPoint, parent_widget: QWidget
-) -> Iterator[QWidget]:
-    """Yield all visible descendants of *parent_widget* sorted by distance."""
-    nearest_visible_children = set()
-
-    def distance_to_widget(widget: QWidget) -> int:
-        widget_center = widget.geometry().center()
-
-        # Calculate the Euclidean distance (squared)
-        return (target_point.x() - widget_center.x()) ** 2 + (
-            target_point.y() - widget_center.y()
-        ) ** 2
-
-    def find_recursive(widget: QWidget) -> None:
-        for child in widget.findChildren(QWidget):
-            if child.isVisible():
-                nearest_visible_children.add((child, (distance_to_widget(child))))
-                find_recursive(child)
-
-    # Start the recursive search from the parent widget
-    find_recursive(parent_widget)
-
-    # Sort the results by distance
-    return (child[0] for child in sorted(nearest_visible_children, key=lambda x: x[1]))
+    target_point: QPoint, parent_widget: QWidget, widget_class: str, count: int
+) -> list[QWidget]:
+    """Return the *count* visible descendants of *widget_class* nearest to the point.
+
+    The descendants are traversed once, filtering by class before computing
+    any distances, and only the nearest matches are kept in a bounded heap.
+    The result is sorted by distance to *target_point*.
+    """
+    # Max-heap of the nearest matches by negated distance. Ties are broken
+    # by the traversal order, so widgets themselves are never compared.
+    heap: list[tuple[int, int, QWidget]] = []
+    for index, child in enumerate(parent_widget.findChildren(QWidget)):
+        if child.__class__.__name__ != widget_class or not child.isVisible():
+            continue
+        item = (-_squared_distance_to_widget(target_point, child), -index, child)
+        if len(heap) < count:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    return [child for _, _, child in sorted(heap, reverse=True)]
+
+
+def _squared_distance_to_widget(point: QPoint, widget: QWidget) -> int:
+    widget_center = widget.geometry().center()
+    return (point.x() - widget_center.x()) ** 2 + (point.y() - widget_center.y()) ** 2
 
 
 def enum_value(enum_or_flag: object) -> int:
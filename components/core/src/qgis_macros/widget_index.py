@@ -0,0 +1,258 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+
+"""Spatial index of the visible widgets of top-level windows.
+
+The position-based fallback of the widget lookup asks for the widget at a
+screen position and for the nearest widgets of a class. Answering these
+from the widgets directly maps every widget to global coordinates on every
+query. The index maps them once per window into a uniform grid and is
+rebuilt lazily after the widgets of the window move, resize, appear or
+disappear.
+
+Example::
+
+    from qgis_macros.widget_index import get_widget_rect_index
+
+    index = get_widget_rect_index()
+    index.start()
+    widget = index.widget_at(global_point)
+    index.stop()
+"""
+
+from collections.abc import Iterator
+
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QEvent, QObject, QPoint, QRect, Qt
+from qgis.PyQt.QtWidgets import QApplication, QWidget
+
+from qgis_macros.constants import WIDGET_INDEX_CELL_SIZE
+
+INVALIDATING_EVENT_TYPES = frozenset(
+    {
+        QEvent.Type.Move,
+        QEvent.Type.Resize,
+        QEvent.Type.Show,
+        QEvent.Type.Hide,
+        QEvent.Type.LayoutRequest,
+    }
+)
+
+_widget_rect_index: "WidgetRectIndex | None" = None
+
+
+def get_widget_rect_index() -> "WidgetRectIndex":
+    """Return the shared widget rectangle index."""
+    global _widget_rect_index  # noqa: PLW0603
+    if _widget_rect_index is None:
+        _widget_rect_index = WidgetRectIndex()
+    return _widget_rect_index
+
+
+class _WindowGrid:
+    """Uniform grid of the visible global rectangles of the widgets of a window.
+
+    The rectangle of a widget is clipped by the rectangles of its ancestors,
+    so the parts scrolled out of a viewport or hidden by a smaller parent
+    are left out. Each widget is stored in every cell its rectangle overlaps
+    for point queries and in the cell of its center for nearest widget
+    queries. Like ``QApplication.widgetAt``, point queries skip the widgets
+    transparent for mouse events together with their children.
+    """
+
+    def __init__(self, window: QWidget) -> None:
+        self.window = window
+        # Widgets in traversal order, so a child comes after its parent
+        self._widgets: list[QWidget] = []
+        self._rects: list[QRect] = []
+        self._rect_cells: dict[tuple[int, int], list[int]] = {}
+        self._center_cells: dict[tuple[int, int], list[int]] = {}
+        window_rect = QRect(window.mapToGlobal(QPoint(0, 0)), window.size())
+        self._add_widget(window, window_rect, mouse_transparent=False)
+        self._max_ring = (
+            max(window_rect.width(), window_rect.height()) // WIDGET_INDEX_CELL_SIZE + 1
+        )
+
+    def _add_widget(
+        self, widget: QWidget, clip_rect: QRect, *, mouse_transparent: bool
+    ) -> None:
+        """Add *widget* clipped by *clip_rect* and its visible children."""
+        rect = QRect(widget.mapToGlobal(QPoint(0, 0)), widget.size()) & clip_rect
+        if rect.isEmpty():
+            return
+        mouse_transparent = mouse_transparent or widget.testAttribute(
+            Qt.WidgetAttribute.WA_TransparentForMouseEvents
+        )
+        index = len(self._widgets)
+        self._widgets.append(widget)
+        self._rects.append(rect)
+        if not mouse_transparent:
+            left, top = _cell_of(rect.left(), rect.top())
+            right, bottom = _cell_of(rect.right(), rect.bottom())
+            for cell_x in range(left, right + 1):
+                for cell_y in range(top, bottom + 1):
+                    self._rect_cells.setdefault((cell_x, cell_y), []).append(index)
+        center = rect.center()
+        self._center_cells.setdefault(_cell_of(center.x(), center.y()), []).append(
+            index
+        )
+        # Children are in stacking order, so a raised child comes last
+        for child in widget.children():
+            if (
+                isinstance(child, QWidget)
+                and child.isVisible()
+                and not child.isWindow()
+            ):
+                self._add_widget(child, rect, mouse_transparent=mouse_transparent)
+
+    def widget_at(self, point: QPoint) -> QWidget | None:
+        """Return the innermost widget containing *point*."""
+        for index in reversed(self._rect_cells.get(_cell_of(point.x(), point.y()), [])):
+            if self._rects[index].contains(point):
+                return self._widgets[index]
+        return None
+
+    def nearest_of_type(
+        self, point: QPoint, widget_class: str, count: int
+    ) -> list[QWidget]:
+        """Return the *count* widgets of *widget_class* nearest to *point*.
+
+        The cells are searched in rings around the cell of *point* until
+        no unsearched cell can contain a nearer widget.
+        """
+        center_x, center_y = _cell_of(point.x(), point.y())
+        matches: list[tuple[int, int]] = []
+        for ring in range(self._max_ring + 1):
+            for cell in _ring_cells(center_x, center_y, ring):
+                for index in self._center_cells.get(cell, []):
+                    if self._widgets[index].__class__.__name__ != widget_class:
+                        continue
+                    center = self._rects[index].center()
+                    distance = (point.x() - center.x()) ** 2 + (
+                        point.y() - center.y()
+                    ) ** 2
+                    matches.append((distance, index))
+            matches.sort()
+            del matches[count:]
+            # Widgets in the next rings are at least this far from the point
+            if (
+                len(matches) == count
+                and matches[-1][0] <= (ring * WIDGET_INDEX_CELL_SIZE) ** 2
+            ):
+                break
+        return [self._widgets[index] for _, index in matches]
+
+
+class WidgetRectIndex(QObject):
+    """Lazily built spatial index of the visible widgets per top-level window.
+
+    While started, an application-wide event filter drops the grid of a
+    window when any of its widgets is moved, resized, shown, hidden or
+    relaid out. The index is meant to be active only during playback.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an inactive index."""
+        super().__init__(None)
+        # Grids by the address of their window
+        self._grids: dict[int, _WindowGrid] = {}
+        self._active = False
+        self.builds = 0
+
+    def is_active(self) -> bool:
+        """Check if the index is started."""
+        return self._active
+
+    def start(self) -> None:
+        """Start following the widget changes and answering queries."""
+        if self._active:
+            return
+        self._active = True
+        QApplication.instance().installEventFilter(self)
+
+    def stop(self) -> None:
+        """Stop following the widget changes and drop all grids."""
+        if not self._active:
+            return
+        self._active = False
+        QApplication.instance().removeEventFilter(self)
+        self._grids.clear()
+
+    def eventFilter(self, obj: QObject, event: QEvent) -> bool:  # noqa: N802
+        """Drop the grid of the window of a changed widget."""
+        if (
+            self._grids
+            and event.type() in INVALIDATING_EVENT_TYPES
+            and isinstance(obj, QWidget)
+        ):
+            self._grids.pop(sip.unwrapinstance(obj.window()), None)
+        return False
+
+    def widget_at(self, global_point: QPoint) -> QWidget | None:
+        """Return the visible widget at *global_point*, like ``widgetAt``."""
+        window = QApplication.topLevelAt(global_point)
+        if window is None:
+            return None
+        return self._grid_of(window).widget_at(global_point)
+
+    def nearest_of_type(
+        self, global_point: QPoint, window: QWidget, widget_class: str, count: int
+    ) -> list[QWidget]:
+        """Return the visible widgets of *widget_class* nearest to the point.
+
+        Args:
+            global_point: Screen position to measure the distances from.
+            window: Top-level window to search.
+            widget_class: Class name of the widgets.
+            count: Maximum number of widgets to return.
+
+        Returns:
+            The widgets sorted by the distance of their centers.
+
+        """
+        return self._grid_of(window.window()).nearest_of_type(
+            global_point, widget_class, count
+        )
+
+    def _grid_of(self, window: QWidget) -> _WindowGrid:
+        address = sip.unwrapinstance(window)
+        grid = self._grids.get(address)
+        # A deleted window may have left its grid behind at a reused address
+        if grid is None or sip.isdeleted(grid.window) or not self._active:
+            grid = _WindowGrid(window)
+            self.builds += 1
+            if self._active:
+                self._grids[address] = grid
+        return grid
+
+
+def _cell_of(x: int, y: int) -> tuple[int, int]:
+    return x // WIDGET_INDEX_CELL_SIZE, y // WIDGET_INDEX_CELL_SIZE
+
+
+def _ring_cells(center_x: int, center_y: int, ring: int) -> Iterator[tuple[int, int]]:
+    """Yield the cells at Chebyshev distance *ring* from the center cell."""
+    if ring == 0:
+        yield center_x, center_y
+        return
+    for x in range(center_x - ring, center_x + ring + 1):
+        yield x, center_y - ring
+        yield x, center_y + ring
+    for y in range(center_y - ring + 1, center_y + ring):
+        yield center_x - ring, y
+        yield center_x + ring, y
@@ -110,6 +110,15 @@ def empty_layer(qgis_iface: "QgisInterface") -> QgsVectorLayer:
     return layer
 
 
+@pytest.fixture
+def point_layers(qgis_new_project: None) -> list[QgsVectorLayer]:
+    layers = [
+        QgsVectorLayer("Point?crs=EPSG:3067", f"layer {i}", "memory") for i in range(3)
+    ]
+    QgsProject.instance().addMapLayers(layers)
+    return layers
+
+
 @pytest.fixture
 def digitize_feature_map_tool(qgis_canvas: QgsMapCanvas, empty_layer: QgsVectorLayer):
     cad_dock = QgsAdvancedDigitizingDockWidget(qgis_canvas)
@@ -0,0 +1,314 @@
+#  Copyright (c) 2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+
+# Benchmarks logging the overhead of the core library. They are deselected
+# by default, run them with -m benchmark on two revisions to compare the
+# results before and after a change.
+
+import logging
+import time
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, cast
+
+import pytest
+from macro_test_utils.utils import WidgetInfo, finish_recording
+from qgis.PyQt.QtCore import QEvent, QObject, QPoint, QPointF, Qt, QTimerEvent
+from qgis.PyQt.QtGui import QHoverEvent, QMouseEvent
+from qgis.PyQt.QtWidgets import QApplication, QLabel, QPushButton, QWidget
+from qgis_macros.macro import Macro, MacroWheelEvent, WidgetSpec
+from qgis_macros.macro_player import MacroPlayer
+from qgis_macros.macro_recorder import MacroRecorder
+from qgis_macros.settings import Settings
+
+if TYPE_CHECKING:
+    from pytestqt.qtbot import QtBot
+    from qgis.gui import QgsMapCanvas
+
+LOGGER = logging.getLogger(__name__)
+
+pytestmark = pytest.mark.benchmark
+
+ITERATIONS = 20_000
+SYNTHETIC_TREE_SIZE = 5_000
+
+
+@pytest.fixture
+def target_widget() -> Iterator[QWidget]:
+    widget = QWidget()
+    yield widget
+    widget.deleteLater()
+
+
+def _mouse_move_event() -> QEvent:
+    return QMouseEvent(
+        QEvent.Type.MouseMove,
+        QPointF(10, 10),
+        QPointF(10, 10),
+        Qt.MouseButton.NoButton,
+        Qt.MouseButton.NoButton,
+        Qt.KeyboardModifier.NoModifier,
+    )
+
+
+def _ns_per_event(widget: QWidget, create_event: Callable[[], QEvent]) -> float:
+    events = [create_event() for _ in range(ITERATIONS)]
+    start = time.perf_counter_ns()
+    for event in events:
+        QApplication.sendEvent(widget, event)
+    return (time.perf_counter_ns() - start) / ITERATIONS
+
+
+class _BaselineEventFilterRecorder(MacroRecorder):
+    """Recorder with a copy of the event filter before the fast path.
+
+    Kept here as the reference for the benchmark. Every event of a widget
+    reads the timer and goes through the if/elif chain of list membership
+    checks, the handlers are the current ones.
+    """
+
+    def eventFilter(self, obj: QObject, event: QEvent) -> bool:  # noqa: N802
+        if not self._recording or not isinstance(obj, QWidget):
+            return super().eventFilter(obj, event)
+
+        widget = cast("QWidget", obj)
+        self._event_time_ns = self._timer.nsecsElapsed()
+
+        if (
+            isinstance(event, QMouseEvent)
+            and widget in self._widgets_to_filter_events_out
+        ):
+            return super().eventFilter(obj, event)
+
+        if event.type() in [QEvent.Type.KeyPress, QEvent.Type.KeyRelease]:
+            self._record_key_event(event, widget)
+        elif event.type() in [
+            QEvent.Type.MouseButtonPress,
+            QEvent.Type.MouseButtonRelease,
+        ]:
+            self._record_mouse_button_event(event, widget)
+        elif event.type() == QEvent.Type.MouseButtonDblClick:
+            self._record_mouse_button_double_click_event(event, widget)
+        elif event.type() == QEvent.Type.MouseMove:
+            self._record_mouse_move_event(event, widget)
+        elif event.type() == QEvent.Type.Wheel:
+            self._record_mouse_wheel_event(event, widget)
+
+        return super().eventFilter(obj, event)
+
+
+def _recording_ns_per_event(
+    recorder: MacroRecorder, widget: QWidget, create_event: Callable[[], QEvent]
+) -> tuple[float, Macro]:
+    recorder.start_recording()
+    try:
+        recording = _ns_per_event(widget, create_event)
+    finally:
+        macro = finish_recording(recorder)
+    return recording, macro
+
+
+@pytest.mark.parametrize(
+    ("event_name", "create_event"),
+    [
+        ("Timer", lambda: QTimerEvent(1)),
+        ("LayoutRequest", lambda: QEvent(QEvent.Type.LayoutRequest)),
+        (
+            "HoverMove",
+            lambda: QHoverEvent(QEvent.Type.HoverMove, QPointF(1, 1), QPointF(0, 0)),
+        ),
+        ("MouseMove", _mouse_move_event),
+    ],
+)
+def test_benchmark_recorder_event_filter_overhead(
+    target_widget: QWidget, event_name: str, create_event: Callable[[], QEvent]
+):
+    without_recorder = _ns_per_event(target_widget, create_event)
+    baseline, baseline_macro = _recording_ns_per_event(
+        _BaselineEventFilterRecorder(), target_widget, create_event
+    )
+    recording, macro = _recording_ns_per_event(
+        MacroRecorder(), target_widget, create_event
+    )
+
+    LOGGER.info(
+        "%s: %.0f ns/event without recorder, overhead %.0f ns/event with the "
+        "baseline filter, %.0f ns/event with the fast path filter",
+        event_name,
+        without_recorder,
+        baseline - without_recorder,
+        recording - without_recorder,
+    )
+    # The moves are merged into one event and the other events are not recorded
+    expected_event_count = 1 if event_name == "MouseMove" else 0
+    assert len(baseline_macro.events) == expected_event_count
+    assert len(macro.events) == expected_event_count
+
+
+def test_benchmark_scoped_recording_overhead_outside_scope(target_widget: QWidget):
+    recorded_window = QWidget()
+    overheads = {}
+    for scoped in (False, True):
+        baseline = _ns_per_event(target_widget, _mouse_move_event)
+        recorder = MacroRecorder()
+        recorder.start_recording(windows=[recorded_window] if scoped else None)
+        try:
+            recording = _ns_per_event(target_widget, _mouse_move_event)
+        finally:
+            finish_recording(recorder)
+        overheads[scoped] = recording - baseline
+    recorded_window.deleteLater()
+
+    LOGGER.info(
+        "MouseMove outside the recorded windows: overhead %.0f ns/event with "
+        "the application filter, %.0f ns/event in scoped recording",
+        overheads[False],
+        overheads[True],
+    )
+    # Events of the widgets of the recorded windows still reach Python, only
+    # the events of other windows skip the recorder in scoped recording
+    assert overheads[True] < overheads[False]
+
+
+@pytest.mark.usefixtures("empty_layer")
+@pytest.mark.parametrize("single", [False, True], ids=["burst", "single_event"])
+def test_benchmark_merged_wheel_event_render_cost(
+    qgis_canvas: "QgsMapCanvas", qtbot: "QtBot", single: bool
+):
+    Settings.single_wheel_events.set(single)
+    viewport = WidgetInfo.from_widget("viewport", qgis_canvas.viewport())
+    notch_count = 20
+    macro = Macro(
+        [
+            MacroWheelEvent(
+                viewport.widget_spec,
+                position=viewport.position,
+                delta=120 * notch_count,
+                timings=[10] * (notch_count - 1),
+            )
+        ]
+    )
+    render_count = 0
+
+    def on_render_starting() -> None:
+        nonlocal render_count
+        render_count += 1
+
+    initial_scale = qgis_canvas.scale()
+    qgis_canvas.renderStarting.connect(on_render_starting)
+    player = MacroPlayer()
+    start = time.perf_counter_ns()
+    with qtbot.waitSignal(player.playback_ended):
+        player.play(macro)
+    qgis_canvas.waitWhileRendering()
+    elapsed_ms = (time.perf_counter_ns() - start) / 1_000_000
+    qgis_canvas.renderStarting.disconnect(on_render_starting)
+
+    LOGGER.info(
+        "%d wheel notches as %s: %d renders, %.1f ms",
+        notch_count,
+        "single event" if single else "burst",
+        render_count,
+        elapsed_ms,
+    )
+    assert render_count >= 1
+    assert qgis_canvas.scale() < initial_scale
+
+
+@pytest.fixture
+def synthetic_widget_tree() -> Iterator[QWidget]:
+    """Window of nested containers with SYNTHETIC_TREE_SIZE leaf widgets."""
+    window = QWidget()
+    containers_per_level = 10
+    widgets_per_container = SYNTHETIC_TREE_SIZE // containers_per_level**2
+    for i in range(containers_per_level):
+        container = QWidget(window)
+        container.setGeometry(0, i * 100, 1000, 100)
+        for j in range(containers_per_level):
+            inner = QWidget(container)
+            inner.setGeometry(j * 100, 0, 100, 100)
+            for k in range(widgets_per_container):
+                widget_class = QPushButton if k % 2 else QLabel
+                widget_class(f"{i}-{j}-{k}", inner).setGeometry(k, k, 10, 10)
+    window.show()
+    yield window
+    window.deleteLater()
+
+
+def _baseline_find_nearest_visible_children_of_type(
+    target_point: QPoint, parent_widget: QWidget, widget_class: str
+) -> Iterator[QWidget]:
+    """Copy of the nearest widget search before the k-nearest lookup.
+
+    Kept here as the reference for the benchmark. It recurses into every
+    descendant returned by the already recursive findChildren and sorts
+    all visible descendants before filtering them by class.
+    """
+    nearest_visible_children = set()
+
+    def distance_to_widget(widget: QWidget) -> int:
+        widget_center = widget.geometry().center()
+
+        # Calculate the Euclidean distance (squared)
+        return (target_point.x() - widget_center.x()) ** 2 + (
+            target_point.y() - widget_center.y()
+        ) ** 2
+
+    def find_recursive(widget: QWidget) -> None:
+        for child in widget.findChildren(QWidget):
+            if child.isVisible():
+                nearest_visible_children.add((child, (distance_to_widget(child))))
+                find_recursive(child)
+
+    # Start the recursive search from the parent widget
+    find_recursive(parent_widget)
+
+    # Sort the results by distance
+    widgets = (
+        child[0] for child in sorted(nearest_visible_children, key=lambda x: x[1])
+    )
+    return (widget for widget in widgets if widget.__class__.__name__ == widget_class)
+
+
+def test_benchmark_nearest_widget_search(synthetic_widget_tree: QWidget):
+    target = synthetic_widget_tree.findChildren(QPushButton)[0]
+    point = target.geometry().center()
+    widget_spec = WidgetSpec.create(target)
+
+    start = time.perf_counter_ns()
+    baseline = next(
+        _baseline_find_nearest_visible_children_of_type(
+            point, synthetic_widget_tree, "QPushButton"
+        )
+    )
+    baseline_ms = (time.perf_counter_ns() - start) / 1_000_000
+
+    start = time.perf_counter_ns()
+    found = widget_spec.get_suitable_widget(point, synthetic_widget_tree)
+    k_nearest_ms = (time.perf_counter_ns() - start) / 1_000_000
+
+    LOGGER.info(
+        "Nearest widget search in %d widgets: %.1f ms with the baseline, "
+        "%.1f ms with the k-nearest lookup",
+        len(synthetic_widget_tree.findChildren(QWidget)),
+        baseline_ms,
+        k_nearest_ms,
+    )
+    # Widgets of other containers share the parent relative geometry, so
+    # the unordered baseline may return any of them
+    assert baseline.geometry().center() == point
+    assert found is target
@@ -0,0 +1,120 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+from collections.abc import Callable, Iterator
+
+import pytest
+from qgis.core import QgsFeature, QgsGeometry, QgsProject, QgsVectorLayer
+from qgis_macros.layer_edits import (
+    LayerEdit,
+    LayerEditRecorder,
+    apply_with_data_provider,
+    apply_with_edit_buffer,
+)
+
+
+@pytest.fixture
+def attribute_layer(qgis_new_project: None) -> Iterator[QgsVectorLayer]:
+    layer = QgsVectorLayer(
+        "Point?crs=EPSG:3067&field=name:string&field=value:integer",
+        "attribute layer",
+        "memory",
+    )
+    feature = QgsFeature(layer.fields())
+    feature.setAttributes(["existing", 1])
+    feature.setGeometry(QgsGeometry.fromWkt("POINT(1 1)"))
+    assert layer.dataProvider().addFeatures([feature])[0]
+    QgsProject.instance().addMapLayer(layer)
+    assert layer.startEditing()
+    yield layer
+    layer.rollBack()
+
+
+def _existing_feature_id(layer: QgsVectorLayer) -> int:
+    return next(layer.getFeatures()).id()
+
+
+def test_layer_edit_recorder_should_merge_changes_of_added_features(
+    attribute_layer: QgsVectorLayer,
+):
+    existing_feature_id = _existing_feature_id(attribute_layer)
+    recorder = LayerEditRecorder()
+    recorder.start()
+
+    feature = QgsFeature(attribute_layer.fields())
+    feature.setAttributes(["new", 2])
+    feature.setGeometry(QgsGeometry.fromWkt("POINT(2 2)"))
+    attribute_layer.addFeature(feature)
+    attribute_layer.changeAttributeValue(feature.id(), 1, 3)
+    attribute_layer.changeAttributeValue(existing_feature_id, 0, "changed")
+    attribute_layer.changeAttributeValue(existing_feature_id, 1, 4)
+    edits = recorder.stop()
+
+    assert edits == [
+        LayerEdit(
+            LayerEdit.ADD_FEATURE,
+            attribute_layer.id(),
+            attribute_layer.name(),
+            feature.id(),
+            attributes={"name": "new", "value": 3},
+            geometry="Point (2 2)",
+        ),
+        LayerEdit(
+            LayerEdit.CHANGE_ATTRIBUTE,
+            attribute_layer.id(),
+            attribute_layer.name(),
+            existing_feature_id,
+            attributes={"name": "changed", "value": 4},
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "apply_edits",
+    [apply_with_edit_buffer, apply_with_data_provider],
+    ids=["edit_buffer", "data_provider"],
+)
+def test_layer_edits_should_be_applied_in_bulk(
+    attribute_layer: QgsVectorLayer,
+    apply_edits: Callable[[list[LayerEdit]], None],
+):
+    existing_feature_id = _existing_feature_id(attribute_layer)
+    edits = [
+        LayerEdit(
+            LayerEdit.ADD_FEATURE,
+            "missing_id",
+            attribute_layer.name(),
+            -1,
+            attributes={"name": f"new {i}", "value": i},
+            geometry=f"Point ({i} {i})",
+        )
+        for i in range(10)
+    ]
+    edits.append(
+        LayerEdit(
+            LayerEdit.CHANGE_ATTRIBUTE,
+            attribute_layer.id(),
+            attribute_layer.name(),
+            existing_feature_id,
+            attributes={"value": "42"},
+        )
+    )
+
+    apply_edits(edits)
+
+    assert attribute_layer.featureCount() == 11
+    assert attribute_layer.getFeature(existing_feature_id)["value"] == 42
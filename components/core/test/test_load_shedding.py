@@ -0,0 +1,72 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+from qgis_macros.constants import (
+    LOAD_SHEDDING_RECOVERY_FRAMES,
+    NS_PER_US,
+    RECORDER_FRAME_NS,
+)
+from qgis_macros.load_shedding import Degradation, LoadShedder
+
+
+def test_load_shedder_should_degrade_over_budget_and_recover():
+    shedder = LoadShedder(frame_budget_us=100)
+
+    changes = [
+        shedder.add(frame * RECORDER_FRAME_NS, 200 * NS_PER_US) for frame in range(5)
+    ]
+
+    # Each overloaded frame applies one more degradation once it has ended
+    assert changes == [False, True, True, True, False]
+    assert all(shedder.is_active(degradation) for degradation in Degradation)
+
+    # The load drops, and the frames without events count as calm too
+    assert not shedder.add(5 * RECORDER_FRAME_NS, 0)
+    calm_frame = 5 + LOAD_SHEDDING_RECOVERY_FRAMES
+    assert shedder.add(calm_frame * RECORDER_FRAME_NS, 0)
+    assert shedder.is_active(Degradation.DEFERRED_WIDGET_PATHS)
+    assert not shedder.is_active(Degradation.SKIPPED_HOVER_MOVES)
+
+    end_ns = (calm_frame + 1) * RECORDER_FRAME_NS
+    assert shedder.finish(end_ns) == [
+        {
+            "degradation": "reduced_move_sampling",
+            "start_ns": RECORDER_FRAME_NS,
+            "end_ns": end_ns,
+        },
+        {
+            "degradation": "deferred_widget_paths",
+            "start_ns": 2 * RECORDER_FRAME_NS,
+            "end_ns": end_ns,
+        },
+        {
+            "degradation": "skipped_hover_moves",
+            "start_ns": 3 * RECORDER_FRAME_NS,
+            "end_ns": calm_frame * RECORDER_FRAME_NS,
+        },
+    ]
+
+
+def test_load_shedder_should_not_degrade_under_budget():
+    shedder = LoadShedder(frame_budget_us=100)
+
+    changes = [
+        shedder.add(frame * RECORDER_FRAME_NS, 50 * NS_PER_US) for frame in range(5)
+    ]
+
+    assert not any(changes)
+    assert shedder.finish(5 * RECORDER_FRAME_NS) == []
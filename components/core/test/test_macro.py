@@ -15,8 +15,19 @@
 #
 #  You should have received a copy of the GNU General Public License
 #  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+import dataclasses
+
 import pytest
-from qgis_macros.macro import Macro, Position
+from qgis_macros.macro import (
+    Macro,
+    MacroKeyEvent,
+    MacroMouseEvent,
+    MacroMouseMoveEvent,
+    MacroTextEntryEvent,
+    Position,
+    Trajectory,
+    WidgetSpec,
+)
 
 pytest_plugins = [
     "macro_test_utils.macro_fixture",
@@ -77,3 +88,120 @@ def test_position_interpolation(
     expected_positions: list[Position],
 ):
     assert Position.interpolate(positions, number_of_positions) == expected_positions
+
+
+def test_trajectory_should_behave_like_a_sequence_of_positions():
+    positions = [_create_test_position(*point) for point in [(0, 0), (1, 1), (2, 2)]]
+
+    trajectory = Trajectory(positions)
+
+    assert len(trajectory) == 3
+    assert trajectory == positions
+    assert list(trajectory) == positions
+    assert trajectory[-1] == positions[-1]
+    assert trajectory[1:] == positions[1:]
+    assert Trajectory.from_dicts(trajectory.serialize()) == trajectory
+
+
+def test_serialize_event_should_serialize_trajectory_without_copying_it():
+    event = MacroMouseMoveEvent(
+        WidgetSpec("QWidget", ""),
+        positions=Trajectory(
+            [_create_test_position(*point) for point in [(0, 0), (5, 5)]]
+        ),
+    )
+
+    serialized = Macro.serialize_event(event)
+
+    assert serialized == {
+        **dataclasses.asdict(event),
+        "positions": event.positions.serialize(),
+        "type": "MacroMouseMoveEvent",
+    }
+    assert Macro.deserialize_event(serialized) == event
+
+
+def test_mouse_move_event_should_skip_duplicate_positions():
+    event = MacroMouseMoveEvent(
+        widget_spec=WidgetSpec("QWidget", ""),
+        positions=[_create_test_position(0, 0)],
+    )
+
+    event.add_position(_create_test_position(0, 0))
+    event.add_position(_create_test_position(1, 1))
+    event.add_position(_create_test_position(1, 1))
+
+    assert isinstance(event.positions, Trajectory)
+    assert event.positions == [
+        _create_test_position(0, 0),
+        _create_test_position(1, 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("points", "expected_points"),
+    [
+        ([(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)], [(0, 0), (4, 4)]),
+        ([(0, 0), (1, 0), (2, 1), (3, 0), (4, 0)], [(0, 0), (4, 0)]),
+        (
+            [(0, 0), (5, 0), (10, 0), (10, 5), (10, 10)],
+            [(0, 0), (10, 0), (10, 10)],
+        ),
+    ],
+    ids=["straight_line", "within_tolerance", "corner"],
+)
+def test_trajectory_should_simplify_positions_while_appending(
+    points: list[tuple[int, int]], expected_points: list[tuple[int, int]]
+):
+    trajectory = Trajectory()
+
+    for point in points:
+        trajectory.append_simplified(_create_test_position(*point), tolerance=1)
+
+    assert trajectory == [_create_test_position(*point) for point in expected_points]
+
+
+def test_text_entry_event_serialization_and_deserialization():
+    widget_spec = WidgetSpec("QLineEdit", "")
+    macro = Macro(
+        [
+            MacroTextEntryEvent(
+                widget_spec=widget_spec,
+                text="a",
+                key_events=[
+                    MacroKeyEvent(widget_spec=widget_spec, key=65),
+                    MacroKeyEvent(widget_spec=widget_spec, key=65, is_release=True),
+                ],
+            )
+        ]
+    )
+
+    deserialized = Macro.deserialize(macro.serialize())
+
+    assert deserialized == macro
+    assert deserialized.events[0].key_events == macro.events[0].key_events
+
+
+def test_map_coordinates_serialization_and_deserialization():
+    widget_spec = WidgetSpec("QWidget", "")
+    move_event = MacroMouseMoveEvent(widget_spec=widget_spec, map_crs="EPSG:3067")
+    move_event.add_position(_create_test_position(0, 0), map_point=(1.5, 2.5))
+    move_event.add_position(_create_test_position(5, 5))
+    macro = Macro(
+        [
+            move_event,
+            MacroMouseEvent(
+                widget_spec=widget_spec,
+                position=_create_test_position(5, 5),
+                map_position=(3.5, 4.5),
+                map_crs="EPSG:3067",
+            ),
+        ]
+    )
+
+    deserialized = Macro.deserialize(macro.serialize())
+
+    assert deserialized == macro
+    assert deserialized.events[0].positions.map_points == [(1.5, 2.5), None]
+    assert deserialized.events[0].map_crs == "EPSG:3067"
+    assert deserialized.events[1].map_position == (3.5, 4.5)
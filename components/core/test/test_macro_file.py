@@ -0,0 +1,66 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+import json
+from typing import TYPE_CHECKING
+
+from qgis_macros.macro import Macro
+from qgis_macros.macro_file import MacroSaveTask
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+pytest_plugins = [
+    "macro_test_utils.macro_fixture",
+]
+
+
+def test_macro_save_task_should_write_macros(
+    digitize_polygon_macro: Macro, tmp_path: "Path"
+):
+    path = tmp_path / "macros.json"
+    task = MacroSaveTask([digitize_polygon_macro], path)
+
+    assert task.run()
+
+    data = json.loads(path.read_text())
+    assert [Macro.deserialize(macro_data) for macro_data in data] == [
+        digitize_polygon_macro
+    ]
+
+
+def test_macro_save_task_should_write_macros_listed_when_created(
+    digitize_polygon_macro: Macro, tmp_path: "Path"
+):
+    path = tmp_path / "macros.json"
+    macros = [digitize_polygon_macro]
+    task = MacroSaveTask(macros, path)
+    macros.clear()
+
+    assert task.run()
+
+    (macro_data,) = json.loads(path.read_text())
+    assert Macro.deserialize(macro_data) == digitize_polygon_macro
+
+
+def test_macro_save_task_should_store_error(
+    digitize_polygon_macro: Macro, tmp_path: "Path"
+):
+    task = MacroSaveTask([digitize_polygon_macro], tmp_path / "missing" / "a.json")
+
+    assert not task.run()
+    assert isinstance(task.error, FileNotFoundError)
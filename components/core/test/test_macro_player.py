@@ -20,19 +20,36 @@ from collections.abc import Iterator
 from typing import TYPE_CHECKING
 
 import pytest
-from macro_test_utils.utils import WidgetEventListener
-from qgis.core import QgsFeature
-from qgis.gui import QgsMapToolDigitizeFeature
+from macro_test_utils.utils import WidgetEventListener, WidgetInfo
+from qgis.analysis import QgsNativeAlgorithms
+from qgis.core import QgsApplication, QgsFeature, QgsProject
+from qgis.gui import QgsMapToolDigitizeFeature, QgsMapToolEmitPoint
+from qgis.PyQt.QtCore import QElapsedTimer
 from qgis_macros.exceptions import MacroPlaybackEndedError
+from qgis_macros.layer_edits import LayerEdit
 from qgis_macros.macro import (
+    LayerTreeOperation,
     Macro,
+    MacroActionEvent,
+    MacroCanvasExtentEvent,
+    MacroItemSelectionEvent,
+    MacroKeyEvent,
+    MacroLayerTreeEvent,
+    MacroMouseEvent,
+    MacroProcessingEvent,
+    MacroTextEntryEvent,
+    MacroWheelEvent,
+    Position,
+    WidgetPath,
     WidgetSpec,
 )
 from qgis_macros.macro_player import (
+    MacroPlaybackMode,
     MacroPlaybackReport,
     MacroPlaybackStatus,
     MacroPlayer,
 )
+from qgis_macros.settings import Settings
 
 TIMEOUT = 1000
 
@@ -42,6 +59,8 @@ if TYPE_CHECKING:
     from macro_test_utils.utils import Dialog
     from pytest_mock import MockerFixture
     from pytestqt.qtbot import QtBot
+    from qgis.core import QgsVectorLayer
+    from qgis.gui import QgsMapCanvas
 
 pytest_plugins = [
     "macro_test_utils.macro_fixture",
@@ -255,3 +274,394 @@ def test_macro_recorder_should_record_digitizing_polygon(
     assert feature.isValid()
     # Asserting geometry causes segfault
     # assert feature.geometry()
+
+
+def test_macro_player_should_repeat_auto_repeated_key_press(
+    line_edit_macro: Macro,
+    macro_player: MacroPlayer,
+    dialog: "Dialog",
+    qtbot: "QtBot",
+):
+    for event in line_edit_macro.events:
+        if isinstance(event, MacroKeyEvent) and not event.is_release:
+            event.repeat_count = 2
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(line_edit_macro)
+    assert dialog.line_edit.text() == "aaa"
+
+
+@pytest.mark.parametrize("insert", [False, True], ids=["type", "insert"])
+def test_macro_player_should_enter_text(
+    macro_player: MacroPlayer,
+    dialog: "Dialog",
+    qtbot: "QtBot",
+    insert: bool,
+):
+    Settings.insert_text_entries.set(insert)
+    dialog.line_edit.setFocus()
+    macro = Macro(
+        [
+            MacroTextEntryEvent(
+                widget_spec=WidgetSpec.create(dialog.line_edit), text="Hello"
+            )
+        ]
+    )
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro)
+    assert dialog.line_edit.text() == "Hello"
+
+
+def test_macro_player_should_wait_the_recorded_gap_before_each_event(
+    macro_player: MacroPlayer,
+    dialog: "Dialog",
+    qtbot: "QtBot",
+):
+    dialog.line_edit.setFocus()
+    widget_spec = WidgetSpec.create(dialog.line_edit)
+    macro = Macro(
+        [
+            MacroTextEntryEvent(widget_spec=widget_spec, text="a"),
+            MacroTextEntryEvent(
+                widget_spec=widget_spec, ms_since_last_event=200, text="b"
+            ),
+        ]
+    )
+    timer = QElapsedTimer()
+    text_change_times: list[int] = []
+    dialog.line_edit.textChanged.connect(
+        lambda _: text_change_times.append(timer.elapsed())
+    )
+    timer.start()
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro)
+    assert dialog.line_edit.text() == "ab"
+    assert text_change_times[-1] - text_change_times[0] >= 200
+
+
+def test_macro_player_should_pace_events_by_timestamps(
+    macro_player: MacroPlayer,
+    dialog: "Dialog",
+    qtbot: "QtBot",
+):
+    Settings.paced_playback.set(True)
+    dialog.line_edit.setFocus()
+    widget_spec = WidgetSpec.create(dialog.line_edit)
+    macro = Macro(
+        [
+            MacroTextEntryEvent(
+                widget_spec=widget_spec, text="a", timestamp_ns=1_000_000
+            ),
+            # The gap would make the playback wait a second before the event
+            MacroTextEntryEvent(
+                widget_spec=widget_spec,
+                ms_since_last_event=1000,
+                text="b",
+                timestamp_ns=101_000_000,
+            ),
+        ]
+    )
+    timer = QElapsedTimer()
+    timer.start()
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro)
+    assert 100 <= timer.elapsed() < 1000
+    assert dialog.line_edit.text() == "ab"
+
+
+def test_macro_player_should_trigger_action(
+    macro_player: MacroPlayer,
+    dialog: "Dialog",
+    qtbot: "QtBot",
+):
+    macro = Macro(
+        [
+            MacroActionEvent(
+                widget_spec=WidgetSpec.create(dialog.menu),
+                text_path=["", "Action 2"],
+            )
+        ]
+    )
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended, dialog.action2.triggered],
+        check_params_cbs=checkers,
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro)
+
+
+def test_macro_player_should_select_items(
+    macro_player: MacroPlayer,
+    dialog: "Dialog",
+    qtbot: "QtBot",
+):
+    macro = Macro(
+        [
+            MacroItemSelectionEvent(
+                widget_spec=WidgetSpec.create(dialog.combobox),
+                widget_path=WidgetPath.create(dialog.combobox),
+                index_path=[2],
+                text="Item 3",
+            ),
+            MacroItemSelectionEvent(
+                widget_spec=WidgetSpec.create(dialog.list_widget),
+                widget_path=WidgetPath.create(dialog.list_widget),
+                # Stale path, the item is found by its text
+                index_path=[0],
+                text="List Item 2",
+            ),
+        ]
+    )
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro)
+    assert dialog.combobox.currentIndex() == 2
+    assert dialog.list_widget.currentRow() == 1
+
+
+@pytest.mark.parametrize(
+    ("single", "expected_index"), [(False, 2), (True, 1)], ids=["burst", "single"]
+)
+def test_macro_player_should_scroll_combobox_by_merged_wheel_notches(
+    macro_player: MacroPlayer,
+    dialog: "Dialog",
+    qtbot: "QtBot",
+    single: bool,
+    expected_index: int,
+):
+    Settings.single_wheel_events.set(single)
+    combobox = WidgetInfo.from_widget("combobox", dialog.combobox)
+    # Two notches scrolled down, merged while recording
+    macro = Macro(
+        [
+            MacroWheelEvent(
+                widget_spec=combobox.widget_spec,
+                widget_path=WidgetPath.create(dialog.combobox),
+                position=combobox.position,
+                delta=-240,
+                timings=[10],
+            )
+        ]
+    )
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro)
+    # A combo box moves one item per wheel event regardless of the delta
+    assert dialog.combobox.currentIndex() == expected_index
+
+
+def test_macro_player_should_set_canvas_extent(
+    macro_player: MacroPlayer,
+    qgis_canvas: "QgsMapCanvas",
+    qtbot: "QtBot",
+):
+    macro = Macro(
+        [
+            MacroCanvasExtentEvent(
+                widget_spec=WidgetSpec.create(qgis_canvas.viewport()),
+                center=(100.0, 200.0),
+                scale=5000.0,
+                crs=qgis_canvas.mapSettings().destinationCrs().authid(),
+            )
+        ]
+    )
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro)
+    assert qgis_canvas.center().x() == pytest.approx(100.0, abs=1)
+    assert qgis_canvas.center().y() == pytest.approx(200.0, abs=1)
+    assert qgis_canvas.scale() == pytest.approx(5000.0, rel=0.01)
+
+
+def test_macro_player_should_click_canvas_at_map_position(
+    macro_player: MacroPlayer,
+    qgis_canvas: "QgsMapCanvas",
+    qtbot: "QtBot",
+):
+    qgis_canvas.zoomScale(5000)
+    map_position = (qgis_canvas.center().x() + 10, qgis_canvas.center().y() - 10)
+    crs = qgis_canvas.mapSettings().destinationCrs().authid()
+    widget_spec = WidgetSpec.create(qgis_canvas.viewport())
+    # The recorded pixel position is outside the canvas on purpose
+    position = Position((-100, -100), (-100, -100))
+    macro = Macro(
+        [
+            MacroMouseEvent(
+                widget_spec=widget_spec,
+                position=position,
+                map_position=map_position,
+                map_crs=crs,
+            ),
+            MacroMouseEvent(
+                widget_spec=widget_spec,
+                position=position,
+                is_release=True,
+                map_position=map_position,
+                map_crs=crs,
+            ),
+        ]
+    )
+    tool = QgsMapToolEmitPoint(qgis_canvas)
+    clicked_points = []
+    tool.canvasClicked.connect(lambda point, _: clicked_points.append(point))
+    qgis_canvas.setMapTool(tool)
+
+    try:
+        with qtbot.waitSignals(
+            [macro_player.playback_ended],
+            check_params_cbs=checkers[:1],
+            timeout=TIMEOUT,
+        ):
+            macro_player.play(macro)
+        qtbot.waitUntil(lambda: len(clicked_points) == 1, timeout=TIMEOUT)
+    finally:
+        qgis_canvas.unsetMapTool(tool)
+
+    clicked_point = clicked_points[0]
+    tolerance = qgis_canvas.mapUnitsPerPixel()
+    assert clicked_point.x() == pytest.approx(map_position[0], abs=tolerance)
+    assert clicked_point.y() == pytest.approx(map_position[1], abs=tolerance)
+
+
+def test_macro_player_should_apply_layer_tree_operations(
+    macro_player: MacroPlayer,
+    point_layers: list["QgsVectorLayer"],
+    qtbot: "QtBot",
+):
+    root = QgsProject.instance().layerTreeRoot()
+    first_layer, second_layer, last_layer = point_layers
+    macro = Macro(
+        [
+            MacroLayerTreeEvent(
+                widget_spec=WidgetSpec("QgsLayerTreeView", ""),
+                operations=[
+                    LayerTreeOperation(
+                        LayerTreeOperation.VISIBILITY,
+                        first_layer.id(),
+                        first_layer.name(),
+                        visible=False,
+                    ),
+                    # A layer id from another project falls back to the name
+                    LayerTreeOperation(
+                        LayerTreeOperation.INSERT, "missing_id", last_layer.name()
+                    ),
+                    LayerTreeOperation(
+                        LayerTreeOperation.REMOVE,
+                        "missing_id",
+                        last_layer.name(),
+                        index=3,
+                    ),
+                ],
+            )
+        ]
+    )
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro)
+
+    assert not root.findLayer(first_layer.id()).itemVisibilityChecked()
+    assert [node.layerId() for node in root.findLayers()] == [
+        last_layer.id(),
+        first_layer.id(),
+        second_layer.id(),
+    ]
+
+
+@pytest.mark.parametrize(
+    "mode", [MacroPlaybackMode.EDIT_BUFFER, MacroPlaybackMode.DATA_PROVIDER]
+)
+def test_macro_player_should_apply_layer_edits_in_bulk_mode(
+    macro_player: MacroPlayer,
+    point_layers: list["QgsVectorLayer"],
+    qtbot: "QtBot",
+    mode: MacroPlaybackMode,
+):
+    layer = point_layers[0]
+    macro = Macro(
+        [MacroKeyEvent(widget_spec=WidgetSpec("QWidget", ""), key=65)],
+        layer_edits=[
+            LayerEdit(LayerEdit.ADD_FEATURE, layer.id(), geometry="Point (1 1)")
+        ],
+    )
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT,
+    ):
+        macro_player.play(macro, mode)
+
+    assert layer.featureCount() == 1
+    layer.rollBack()
+
+
+@pytest.fixture
+def native_algorithms() -> None:
+    registry = QgsApplication.processingRegistry()
+    if registry.providerById("native") is None:
+        registry.addProvider(QgsNativeAlgorithms())
+
+
+@pytest.mark.usefixtures("native_algorithms")
+def test_macro_player_should_run_processing_algorithms_over_inputs(
+    macro_player: MacroPlayer,
+    point_layers: list["QgsVectorLayer"],
+    qtbot: "QtBot",
+):
+    macro = Macro(
+        [
+            MacroKeyEvent(widget_spec=WidgetSpec("QWidget", ""), key=65),
+            MacroProcessingEvent(
+                widget_spec=WidgetSpec("QWidget", ""),
+                algorithm_id="native:centroids",
+                parameters={"INPUT": "missing", "OUTPUT": "TEMPORARY_OUTPUT"},
+            ),
+        ]
+    )
+
+    with qtbot.waitSignals(
+        [macro_player.playback_ended],
+        check_params_cbs=checkers[:1],
+        timeout=TIMEOUT * 10,
+    ):
+        macro_player.play(
+            macro,
+            MacroPlaybackMode.PROCESSING,
+            [{"INPUT": layer.id()} for layer in point_layers],
+        )
@@ -16,25 +16,58 @@
 #  You should have received a copy of the GNU General Public License
 #  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
 import logging
-from collections.abc import Iterator
-from typing import TYPE_CHECKING
+from collections.abc import Iterator, Sequence
+from typing import TYPE_CHECKING, Any
 
 import pytest
 from macro_test_utils import macro_utils
-from macro_test_utils.utils import Dialog, WidgetInfo
+from macro_test_utils.utils import Dialog, WidgetInfo, finish_recording
 from qgis.core import (
+    QgsApplication,
     QgsFeature,
+    QgsProject,
+    QgsVectorLayer,
 )
 from qgis.gui import (
+    QgsGui,
     QgsMapCanvas,
     QgsMapToolDigitizeFeature,
 )
-from qgis.PyQt.QtCore import QPoint, Qt
-from qgis_macros.macro import Position
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QEvent, QPoint, QPointF, Qt
+from qgis.PyQt.QtGui import QKeyEvent, QWheelEvent
+from qgis.PyQt.QtWidgets import QApplication, QPushButton, QWidget
+from qgis_macros.constants import (
+    NS_PER_MS,
+    SCOPED_WINDOW_POLL_INTERVAL_MS,
+    SPOOL_TAIL_LENGTH,
+)
+from qgis_macros.macro import (
+    LayerTreeOperation,
+    Macro,
+    MacroActionEvent,
+    MacroCanvasExtentEvent,
+    MacroItemSelectionEvent,
+    MacroKeyEvent,
+    MacroLayerTreeEvent,
+    MacroMouseEvent,
+    MacroMouseMoveEvent,
+    MacroProcessingEvent,
+    MacroTextEntryEvent,
+    MacroWheelEvent,
+    Position,
+    WidgetPath,
+    WidgetSpec,
+)
 from qgis_macros.macro_recorder import MacroRecorder
-from qgis_macros.utils import enum_value
+from qgis_macros.settings import Settings
+from qgis_macros.utils import enum_value, iface
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
     from pytestqt.qtbot import QtBot
 
 WAIT_MS = 5
@@ -42,11 +75,34 @@ LOGGER = logging.getLogger(__name__)
 
 
 @pytest.fixture
-def macro_recorder() -> Iterator[MacroRecorder]:
-    recorder = MacroRecorder()
-    recorder.start_recording()
-    yield recorder
-    recorder.stop_recording()
+def start_recorder() -> Iterator["Callable[..., MacroRecorder]"]:
+    """Return a function that applies settings and starts a new recorder.
+
+    The keyword arguments other than *windows* are names and values of
+    settings. Recorders still recording at teardown are stopped, so that a
+    failed test does not leave a recorder filtering the events of the
+    following tests.
+    """
+    recorders: list[MacroRecorder] = []
+
+    def start(
+        windows: Sequence[QWidget] | None = None, **settings: Any
+    ) -> MacroRecorder:
+        for name, value in settings.items():
+            Settings[name].set(value)
+        recorder = MacroRecorder()
+        recorder.start_recording(windows)
+        recorders.append(recorder)
+        return recorder
+
+    yield start
+    for recorder in recorders:
+        recorder.stop_recording()
+
+
+@pytest.fixture
+def macro_recorder(start_recorder: "Callable[..., MacroRecorder]") -> MacroRecorder:
+    return start_recorder()
 
 
 @pytest.mark.skip(reason="Ment for manual testing")
@@ -56,7 +112,7 @@ def test_macro_recorder_manual(
 ):
     while dialog.isVisible():
         qtbot.wait(100)
-    macro = macro_recorder.stop_recording()
+    macro = finish_recording(macro_recorder)
     assert macro
     LOGGER.info("\nMacro:\n%s", str(macro).replace("Macro", "\nMacro"))
 
@@ -97,7 +153,7 @@ def test_macro_recorder_should_record_button_clicking_macro(
         pos=button.position.local_point,
         modifier=modifier,
     )
-    macro = macro_recorder.stop_recording()
+    macro = finish_recording(macro_recorder)
 
     # Assert
     assert macro.events == list(
@@ -143,7 +199,7 @@ def test_macro_recorder_should_record_button_double_clicking_macro(
         pos=button.position.local_point,
         modifier=modifier,
     )
-    macro = macro_recorder.stop_recording()
+    macro = finish_recording(macro_recorder)
 
     # Assert
     assert macro.events == [
@@ -195,7 +251,7 @@ def test_macro_recorder_should_record_key_clicking_macro(
     qtbot.keyPress(dialog.line_edit, Qt.Key.Key_A, modifier=modifier)
     qtbot.wait(WAIT_MS)
     qtbot.keyRelease(dialog.line_edit, Qt.Key.Key_A, modifier=modifier)
-    macro = macro_recorder.stop_recording()
+    macro = finish_recording(macro_recorder)
 
     assert (
         dialog.line_edit.text() == "a"
@@ -251,7 +307,7 @@ def test_macro_recorder_should_record_digitizing_polygon(
         )
     assert isinstance(blocker.args[0], QgsFeature)
 
-    macro = macro_recorder.stop_recording()
+    macro = finish_recording(macro_recorder)
     assert macro.events == [
         *macro_utils.widget_clicking_macro_events(canvas, initial_position),
         macro_utils.mouse_move_macro_event(canvas, [second_position]),
@@ -262,3 +318,732 @@ def test_macro_recorder_should_record_digitizing_polygon(
             canvas, initial_position, button=enum_value(Qt.MouseButton.RightButton)
         ),
     ]
+
+
+@pytest.fixture
+def deferred_macro_recorder(
+    start_recorder: "Callable[..., MacroRecorder]",
+) -> MacroRecorder:
+    return start_recorder(defer_widget_path_capture=True)
+
+
+def test_macro_recorder_should_resolve_deferred_widget_paths_on_stop(
+    dialog: Dialog,
+    deferred_macro_recorder: MacroRecorder,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+):
+    button = dialog_widget_positions["button"]
+
+    qtbot.mouseClick(
+        dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    macro = finish_recording(deferred_macro_recorder)
+
+    assert macro.events == list(macro_utils.widget_clicking_macro_events(button))
+    assert all(
+        event.widget_path == WidgetPath.create(dialog.button) for event in macro.events
+    )
+
+
+def test_macro_recorder_should_resolve_deferred_widget_paths_when_idle(
+    dialog: Dialog,
+    deferred_macro_recorder: MacroRecorder,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+):
+    button = dialog_widget_positions["button"]
+
+    qtbot.mouseClick(
+        dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    qtbot.waitUntil(lambda: not deferred_macro_recorder._pending_widget_paths)
+
+    assert all(
+        event.widget_path == WidgetPath.create(dialog.button)
+        for event in deferred_macro_recorder._recorded_events
+    )
+
+
+def test_macro_recorder_should_snapshot_deferred_widget_path_on_close(
+    dialog: Dialog,
+    deferred_macro_recorder: MacroRecorder,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+):
+    button = dialog_widget_positions["button"]
+    expected_path = WidgetPath.create(dialog.button)
+
+    qtbot.mouseClick(
+        dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    dialog.button.hide()
+    dialog.button.deleteLater()
+    qtbot.wait(WAIT_MS)
+    macro = finish_recording(deferred_macro_recorder)
+
+    assert macro.events
+    assert all(event.widget_path == expected_path for event in macro.events)
+
+
+def test_macro_recorder_should_snapshot_deferred_widget_path_of_deleted_child(
+    deferred_macro_recorder: MacroRecorder,
+    qtbot: "QtBot",
+):
+    container = QWidget()
+    button = QPushButton("Delete me with my parent", container)
+    container.show()
+    qtbot.waitExposed(container)
+    expected_path = WidgetPath.create(button)
+
+    qtbot.mouseClick(button, Qt.MouseButton.LeftButton)
+    # Only the parent gets an event before the child is destroyed with it
+    container.deleteLater()
+    qtbot.waitUntil(lambda: not deferred_macro_recorder._pending_widget_paths)
+    macro = finish_recording(deferred_macro_recorder)
+
+    assert macro.events
+    assert all(event.widget_path == expected_path for event in macro.events)
+
+
+def test_macro_recorder_should_resolve_deferred_widget_paths_of_closed_window_only(
+    deferred_macro_recorder: MacroRecorder,
+    qtbot: "QtBot",
+    mocker: "MockerFixture",
+):
+    mocker.patch.object(deferred_macro_recorder._idle_timer, "start")
+    closed_window, open_window = QWidget(), QWidget()
+    closed_button = QPushButton("Closed", closed_window)
+    open_button = QPushButton("Open", open_window)
+    for window in (closed_window, open_window):
+        window.show()
+        qtbot.waitExposed(window)
+    expected_path = WidgetPath.create(closed_button)
+
+    qtbot.mouseClick(closed_button, Qt.MouseButton.LeftButton)
+    qtbot.mouseClick(open_button, Qt.MouseButton.LeftButton)
+    closed_window.hide()
+
+    assert list(deferred_macro_recorder._pending_widgets_by_window) == [
+        sip.unwrapinstance(open_window)
+    ]
+    assert list(deferred_macro_recorder._pending_widget_paths) == [
+        sip.unwrapinstance(open_button)
+    ]
+    closed_window_events = [
+        event
+        for event in deferred_macro_recorder._recorded_events
+        if event.widget_spec.text == "Closed"
+    ]
+    assert closed_window_events
+    assert all(event.widget_path == expected_path for event in closed_window_events)
+    finish_recording(deferred_macro_recorder)
+    closed_window.deleteLater()
+    open_window.deleteLater()
+
+
+def test_macro_recorder_should_reuse_cached_widget_paths(
+    dialog: Dialog,
+    macro_recorder: MacroRecorder,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+):
+    button = dialog_widget_positions["button"]
+    cache = macro_recorder.widget_path_cache
+
+    qtbot.mouseClick(
+        dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    misses = cache.misses
+    hits = cache.hits
+    qtbot.mouseClick(
+        dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+
+    assert cache.misses == misses
+    assert cache.hits >= hits + 2
+
+
+def test_macro_recorder_should_invalidate_widget_paths_on_structure_change(
+    dialog: Dialog,
+    macro_recorder: MacroRecorder,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+):
+    button = dialog_widget_positions["button2"]
+    cache = macro_recorder.widget_path_cache
+    qtbot.mouseClick(
+        dialog.button2, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    misses = cache.misses
+
+    dialog.layout().insertWidget(0, QPushButton("New button"))
+    qtbot.mouseClick(
+        dialog.button2, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    macro = finish_recording(macro_recorder)
+
+    assert cache.misses > misses
+    assert macro.events[-1].widget_path == WidgetPath.create(dialog.button2)
+
+
+def test_macro_recorder_should_record_only_scoped_windows(
+    dialog: Dialog,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    button = dialog_widget_positions["button"]
+    other_window = QPushButton("Not recorded")
+    # Focused windows would be added to the recording
+    other_window.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+    qtbot.addWidget(other_window)
+    other_window.show()
+    recorder = start_recorder(windows=[dialog])
+
+    qtbot.mouseClick(other_window, Qt.MouseButton.LeftButton)
+    qtbot.mouseClick(
+        dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    macro = finish_recording(recorder)
+
+    assert macro.events == list(macro_utils.widget_clicking_macro_events(button))
+
+
+def test_macro_recorder_should_follow_widgets_added_to_scoped_windows(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    recorder = start_recorder(windows=[dialog])
+    new_button = QPushButton("New button")
+    dialog.layout().addWidget(new_button)
+    qtbot.waitExposed(new_button)
+    new_button_info = WidgetInfo.from_widget("new_button", new_button)
+
+    qtbot.mouseClick(
+        new_button,
+        Qt.MouseButton.LeftButton,
+        pos=new_button_info.position.local_point,
+    )
+    macro = finish_recording(recorder)
+
+    assert macro.events == list(
+        macro_utils.widget_clicking_macro_events(new_button_info)
+    )
+
+
+def test_macro_recorder_should_pick_up_windows_shown_without_focus(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    recorder = start_recorder(windows=[dialog])
+    tool_window = QPushButton("Tool window")
+    tool_window.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+    tool_window.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+    qtbot.addWidget(tool_window)
+    tool_window.show()
+    qtbot.waitExposed(tool_window)
+    qtbot.wait(SCOPED_WINDOW_POLL_INTERVAL_MS * 2)
+    tool_window_info = WidgetInfo.from_widget("tool_window", tool_window)
+
+    qtbot.mouseClick(
+        tool_window,
+        Qt.MouseButton.LeftButton,
+        pos=tool_window_info.position.local_point,
+    )
+    macro = finish_recording(recorder)
+
+    assert macro.events == list(
+        macro_utils.widget_clicking_macro_events(tool_window_info)
+    )
+
+
+def test_macro_recorder_should_stream_events_to_spool(
+    dialog: Dialog,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+    tmp_path: "Path",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    line_edit = dialog_widget_positions["line_edit"]
+    text = "abcdefghijklmnopqrst"
+    recorder = start_recorder(macro_save_path=str(tmp_path), spool_recordings=True)
+    spool_path = recorder.spool_path
+
+    qtbot.keyClicks(dialog.line_edit, text)
+    # All but the in-memory tail is written to the spool during the recording
+    assert len(recorder._recorded_events) == SPOOL_TAIL_LENGTH
+    macro = finish_recording(recorder)
+
+    assert spool_path.parent == tmp_path / "spool"
+    # The spool is removed once the macro is built from it
+    assert not spool_path.exists()
+    assert macro.events == [
+        event
+        for i in range(len(text))
+        for event in macro_utils.key_macro_events(line_edit, Qt.Key.Key_A + i)
+    ]
+
+
+@pytest.mark.parametrize("spool", [False, True], ids=["in_memory", "spooled"])
+def test_macro_recorder_should_emit_macro_built_in_background(
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+    tmp_path: "Path",
+    spool: bool,
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    button = dialog_widget_positions["button"]
+    recorder = start_recorder(macro_save_path=str(tmp_path), spool_recordings=spool)
+    qtbot.mouseClick(
+        button.widget, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+
+    with qtbot.waitSignal(recorder.recorded_macro_loaded) as blocker:
+        recorder.stop_recording()
+        # The events are handed over to the task right away
+        assert not recorder._recorded_events
+        assert not recorder.is_recording()
+
+    assert blocker.args[0].events == list(
+        macro_utils.widget_clicking_macro_events(button, button.position)
+    )
+
+
+def test_macro_recorder_should_reset_spool_after_writer_error(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    tmp_path: "Path",
+    mocker: "MockerFixture",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    mocker.patch.object(Macro, "serialize_event", side_effect=OSError("Disk full"))
+    recorder = start_recorder(macro_save_path=str(tmp_path), spool_recordings=True)
+
+    qtbot.keyClicks(dialog.line_edit, "abcdefghijklmnopqrst")
+    with qtbot.waitSignal(recorder.recorded_macro_load_failed) as blocker:
+        recorder.stop_recording()
+
+    assert isinstance(blocker.args[0], OSError)
+    assert recorder.spool_path is None
+    assert not recorder.is_recording()
+
+
+def test_macro_recorder_should_keep_unique_spool_files(
+    tmp_path: "Path", start_recorder: "Callable[..., MacroRecorder]"
+):
+    spool_paths = []
+    for _ in range(2):
+        recorder = start_recorder(
+            macro_save_path=str(tmp_path), spool_recordings=True, keep_spool_files=True
+        )
+        spool_paths.append(recorder.spool_path)
+        finish_recording(recorder)
+
+    assert spool_paths[0] != spool_paths[1]
+    assert all(spool_path.is_file() for spool_path in spool_paths)
+
+
+def test_macro_recorder_should_collapse_auto_repeated_key_presses(
+    dialog: Dialog,
+    macro_recorder: MacroRecorder,
+    dialog_widget_positions: dict[str, WidgetInfo],
+):
+    line_edit = dialog_widget_positions["line_edit"]
+    dialog.line_edit.setFocus()
+
+    def send_key_event(event_type: QEvent.Type, *, auto_repeat: bool) -> None:
+        event = QKeyEvent(
+            event_type, Qt.Key.Key_A, Qt.KeyboardModifier.NoModifier, "a", auto_repeat
+        )
+        QApplication.sendEvent(dialog.line_edit, event)
+
+    send_key_event(QEvent.Type.KeyPress, auto_repeat=False)
+    for _ in range(3):
+        send_key_event(QEvent.Type.KeyRelease, auto_repeat=True)
+        send_key_event(QEvent.Type.KeyPress, auto_repeat=True)
+    send_key_event(QEvent.Type.KeyRelease, auto_repeat=False)
+    macro = finish_recording(macro_recorder)
+
+    press, release = macro_utils.key_macro_events(line_edit, Qt.Key.Key_A)
+    press.repeat_count = 3
+    assert macro.events == [press, release]
+    assert dialog.line_edit.text() == "aaaa"
+
+
+def test_macro_recorder_should_cap_mouse_move_sample_rate(
+    dialog: Dialog,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    button = dialog_widget_positions["button"]
+    recorder = start_recorder(move_event_sample_rate=1)
+
+    for x in range(1, 6):
+        qtbot.mouseMove(dialog.button, pos=QPoint(x, 1))
+    qtbot.mouseClick(
+        dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    move_event = next(
+        event
+        for event in recorder._recorded_events
+        if isinstance(event, MacroMouseMoveEvent)
+    )
+    finish_recording(recorder)
+
+    # Only the first sample and the end point of the segment are kept
+    assert len(move_event.positions) <= 2
+    assert move_event.positions[-1].local_position == (5, 1)
+
+
+def test_macro_recorder_should_stamp_events_on_one_timeline(
+    dialog: Dialog,
+    macro_recorder: MacroRecorder,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+):
+    button = dialog_widget_positions["button"]
+
+    for _ in range(2):
+        qtbot.mouseClick(
+            dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+        )
+        qtbot.wait(20)
+    macro = finish_recording(macro_recorder)
+
+    timestamps = [event.timestamp_ns for event in macro.events]
+    assert timestamps[0] > 0
+    assert timestamps == sorted(timestamps)
+    for previous, event in zip(macro.events, macro.events[1:], strict=False):
+        assert event.ms_since_last_event == (
+            (event.timestamp_ns - previous.timestamp_ns) // NS_PER_MS
+        )
+    assert macro.events[-2].ms_since_last_event >= 20
+
+
+def test_macro_recorder_should_profile_capture_overhead(
+    dialog: Dialog,
+    dialog_widget_positions: dict[str, WidgetInfo],
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    button = dialog_widget_positions["button"]
+    recorder = start_recorder(profile_recorder=True)
+
+    qtbot.mouseClick(
+        dialog.button, Qt.MouseButton.LeftButton, pos=button.position.local_point
+    )
+    macro = finish_recording(recorder)
+
+    profile = macro.metadata["recorder_profile"]
+    for label in (
+        "MouseButtonPress",
+        "MouseButtonRelease",
+        "_record_mouse_button_event",
+    ):
+        assert profile["labels"][label]["count"] >= 1
+        assert profile["labels"][label]["max_us"] >= profile["labels"][label]["p95_us"]
+    assert profile["widget_path_create_ms"] > 0
+    group = Settings.profile_recorder_group.get()
+    assert group in QgsApplication.profiler().groups()
+    QgsApplication.profiler().clear(group)
+
+
+def test_macro_recorder_should_degrade_recording_over_frame_budget(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    # Handling any event takes longer than the budget
+    recorder = start_recorder(recorder_frame_budget_us=1)
+
+    for x in range(1, 6):
+        qtbot.mouseMove(dialog.button, pos=QPoint(x, 1))
+        qtbot.wait(20)
+    macro = finish_recording(recorder)
+
+    degradations = macro.metadata["degradations"]
+    assert degradations[0]["degradation"] == "reduced_move_sampling"
+    assert degradations[0]["start_ns"] <= degradations[0]["end_ns"]
+
+
+def test_macro_recorder_should_merge_consecutive_wheel_events(
+    dialog: Dialog,
+    macro_recorder: MacroRecorder,
+    dialog_widget_positions: dict[str, WidgetInfo],
+):
+    list_widget = dialog_widget_positions["list_widget_viewport"]
+
+    for _ in range(3):
+        event = QWheelEvent(
+            QPointF(list_widget.position.local_point),
+            QPointF(list_widget.position.global_point),
+            QPoint(0, 0),
+            QPoint(0, 120),
+            Qt.MouseButton.NoButton,
+            Qt.KeyboardModifier.NoModifier,
+            Qt.ScrollPhase.NoScrollPhase,
+            False,  # noqa: FBT003
+        )
+        QApplication.sendEvent(list_widget.widget, event)
+    macro = finish_recording(macro_recorder)
+
+    wheel_events = [
+        event for event in macro.events if isinstance(event, MacroWheelEvent)
+    ]
+    assert len(wheel_events) == 1
+    assert wheel_events[0].delta == 360
+    assert len(wheel_events[0].timings) == 2
+
+
+def test_macro_recorder_should_collapse_typed_text_into_text_entry(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    recorder = start_recorder(record_text_entry_events=True)
+    dialog.line_edit.setFocus()
+
+    qtbot.keyClicks(dialog.line_edit, "Hello")
+    macro = finish_recording(recorder)
+
+    assert len(macro.events) == 1
+    text_entry = macro.events[0]
+    assert isinstance(text_entry, MacroTextEntryEvent)
+    assert text_entry.text == "Hello"
+    assert len(text_entry.key_events) == 10
+
+
+def test_macro_recorder_should_keep_shift_presses_in_text_entry(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    recorder = start_recorder(record_text_entry_events=True)
+    dialog.line_edit.setFocus()
+
+    # Typed like a person, with separate Shift presses around the capitals
+    for word in ("Hello ", "World"):
+        qtbot.keyPress(dialog.line_edit, Qt.Key.Key_Shift)
+        qtbot.keyClick(dialog.line_edit, word[0])
+        qtbot.keyRelease(dialog.line_edit, Qt.Key.Key_Shift)
+        qtbot.keyClicks(dialog.line_edit, word[1:])
+    macro = finish_recording(recorder)
+
+    # Only the first Shift press comes before the text entry starts
+    shift_press, text_entry = macro.events
+    assert isinstance(shift_press, MacroKeyEvent)
+    assert shift_press.key == Qt.Key.Key_Shift
+    assert isinstance(text_entry, MacroTextEntryEvent)
+    assert text_entry.text == "Hello World"
+    assert [
+        (key_event.key, key_event.is_release)
+        for key_event in text_entry.key_events
+        if key_event.key == Qt.Key.Key_Shift
+    ] == [
+        (Qt.Key.Key_Shift, True),
+        (Qt.Key.Key_Shift, False),
+        (Qt.Key.Key_Shift, True),
+    ]
+
+
+def test_macro_recorder_should_record_menu_action(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    recorder = start_recorder(record_action_events=True)
+    dialog.menu.popup(dialog.menu_button.mapToGlobal(QPoint(0, 0)))
+    qtbot.waitExposed(dialog.menu)
+
+    with qtbot.waitSignal(dialog.action2.triggered):
+        qtbot.mouseClick(
+            dialog.menu,
+            Qt.MouseButton.LeftButton,
+            pos=dialog.menu.actionGeometry(dialog.action2).center(),
+        )
+    macro = finish_recording(recorder)
+
+    assert macro.events == [
+        MacroActionEvent(
+            widget_spec=WidgetSpec.create(dialog.menu), text_path=["", "Action 2"]
+        )
+    ]
+
+
+def test_macro_recorder_should_record_list_item_selection(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    list_widget = dialog.list_widget
+    index = list_widget.model().index(1, 0)
+    recorder = start_recorder(record_item_selection_events=True)
+
+    qtbot.mouseClick(
+        list_widget.viewport(),
+        Qt.MouseButton.LeftButton,
+        pos=list_widget.visualRect(index).center(),
+    )
+    macro = finish_recording(recorder)
+
+    assert macro.events == [
+        MacroItemSelectionEvent(
+            widget_spec=WidgetSpec.create(list_widget),
+            index_path=[1],
+            text="List Item 2",
+        )
+    ]
+
+
+def test_macro_recorder_should_record_combobox_item_selection(
+    dialog: Dialog,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    combobox = dialog.combobox
+    recorder = start_recorder(record_item_selection_events=True)
+    combobox.showPopup()
+    view = combobox.view()
+    qtbot.waitExposed(view)
+
+    qtbot.mouseClick(
+        view.viewport(),
+        Qt.MouseButton.LeftButton,
+        pos=view.visualRect(combobox.model().index(2, 0)).center(),
+    )
+    macro = finish_recording(recorder)
+
+    assert macro.events == [
+        MacroItemSelectionEvent(
+            widget_spec=WidgetSpec.create(combobox), index_path=[2], text="Item 3"
+        )
+    ]
+
+
+def test_macro_recorder_should_record_canvas_extent_changes(
+    qgis_canvas: QgsMapCanvas,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    recorder = start_recorder(record_canvas_extents=True)
+
+    qgis_canvas.zoomScale(5000)
+    viewport = WidgetInfo.from_widget("viewport", qgis_canvas.viewport())
+    QApplication.sendEvent(
+        viewport.widget,
+        QWheelEvent(
+            QPointF(viewport.position.local_point),
+            QPointF(viewport.position.global_point),
+            QPoint(0, 0),
+            QPoint(0, 120),
+            Qt.MouseButton.NoButton,
+            Qt.KeyboardModifier.NoModifier,
+            Qt.ScrollPhase.NoScrollPhase,
+            False,  # noqa: FBT003
+        ),
+    )
+    qtbot.wait(WAIT_MS)
+    macro = finish_recording(recorder)
+
+    # The wheel event is recorded only as the extent change it caused
+    assert all(isinstance(event, MacroCanvasExtentEvent) for event in macro.events)
+    center = qgis_canvas.center()
+    assert macro.events[-1] == MacroCanvasExtentEvent(
+        widget_spec=WidgetSpec.create(qgis_canvas.viewport()),
+        center=(center.x(), center.y()),
+        scale=qgis_canvas.scale(),
+        rotation=qgis_canvas.rotation(),
+        crs=qgis_canvas.mapSettings().destinationCrs().authid(),
+    )
+
+
+def test_macro_recorder_should_record_map_coordinates_of_canvas_events(
+    qgis_canvas: QgsMapCanvas,
+    qtbot: "QtBot",
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    viewport = WidgetInfo.from_widget("viewport", qgis_canvas.viewport())
+    point = viewport.position.local_point
+    expected_map_point = qgis_canvas.getCoordinateTransform().toMapCoordinates(
+        point.x(), point.y()
+    )
+    recorder = start_recorder(record_map_coordinates=True)
+
+    qtbot.mouseClick(viewport.widget, Qt.MouseButton.LeftButton, pos=point)
+    qtbot.wait(WAIT_MS)
+    macro = finish_recording(recorder)
+
+    mouse_events = [
+        event for event in macro.events if isinstance(event, MacroMouseEvent)
+    ]
+    assert len(mouse_events) == 2
+    for event in mouse_events:
+        assert event.map_position == pytest.approx(
+            (expected_map_point.x(), expected_map_point.y())
+        )
+        assert event.map_crs == qgis_canvas.mapSettings().destinationCrs().authid()
+
+
+def test_macro_recorder_should_record_layer_tree_operations_as_one_batch(
+    point_layers: list[QgsVectorLayer],
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    root = QgsProject.instance().layerTreeRoot()
+    first_layer, _, last_layer = point_layers
+    recorder = start_recorder(record_layer_tree_operations=True)
+
+    root.findLayer(first_layer.id()).setItemVisibilityChecked(False)
+    # Move the last layer to the top like the layers panel does
+    node = root.findLayer(last_layer.id())
+    root.insertChildNode(0, node.clone())
+    root.removeChildNode(node)
+    # Adding a layer to the project is not a layer tree operation
+    QgsProject.instance().addMapLayer(
+        QgsVectorLayer("Point?crs=EPSG:3067", "new layer", "memory")
+    )
+    macro = finish_recording(recorder)
+
+    assert len(macro.events) == 1
+    assert isinstance(macro.events[0], MacroLayerTreeEvent)
+    assert macro.events[0].operations == [
+        LayerTreeOperation(
+            LayerTreeOperation.VISIBILITY,
+            first_layer.id(),
+            first_layer.name(),
+            visible=False,
+        ),
+        LayerTreeOperation(
+            LayerTreeOperation.INSERT, last_layer.id(), last_layer.name(), index=0
+        ),
+        LayerTreeOperation(
+            LayerTreeOperation.REMOVE, last_layer.id(), last_layer.name(), index=3
+        ),
+    ]
+
+
+# The profiling wrapper must accept all arguments of the history signal
+@pytest.mark.parametrize("profile", [False, True], ids=["plain", "profiled"])
+def test_macro_recorder_should_record_processing_runs_from_history(
+    profile: bool,
+    start_recorder: "Callable[..., MacroRecorder]",
+):
+    parameters = {"INPUT": "layer_id", "DISTANCE": 10.0, "OUTPUT": "TEMPORARY_OUTPUT"}
+    recorder = start_recorder(record_processing_runs=True, profile_recorder=profile)
+
+    QgsGui.historyProviderRegistry().addEntry(
+        "processing", {"algorithm_id": "native:buffer", "parameters": parameters}
+    )
+    QgsGui.historyProviderRegistry().addEntry("dbmanager", {"query": "SELECT 1"})
+    macro = finish_recording(recorder)
+
+    assert macro.events == [
+        MacroProcessingEvent(
+            widget_spec=WidgetSpec.create(iface.mainWindow()),
+            algorithm_id="native:buffer",
+            parameters=parameters,
+        )
+    ]
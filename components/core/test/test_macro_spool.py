@@ -0,0 +1,95 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+from typing import TYPE_CHECKING
+
+import pytest
+from qgis_macros.macro import Macro, MacroMouseMoveEvent, Position, WidgetSpec
+from qgis_macros.macro_spool import MacroSpool
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+pytest_plugins = [
+    "macro_test_utils.macro_fixture",
+]
+
+
+def _write_spool(path: "Path", macro: Macro) -> None:
+    spool = MacroSpool(path)
+    spool.open(Macro([], name=macro.name, speed=macro.speed))
+    for event in macro.events:
+        spool.write(event)
+    spool.close()
+
+
+def test_macro_spool_should_load_written_macro(
+    digitize_polygon_macro: Macro, tmp_path: "Path"
+):
+    path = tmp_path / "spool" / "recording.jsonl"
+
+    _write_spool(path, digitize_polygon_macro)
+
+    assert MacroSpool.load(path) == digitize_polygon_macro
+
+
+def test_macro_spool_should_ignore_truncated_last_event(
+    digitize_polygon_macro: Macro, tmp_path: "Path"
+):
+    path = tmp_path / "recording.jsonl"
+    _write_spool(path, digitize_polygon_macro)
+    content = path.read_text(encoding="utf-8")
+    path.write_text(content[: content.rindex("\n", 0, -1) + 10], encoding="utf-8")
+
+    macro = MacroSpool.load(path)
+
+    assert macro.events == digitize_polygon_macro.events[:-1]
+
+
+def test_macro_spool_should_interpolate_moves_in_writer_thread(tmp_path: "Path"):
+    path = tmp_path / "recording.jsonl"
+    event = MacroMouseMoveEvent(WidgetSpec("QWidget", ""))
+    for x in range(10):
+        event.add_position(Position((x, 0), (x, 0)))
+
+    spool = MacroSpool(path)
+    spool.open(Macro([]))
+    spool.write(event, interpolation_count=4)
+    spool.close()
+
+    (loaded_event,) = MacroSpool.load(path).events
+    assert len(loaded_event.positions) == 4
+    assert loaded_event.positions[-1].local_position == (9, 0)
+
+
+def test_macro_spool_should_drop_events_after_writer_error(
+    tmp_path: "Path", mocker: "MockerFixture"
+):
+    mocker.patch.object(Macro, "serialize_event", side_effect=OSError("Disk full"))
+    event = MacroMouseMoveEvent(WidgetSpec("QWidget", ""))
+    spool = MacroSpool(tmp_path / "recording.jsonl")
+    spool.open(Macro([]))
+    spool.write(event)
+    spool._writer.join()
+
+    spool.write(event)
+
+    assert spool._queue.empty()
+    with pytest.raises(OSError, match="Disk full"):
+        spool.close()
@@ -0,0 +1,58 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+import json
+
+from qgis_macros.constants import NS_PER_US
+from qgis_macros.recorder_profile import OverheadStatistics, RecorderProfile
+
+
+def test_recorder_profile_should_summarize_durations():
+    profile = RecorderProfile()
+    for duration_us in range(1, 101):
+        profile.add("MouseMove", duration_us * NS_PER_US)
+    profile.add("KeyPress", 3 * NS_PER_US)
+
+    assert profile.labels == ["MouseMove", "KeyPress"]
+    assert profile.statistics("MouseMove") == OverheadStatistics(
+        count=100, mean_us=50.5, p95_us=95.0, max_us=100.0
+    )
+    assert profile.histogram("KeyPress") == {4: 1}
+    assert sum(profile.histogram("MouseMove").values()) == 100
+    assert profile.statistics("Wheel").count == 0
+
+
+def test_recorder_profile_should_convert_to_json_metadata():
+    profile = RecorderProfile()
+    profile.add("_record_key_event", 5 * NS_PER_US)
+    profile.widget_path_create_ns = 2_000_000
+
+    metadata = json.loads(json.dumps(profile.to_metadata()))
+
+    assert metadata == {
+        "labels": {
+            "_record_key_event": {
+                "count": 1,
+                "mean_us": 5.0,
+                "p95_us": 5.0,
+                "max_us": 5.0,
+                "histogram_us": {"8": 1},
+            }
+        },
+        "widget_path_create_ms": 2.0,
+    }
+    assert "WidgetPath.create: 2.0 ms total" in profile.report()
@@ -0,0 +1,152 @@
+#  Copyright (c) 2025-2026 macro-qgis-plugin contributors.
+#
+#
+#  This file is part of macro-qgis-plugin.
+#
+#  macro-qgis-plugin is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License as published
+#  by the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  macro-qgis-plugin is distributed in the hope that it will be
+#  useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#  of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import pytest
+from macro_test_utils.utils import Dialog, WidgetInfo
+from qgis.PyQt.QtCore import QPoint, Qt
+from qgis.PyQt.QtWidgets import (
+    QApplication,
+    QLabel,
+    QPushButton,
+    QScrollArea,
+    QVBoxLayout,
+    QWidget,
+)
+from qgis_macros.widget_index import WidgetRectIndex
+
+if TYPE_CHECKING:
+    from pytestqt.qtbot import QtBot
+
+
+@pytest.fixture
+def widget_index() -> Iterator[WidgetRectIndex]:
+    index = WidgetRectIndex()
+    index.start()
+    yield index
+    index.stop()
+
+
+def test_widget_index_finds_widget_at_point(
+    dialog: Dialog, widget_index: WidgetRectIndex
+) -> None:
+    button_position = WidgetInfo.from_widget("button", dialog.button).position
+
+    widget = widget_index.widget_at(button_position.global_point)
+
+    assert widget is QApplication.widgetAt(button_position.global_point)
+    assert widget is dialog.button
+
+
+def test_widget_index_finds_nearest_widgets_of_type(
+    dialog: Dialog, widget_index: WidgetRectIndex
+) -> None:
+    line_edit_position = WidgetInfo.from_widget("line_edit", dialog.line_edit).position
+
+    widgets = widget_index.nearest_of_type(
+        line_edit_position.global_point, dialog, "QPushButton", 2
+    )
+
+    assert widgets == [dialog.button2, dialog.button]
+
+
+def test_widget_index_is_rebuilt_after_widgets_change(
+    dialog: Dialog, widget_index: WidgetRectIndex
+) -> None:
+    button_position = WidgetInfo.from_widget("button2", dialog.button2).position
+    widget_index.widget_at(button_position.global_point)
+    widget_index.widget_at(button_position.global_point)
+    assert widget_index.builds == 1
+
+    dialog.button2.hide()
+    QApplication.processEvents()
+
+    assert widget_index.widget_at(button_position.global_point) is not dialog.button2
+    assert widget_index.builds == 2
+
+
+def test_widget_index_skips_widgets_scrolled_out_of_view(
+    widget_index: WidgetRectIndex, qtbot: "QtBot"
+) -> None:
+    scroll_area = QScrollArea()
+    content = QWidget()
+    layout = QVBoxLayout(content)
+    buttons = [QPushButton(f"button_{i}") for i in range(20)]
+    for button in buttons:
+        button.setFixedHeight(50)
+        layout.addWidget(button)
+    scroll_area.setWidget(content)
+    scroll_area.resize(200, 150)
+    qtbot.addWidget(scroll_area)
+    scroll_area.show()
+    qtbot.waitExposed(scroll_area)
+    scroll_area.verticalScrollBar().setValue(400)
+    QApplication.processEvents()
+    viewport = scroll_area.viewport()
+    viewport_center = viewport.mapToGlobal(viewport.rect().center())
+    scrolled_out = [
+        button
+        for button in buttons
+        if not button.visibleRegion().intersects(button.rect())
+    ]
+
+    assert widget_index.widget_at(viewport_center) is QApplication.widgetAt(
+        viewport_center
+    )
+    nearest = widget_index.nearest_of_type(
+        viewport_center, scroll_area, "QPushButton", len(buttons)
+    )
+    assert nearest
+    assert not set(nearest) & set(scrolled_out)
+
+
+def test_widget_index_clips_widgets_by_their_ancestors(
+    widget_index: WidgetRectIndex, qtbot: "QtBot"
+) -> None:
+    window = QWidget()
+    window.resize(200, 200)
+    container = QWidget(window)
+    container.setGeometry(0, 0, 100, 100)
+    button = QPushButton("button", container)
+    button.setGeometry(0, 0, 200, 200)
+    qtbot.addWidget(window)
+    window.show()
+    qtbot.waitExposed(window)
+    clipped_point = window.mapToGlobal(QPoint(150, 150))
+    visible_point = window.mapToGlobal(QPoint(50, 50))
+
+    assert widget_index.widget_at(clipped_point) is window
+    assert widget_index.widget_at(visible_point) is button
+
+
+def test_widget_index_skips_widgets_transparent_for_mouse_events(
+    dialog: Dialog, widget_index: WidgetRectIndex, qtbot: "QtBot"
+) -> None:
+    label = QLabel("overlay", dialog)
+    label.setGeometry(dialog.button.geometry())
+    label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+    label.show()
+    label.raise_()
+    qtbot.waitExposed(label)
+    button_position = WidgetInfo.from_widget("button", dialog.button).position
+
+    widget = widget_index.widget_at(button_position.global_point)
+
+    assert widget is QApplication.widgetAt(button_position.global_point)
+    assert widget is dialog.button
@@ -16,16 +16,23 @@
 #  You should have received a copy of the GNU General Public License
 #  along with macro-qgis-plugin. If not, see <https://www.gnu.org/licenses/>.
 
+from typing import TYPE_CHECKING
+
 from macro_test_utils.utils import Dialog
+from qgis.PyQt.QtWidgets import QPushButton, QWidget
 from qgis_macros.macro import (
     Macro,
     MacroMouseEvent,
     Position,
     WidgetPath,
+    WidgetPathCache,
     WidgetPathNode,
     WidgetSpec,
 )
 
+if TYPE_CHECKING:
+    from pytestqt.qtbot import QtBot
+
 
 def test_widget_path_create_and_find(dialog: Dialog) -> None:
     widget_path = WidgetPath.create(dialog.button)
@@ -57,6 +64,37 @@ def test_widget_path_finds_non_button_widgets(dialog: Dialog) -> None:
         assert found is widget, f"Failed to find {widget_name}"
 
 
+def test_widget_path_finds_widget_by_object_names_after_translation(
+    dialog: Dialog,
+) -> None:
+    dialog.setObjectName("macro_dialog")
+    dialog.button2.setObjectName("second_button")
+    widget_path = WidgetPath.create(dialog.button2)
+
+    dialog.setWindowTitle("Käännetty ikkuna")
+    dialog.button2.setText("Käännetty")
+
+    assert widget_path.window_object_name == "macro_dialog"
+    assert widget_path.nodes[-1].object_name == "second_button"
+    assert widget_path.find_widget() is dialog.button2
+
+
+def test_widget_path_ignores_object_names_shared_by_siblings_and_windows(
+    dialog: Dialog, qtbot: "QtBot"
+) -> None:
+    dialog.setObjectName("macro_dialog")
+    dialog.button.setObjectName("button")
+    dialog.button2.setObjectName("button")
+    other_window = QWidget()
+    other_window.setObjectName("macro_dialog")
+    other_window.setWindowTitle("Other window")
+    qtbot.addWidget(other_window)
+    other_window.show()
+    widget_path = WidgetPath.create(dialog.button2)
+
+    assert widget_path.find_widget() is dialog.button2
+
+
 def test_widget_path_returns_none_for_missing_window(dialog: Dialog) -> None:
     path = WidgetPath(
         window_title="nonexistent window title",
@@ -90,6 +128,7 @@ def test_widget_path_serialization_roundtrip(dialog: Dialog) -> None:
         assert original.widget_class == restored.widget_class
         assert original.sibling_index == restored.sibling_index
         assert original.text == restored.text
+        assert original.object_name == restored.object_name
 
 
 def test_widget_path_backwards_compatible_deserialization() -> None:
@@ -117,3 +156,37 @@ def test_widget_path_backwards_compatible_deserialization() -> None:
     event = macro.events[0]
     assert isinstance(event, MacroMouseEvent)
     assert event.widget_path is None
+
+
+def test_widget_path_cache_returns_cached_path(dialog: Dialog) -> None:
+    cache = WidgetPathCache()
+
+    first = cache.get(dialog.button)
+    second = cache.get(dialog.button)
+
+    assert first is second
+    assert first == WidgetPath.create(dialog.button)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_widget_path_cache_invalidates_descendants(dialog: Dialog) -> None:
+    cache = WidgetPathCache()
+    cache.get(dialog.button)
+    cache.get(dialog.button2)
+
+    dialog.layout().insertWidget(0, QPushButton("New button"))
+    cache.invalidate(dialog)
+
+    assert cache.get(dialog.button2) == WidgetPath.create(dialog.button2)
+    assert cache.get(dialog.button) == WidgetPath.create(dialog.button)
+    assert (cache.hits, cache.misses) == (0, 4)
+
+
+def test_widget_path_cache_refreshes_changed_button_text(dialog: Dialog) -> None:
+    cache = WidgetPathCache()
+    cache.get(dialog.button)
+
+    dialog.button.setText("Changed")
+
+    assert cache.get(dialog.button).nodes[-1].text == "Changed"
+    assert (cache.hits, cache.misses) == (0, 2)
@@ -33,6 +33,7 @@ class MacroTableModel(QAbstractTableModel):
         """Initialize the model with an empty macro list."""
         super().__init__()
         self.macros: list[Macro] = []
+        self._read_only = False
 
     def add_macro(self, macro: Macro) -> None:
         """Append a macro and notify attached views."""
@@ -50,6 +51,10 @@ class MacroTableModel(QAbstractTableModel):
         self.macros.pop(row)
         self.endRemoveRows()
 
+    def set_read_only(self, read_only: bool) -> None:  # noqa: FBT001
+        """Allow or deny renaming the macros, e.g. while they are being saved."""
+        self._read_only = read_only
+
     def reset_macros(self, macros: list[Macro]) -> None:
         """Replace the entire macro list and reset the model."""
         self.beginResetModel()
@@ -84,7 +89,7 @@ class MacroTableModel(QAbstractTableModel):
     def flags(self, index: QModelIndex) -> Qt.ItemFlag:
         """Return the flags for the given index."""
         default_flags = super().flags(index)
-        if index.isValid():
+        if index.isValid() and not self._read_only:
             return default_flags | Qt.ItemFlag.ItemIsEditable
         return default_flags
 
@@ -113,7 +118,7 @@ class MacroTableModel(QAbstractTableModel):
         role: Qt.ItemDataRole = Qt.ItemDataRole.EditRole,
     ) -> bool:
         """Set the data for the given index and role."""
-        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or self._read_only:
             return False
         row = index.row()
         name = value.strip()
@@ -18,6 +18,7 @@
 """Macro panel UI with recording, playback, and file I/O controls."""
 
 import json
+from functools import partial
 from pathlib import Path
 from typing import Any
 
@@ -31,8 +32,9 @@ from qgis.PyQt.QtWidgets import (
     QToolButton,
     QWidget,
 )
-from qgis_macros.exceptions import MacroPluginError
+from qgis_macros.exceptions import MacroPluginError, TaskCancelledError
 from qgis_macros.macro import Macro
+from qgis_macros.macro_file import MacroSaveTask
 from qgis_macros.macro_player import (
     MacroPlaybackReport,
     MacroPlaybackStatus,
@@ -89,10 +91,16 @@ class MacroPanel(UI_CLASS, QgsDevToolWidget):  # type: ignore
         self._recorder = macro_recorder
         self._recorder.add_widget_to_filter_events_out(self)
         self._recorder.add_widget_to_filter_events_out(self.button_record)
+        self._recorder.recorded_macro_loaded.connect(self._add_recorded_macro)
+        self._recorder.recorded_macro_load_failed.connect(
+            self._recorded_macro_load_failed
+        )
 
         self._player = macro_player
         self._player.playback_ended.connect(self._macro_playback_ended)
         self._last_played_macro_name: str | None = None
+        # Running save tasks, kept referenced until they finish
+        self._save_tasks: list[MacroSaveTask] = []
 
         self._model = MacroTableModel()
 
@@ -153,15 +161,23 @@ class MacroPanel(UI_CLASS, QgsDevToolWidget):  # type: ignore
         if not self._recorder.is_recording():
             self._recorder.start_recording()
         else:
-            macro = self._recorder.stop_recording()
-            macro.name = self._generate_macro_name()
-            self._model.add_macro(macro)
+            # The macro is built in the background and added once emitted
+            self._recorder.stop_recording()
+        self._update_ui_state()
+
+    def _add_recorded_macro(self, macro: Macro) -> None:
+        macro.name = self._generate_macro_name()
+        self._model.add_macro(macro)
 
-            new_index = self._model.index(len(self._model.macros) - 1, 0)
-            self.table_view.setCurrentIndex(new_index)
-            self.table_view.edit(new_index)
+        new_index = self._model.index(len(self._model.macros) - 1, 0)
+        self.table_view.setCurrentIndex(new_index)
+        self.table_view.edit(new_index)
         self._update_ui_state()
 
+    @log_if_fails
+    def _recorded_macro_load_failed(self, error: Exception) -> None:
+        raise MacroPluginError(tr("Finishing the recorded macro failed.")) from error
+
     def _play_macro(self) -> None:
         if not self._validate_macro_selection():
             return
@@ -231,14 +247,33 @@ class MacroPanel(UI_CLASS, QgsDevToolWidget):  # type: ignore
             path = Path(file_path)
             if not path.suffix:
                 path = path.with_name(path.name + ".json")
-            serialized_macros = [macro.serialize() for macro in self._model.macros]
-            with path.open("w") as f:
-                json.dump(serialized_macros, f, indent=4)
-            MsgBar.info(
-                tr("Macros saved"),
-                tr("File saved to {}", str(path)),
-                success=True,
-            )
+            # Serialize and write in a task to keep the UI responsive. The
+            # macros cannot be renamed until the task has finished.
+            task = MacroSaveTask(self._model.macros, path)
+            task.taskCompleted.connect(partial(self._macros_saved, task))
+            task.taskTerminated.connect(partial(self._macros_not_saved, task))
+            self._save_tasks.append(task)
+            self._model.set_read_only(True)
+            QgsApplication.taskManager().addTask(task)
+
+    def _macros_saved(self, task: MacroSaveTask) -> None:
+        self._save_task_finished(task)
+        MsgBar.info(
+            tr("Macros saved"),
+            tr("File saved to {}", str(task.path)),
+            success=True,
+        )
+
+    def _save_task_finished(self, task: MacroSaveTask) -> None:
+        self._save_tasks.remove(task)
+        self._model.set_read_only(bool(self._save_tasks))
+
+    @log_if_fails
+    def _macros_not_saved(self, task: MacroSaveTask) -> None:
+        self._save_task_finished(task)
+        raise MacroPluginError(tr("Saving macros failed.")) from (
+            task.error or TaskCancelledError(task.description())
+        )
 
     def _update_ui_state(self, *args: Any) -> None:
         """Update button enabled/checked states to reflect current status."""
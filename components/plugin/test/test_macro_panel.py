@@ -30,6 +30,8 @@ from qgis_macros.macro_recorder import MacroRecorder
 from qgis_macros.settings import Settings
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from pytest_mock import MockerFixture
     from pytest_subtests import SubTests
     from pytestqt.qtbot import QtBot
@@ -51,10 +53,20 @@ def mock_macro_recorder(
         mock_macro_recorder.start_recording.call_count
         > mock_macro_recorder.stop_recording.call_count
     )
-    mock_macro_recorder.stop_recording.return_value = mock_macro
+    mock_macro_recorder.recorded_macro_loaded = mocker.MagicMock()
+    mock_macro_recorder.recorded_macro_load_failed = mocker.MagicMock()
+    mock_macro_recorder.stop_recording.side_effect = lambda: _emit_recorded_macro(
+        mock_macro_recorder, mock_macro
+    )
     return mock_macro_recorder
 
 
+def _emit_recorded_macro(mock_macro_recorder: "MagicMock", macro: Macro) -> None:
+    """Call the slot connected to the recorded_macro_loaded signal."""
+    connect = mock_macro_recorder.recorded_macro_loaded.connect
+    connect.call_args.args[0](macro)
+
+
 @pytest.fixture
 def mock_macro_player(mocker: "MockerFixture", mock_macro: "MagicMock") -> "MagicMock":
     mock_player = mocker.create_autospec(MacroPlayer, instance=True)
@@ -199,7 +211,10 @@ def test_macro_panel_generates_incremental_names(
     mock_macro_1.name = None
     mock_macro_2 = mocker.create_autospec(Macro, instance=True)
     mock_macro_2.name = None
-    mock_macro_recorder.stop_recording.side_effect = [mock_macro_1, mock_macro_2]
+    macros = iter([mock_macro_1, mock_macro_2])
+    mock_macro_recorder.stop_recording.side_effect = lambda: _emit_recorded_macro(
+        mock_macro_recorder, next(macros)
+    )
 
     # Record first macro
     qtbot.mouseClick(macro_panel.button_record, Qt.MouseButton.LeftButton)
@@ -243,3 +258,33 @@ def test_macro_panel_delete_macro(
     assert macro_panel.table_view.selectedIndexes() == []
     assert macro_model.macros == []
     assert macro_model.rowCount(mock_index) == 0
+
+
+@pytest.mark.usefixtures("record_macro")
+def test_macro_panel_should_lock_names_while_saving_and_report_termination(
+    macro_panel: MacroPanel,
+    macro_model: MacroTableModel,
+    mock_macro: "MagicMock",
+    mocker: "MockerFixture",
+    tmp_path: "Path",
+) -> None:
+    index = macro_model.index(0, 0)
+    mocker.patch(
+        "macro_plugin.ui.macro_panel.QFileDialog.getSaveFileName",
+        return_value=(str(tmp_path / "macros.json"), ""),
+    )
+    mocker.patch("macro_plugin.ui.macro_panel.QgsApplication")
+    mock_msg_bar = mocker.patch("macro_plugin.ui.macro_panel.MsgBar")
+    macro_panel._save_macros_to_file()
+    (task,) = macro_panel._save_tasks
+    # Macros cannot be renamed while they are being saved
+    assert macro_model.setData(index, "renamed") is False
+
+    # Act
+    task.taskTerminated.emit()
+
+    # Assert
+    mock_msg_bar.info.assert_not_called()
+    assert macro_panel._save_tasks == []
+    assert macro_model.setData(index, "renamed") is True
+    assert mock_macro.name == "renamed"